@@ -1,8 +1,9 @@
 import logging
 from app.school.text_to_animation.GrammarParser import GrammarParser
 from time import time
-import json
-from app.school.text_to_animation.pose_video_creator import process_sentence
+from app.school.text_to_animation.pose_video_creator import process_sentence, lexicon_index, pose_cache, preprocessed_store, video_cache, PosePrefetcher
+from app.school.t2s_jobs import JobQueue
+from app.school.session_state import create_session_store
 
 
 def create_logger():
@@ -30,93 +31,211 @@ def create_logger():
     return logger
 
 
+class SignToTextUnavailable(RuntimeError):
+    """Raised when sign to text is used without a sign recognition pipeline configured."""
+
+
 class Connectinator:
     def __init__(self):
-        # Setting up the results list
-        self.full_phrase = AsyncResultsList(self)
-        self.end_phrase_flag = False
-        self.front_end_translation_variable = ''
+        # Sign to text state (recognised words, flags and translation) is kept per client session
+        self.sessions = create_session_store()
         self.geminiFlag = False
 
+        # Sign recognition pipeline: the input processor turns frames (landmarks, present) into chunks,
+        # the model predicts a word per chunk and the results parser makes a sentence of the words.
+        # None of them are part of this repository; until they are set, sign to text raises SignToTextUnavailable
+        self.inputProc = None
+        self.model = None
+        self.results_parser = None
+
         # Creating logger
         self.logger = create_logger()
 
         # Create grammar parser
         self.grammar_parser = GrammarParser()
 
+        # Background workers for /api/t2s/jobs
+        self.t2s_jobs = JobQueue()
+
+        # Load the index of available .pose files up front, so the first request doesn't pay for it
+        lexicon_index.refresh()
+
         self.predictionList = []
-        self.prevFlag = False
 
-    # Process the model output
-    def format_model_output(self, output):
+    # Process the model output for a session and return its translation
+    def format_model_output(self, output, session_id=None):
+        self._require_sign_to_text()
+        session = self.sessions.get(session_id)
+        self._translate_phrase(session, output)
+        self.sessions.save(session)
+        return session.translation
+
+    def _translate_phrase(self, session, output):
         processed_output = self.results_parser.parse_model_output(output)
 
         # Update log file
         self.logger.info(
-            'Model Output Processed Successfully! Message: %s', processed_output)
+            'Model Output Processed Successfully! Session: %s, Message: %s', session.session_id, processed_output)
 
-        # Pass this then to a variable being used for the react front end.
+        # Pass this then to the session's translation, read by the react front end.
         if processed_output is not None:
-            self.front_end_translation_variable = processed_output
+            session.translation = processed_output
 
         # print("DONEEE")
 
-        with open('model_output.txt', 'a+') as f:
-            f.write(
-                f"\nTime: {str(time())}, Phrase: {self.front_end_translation_variable}")
-
     # Return auslan grammar sentence
     def format_sign_text(self, input):
-
-        processed_t2s_phrase = self.grammar_parser.parse_text_to_auslan_grammar(input)
-
-        # Create video from the processed sentence
-        process_sentence(processed_t2s_phrase)
+        return self.create_sign_video(input)["glosses"]
+
+    # Convert text to Auslan grammar and render its video. progress(stage) is called as each stage starts.
+    # Returns the glosses, the video URL, per-stage timings (seconds) and which caches were hit
+    def create_sign_video(self, input, progress=None):
+        if progress is None:
+            progress = lambda stage: None
+        start = time()
+        grammar_metrics = {}
+        video_metrics = {}
+
+        # In streaming mode, poses start downloading as soon as each gloss is generated
+        prefetcher = PosePrefetcher() if self.grammar_parser.streaming else None
+        try:
+            progress("grammar")
+            processed_t2s_phrase = self.grammar_parser.parse_text_to_auslan_grammar(
+                input, metrics=grammar_metrics, on_gloss=prefetcher.add_word if prefetcher else None)
+
+            # Create video from the processed sentence
+            progress("video")
+            video_url = process_sentence(processed_t2s_phrase, prefetcher=prefetcher, metrics=video_metrics)
+        finally:
+            if prefetcher:
+                prefetcher.close()
 
         # Update log file
         self.logger.info(
             'Text To Sign Processed Successfully! Message: %s', processed_t2s_phrase)
 
-        return processed_t2s_phrase
-
-    def get_translation(self):
-        return self.front_end_translation_variable
+        timings = {stage: seconds for stage, seconds in grammar_metrics.items()
+                   if stage != "total" and isinstance(seconds, float)}
+        timings["grammar"] = grammar_metrics.get("total", 0.0)
+        timings.update((stage, seconds) for stage, seconds in video_metrics.items()
+                       if stage != "total" and isinstance(seconds, float))
+        timings["video"] = video_metrics.get("total", 0.0)
+        timings["total"] = time() - start
+
+        return {
+            "glosses": processed_t2s_phrase,
+            "video_url": video_url,
+            "grammar_backend": grammar_metrics.get("grammar_backend"),
+            "timings": timings,
+            "cache": {
+                "grammar_response": grammar_metrics.get("llm_cached", False),
+                "video": video_metrics.get("video_cached", False),
+            },
+        }
+
+    # Queue a text to sign request; raises QueueFullError when too many are waiting
+    def submit_sign_text(self, input):
+        job_id = self.t2s_jobs.submit(self.create_sign_video, input)
+        self.logger.info('Queued text to sign job %s: %s', job_id, input)
+        return job_id
+
+    # State of a queued text to sign request, or None if it is unknown
+    def get_sign_text_job(self, job_id):
+        return self.t2s_jobs.status(job_id)
+
+    # Rebuild the pose lexicon index, or just register the given newly uploaded poses
+    def refresh_lexicon(self, pose_names=None):
+        if pose_names:
+            for pose_name in pose_names:
+                lexicon_index.add(pose_name)
+                # A re-upload under the same name must not be served from the local cache
+                pose_cache.invalidate(pose_name)
+                preprocessed_store.invalidate(pose_name)
+        else:
+            lexicon_index.refresh()
+
+        self.logger.info('Lexicon index refreshed. %d pose files indexed', len(lexicon_index))
+        return len(lexicon_index)
+
+    # Hit/miss counters for the text to sign caches
+    def get_cache_stats(self):
+        return {
+            "rendered_videos": video_cache.stats(),
+            "pose_files": pose_cache.stats(),
+            "preprocessed_poses": preprocessed_store.stats(),
+            "grammar_responses": self.grammar_parser.response_cache.stats(),
+        }
+
+    def get_translation(self, session_id=None):
+        return self.sessions.get(session_id).translation
 
     def get_gem_flag(self):
         return self.geminiFlag
 
-    # Process frame
-    async def process_frame(self, keypoints):
-        # print(keypoints)
-        full_chunk, self.end_phrase_flag = self.inputProc.process_frame(
-            keypoints)
+    # Process frame for a client session: landmarks x channels in the zero-filled order of
+    # scripts/mp_data_collection.py, and which landmark groups (pose, left hand, right hand) were detected
+    async def process_frame(self, landmarks, present, session_id=None):
+        self._require_sign_to_text()
+        session = self.sessions.get(session_id)
+        state = session.snapshot()
+        # print(landmarks)
+        full_chunk, session.end_phrase_flag = self.inputProc.process_frame(
+            landmarks, present)
         # print(keypoints)
         # full_chunk, self.end_phrase_flag = self.inputProc.process_frame(
         #     keypoints)
-        if self.end_phrase_flag == True and self.prevFlag == False:
+        if session.end_phrase_flag == True and session.prev_flag == False:
             # print("meow meow meow meow")
-            self.prevFlag = True
+            session.prev_flag = True
             # print(self.end_phrase_flag, self.prevFlag)
-            self.full_phrase.parse_results()
-            self.prevFlag = False
+            self._parse_phrase(session)
+            session.prev_flag = False
 
             # print(f"End Phrase: {self.end_phrase_flag}")
 
         if full_chunk is not None:
             # print("AAAAAAAAa SENT TO THE MODEL")
-            self.prevFlag = False
+            session.prev_flag = False
+            self._save_session(session, state)
 
-            # async predict the work and then add it to the self.full_phrase
+            # async predict the work and then add it to the session's phrase
 
             predicted_result = await self.predict_model(full_chunk)
-
-            with open('ball.txt', 'a+') as f:
-                f.write(f"time: {str(time())}, predict:")
-                f.write(json.dumps(str(predicted_result)))
-                f.write("\n\n")
-                
-            print(predicted_result['model_output'])
-            self.full_phrase.append(predicted_result['model_output'])
+            self.logger.debug('Prediction for session %s: %s', session.session_id, predicted_result)
+
+            # Reload, as the session may have been updated (e.g. by another worker) during the prediction
+            session = self.sessions.get(session_id)
+            state = session.snapshot()
+            self.logger.info(
+                f"Word added with shape {predicted_result['model_output']}")
+            session.phrase.append(predicted_result['model_output'])
+
+        self._save_session(session, state)
+
+    def _require_sign_to_text(self):
+        missing = [name for name in ("inputProc", "model", "results_parser") if getattr(self, name) is None]
+        if missing:
+            raise SignToTextUnavailable(f"Sign to text is not configured (missing {', '.join(missing)})")
+
+    # Write a session back only if its state changed since `state`, most frames don't change it
+    def _save_session(self, session, state):
+        if session.snapshot() != state:
+            self.sessions.save(session)
+        else:
+            self.sessions.touch(session)
+
+    # Process a KeypointBatch (see keypoint_codec), from JSON or packed frames, in order
+    async def process_frames(self, batch, session_id=None):
+        for landmarks, present in batch:
+            await self.process_frame(landmarks, present, session_id)
+
+    # Translate the words recognised so far in a session and start a new phrase
+    def _parse_phrase(self, session):
+        saved_results = list(session.phrase)
+        session.phrase.clear()
+
+        self.logger.info("Parsing results for session %s...", session.session_id)
+        self._translate_phrase(session, saved_results)
 
     # TODO: LISTENER FOR RECEIVE FROM SAVE CHUNK, SEND TO MODEL
 
@@ -127,30 +246,3 @@ class Connectinator:
         return await self.model.query_model(keypoints)
 
     # TODO: LISTENER FOR RECEIVE OUTPUT FROM MODEL, ADD TO LIST, SEND TO RESULTS PARSER
-
-# Custom list class so that it can access run async and check when stuff is added
-
-class AsyncResultsList(list):
-    def __init__(self, connectinator_instance: Connectinator, *args):
-        super().__init__(*args)
-        self.saved_results = None
-        self.connectinator = connectinator_instance
-
-    def append(self, item):
-        # print("adding worekds")
-        self.connectinator.logger.info(
-            f"Word added with shape {item}")
-        super().append(item)
-
-    # async call the connectinator.format_model_output on this list
-
-    def parse_results(self):
-        # Reset list result
-        self.saved_results = [i for i in self]
-        self.clear()
-
-        # Reset the flag
-        self.connectinator.logger.info("Parsing results asynchronously...")
-   
-        # change to pass saves results
-        self.connectinator.format_model_output(self.saved_results)
@@ -0,0 +1,191 @@
+import json
+import time
+import struct
+import argparse
+
+import numpy as np
+
+
+# Landmarks of a frame, in wire order, as in scripts/mp_data_collection.py. Missing groups are zero-filled.
+LANDMARK_GROUPS = (("pose", 33), ("left_hand", 21), ("right_hand", 21))
+LANDMARKS_PER_FRAME = sum(count for _, count in LANDMARK_GROUPS)
+CHANNELS = ("x", "y", "z", "visibility")
+
+# Content type of packed keypoint frames on /api/keypoints (anything else is read as JSON)
+KEYPOINT_MIMETYPE = "application/x-keypoint-frames"
+
+# Packed frame layout, little endian:
+#   header: magic "KP", version (u8), dtype (u8), frame count (u16), landmarks (u8), channels (u8)
+#   one byte per frame with a bit per landmark group that was present, padded to a multiple of 4 bytes
+#   frames x landmarks x channels values of the given dtype
+HEADER = struct.Struct("<2sBBHBB")
+MAGIC = b"KP"
+VERSION = 1
+DTYPES = {1: np.dtype("<f2"), 2: np.dtype("<f4")}
+DTYPE_CODES = {dtype: code for code, dtype in DTYPES.items()}
+
+
+class KeypointFormatError(ValueError):
+    """Raised when packed or JSON keypoint frames are malformed."""
+
+
+class KeypointBatch:
+    """Keypoint frames as arrays.
+
+    `landmarks` has shape (frames, LANDMARKS_PER_FRAME, len(CHANNELS)). When decoded
+    from packed frames it is a read-only view of the request body (float16 or float32).
+    `present` has shape (frames, len(LANDMARK_GROUPS)) and says which groups were detected.
+    """
+
+    def __init__(self, landmarks, present):
+        self.landmarks = landmarks
+        self.present = present
+
+    def __len__(self):
+        return len(self.landmarks)
+
+    def __iter__(self):
+        """Yield (landmarks, present) for each frame, in order."""
+        return zip(self.landmarks, self.present)
+
+
+def _padded(count):
+    return (count + 3) & ~3
+
+
+def encode_frames(landmarks, present=None, dtype=np.float16):
+    """
+    Pack keypoint frames.
+
+    Args:
+        landmarks: Array-like of shape (frames, LANDMARKS_PER_FRAME, len(CHANNELS)).
+        present: Booleans of shape (frames, len(LANDMARK_GROUPS)). Defaults to groups that aren't all zero.
+        dtype: np.float16 (half the size) or np.float32.
+
+    Returns:
+        bytes: The packed frames.
+    """
+    dtype = np.dtype(dtype).newbyteorder("<")
+    if dtype not in DTYPE_CODES:
+        raise ValueError(f"Unsupported keypoint dtype: {dtype}")
+
+    landmarks = np.asarray(landmarks)
+    if landmarks.ndim != 3 or landmarks.shape[1:] != (LANDMARKS_PER_FRAME, len(CHANNELS)):
+        raise ValueError(f"Expected frames of shape ({LANDMARKS_PER_FRAME}, {len(CHANNELS)}), got {landmarks.shape[1:]}")
+
+    if present is None:
+        present = np.stack([landmarks[:, start:end].any(axis=(1, 2)) for start, end in _group_slices()], axis=1)
+    bits = (np.asarray(present, dtype=np.uint8) << np.arange(len(LANDMARK_GROUPS), dtype=np.uint8)).sum(axis=1)
+
+    count = len(landmarks)
+    header = HEADER.pack(MAGIC, VERSION, DTYPE_CODES[dtype], count, LANDMARKS_PER_FRAME, len(CHANNELS))
+    presence = bits.astype(np.uint8).tobytes().ljust(_padded(count), b"\0")
+    return header + presence + landmarks.astype(dtype).tobytes()
+
+
+def decode_frames(buffer):
+    """
+    Unpack keypoint frames without copying them.
+
+    Args:
+        buffer: bytes-like packed frames (e.g. a request body or WebSocket message).
+
+    Returns:
+        KeypointBatch: `landmarks` is a view of `buffer`, so `buffer` must outlive it.
+
+    Raises:
+        KeypointFormatError: if the header or the size of the buffer is wrong.
+    """
+    view = memoryview(buffer)
+    if len(view) < HEADER.size:
+        raise KeypointFormatError("Keypoint frames are shorter than their header")
+
+    magic, version, dtype_code, count, landmarks, channels = HEADER.unpack_from(view)
+    if magic != MAGIC or version != VERSION:
+        raise KeypointFormatError(f"Not keypoint frames of version {VERSION}")
+    if dtype_code not in DTYPES:
+        raise KeypointFormatError(f"Unknown keypoint dtype code {dtype_code}")
+    if (landmarks, channels) != (LANDMARKS_PER_FRAME, len(CHANNELS)):
+        raise KeypointFormatError(f"Expected {LANDMARKS_PER_FRAME} landmarks of {len(CHANNELS)} channels, "
+                                  f"got {landmarks} of {channels}")
+
+    dtype = DTYPES[dtype_code]
+    data_offset = HEADER.size + _padded(count)
+    values = count * landmarks * channels
+    if len(view) != data_offset + values * dtype.itemsize:
+        raise KeypointFormatError(f"Expected {data_offset + values * dtype.itemsize} bytes for {count} frames, "
+                                  f"got {len(view)}")
+
+    bits = np.frombuffer(view, dtype=np.uint8, count=count, offset=HEADER.size)
+    present = ((bits[:, None] >> np.arange(len(LANDMARK_GROUPS), dtype=np.uint8)) & 1).astype(bool)
+    frames = np.frombuffer(view, dtype=dtype, count=values, offset=data_offset).reshape(count, landmarks, channels)
+    return KeypointBatch(frames, present)
+
+
+def _group_slices():
+    start = 0
+    for _, count in LANDMARK_GROUPS:
+        yield start, start + count
+        start += count
+
+
+def frames_from_json(frames):
+    """
+    Convert JSON keypoint frames ({"keypoints": [pose, left hand, right hand]}, each a list of
+    {x, y, z, visibility} or null) to the same KeypointBatch that packed frames decode to.
+
+    Raises:
+        KeypointFormatError: if a frame isn't in that format.
+    """
+    landmarks = np.zeros((len(frames), LANDMARKS_PER_FRAME, len(CHANNELS)), dtype=np.float32)
+    present = np.zeros((len(frames), len(LANDMARK_GROUPS)), dtype=bool)
+    try:
+        for i, frame in enumerate(frames):
+            for g, ((start, end), group) in enumerate(zip(_group_slices(), frame["keypoints"])):
+                if not group:
+                    continue
+                present[i, g] = True
+                group = group[:end - start]
+                landmarks[i, start:start + len(group)] = [
+                    [point.get("x", 0), point.get("y", 0), point.get("z", 0), point.get("visibility", 0)]
+                    for point in group]
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        raise KeypointFormatError(f"Invalid JSON keypoint frame: {e}") from e
+    return KeypointBatch(landmarks, present)
+
+
+def _random_json_frames(count, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for _ in range(count):
+        keypoints = []
+        for _, size in LANDMARK_GROUPS:
+            values = rng.random((size, 4))
+            keypoints.append([{"x": float(x), "y": float(y), "z": float(z), "visibility": float(v)}
+                              for x, y, z, v in values])
+        frames.append({"keypoints": keypoints})
+    return frames
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the size and decode time of JSON and packed keypoint frames.")
+    parser.add_argument("--frames", type=int, default=30, help="frames per request")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    json_frames = _random_json_frames(args.frames)
+    batch = frames_from_json(json_frames)
+    bodies = {
+        "json": json.dumps(json_frames).encode("utf-8"),
+        "float32": encode_frames(batch.landmarks, batch.present, np.float32),
+        "float16": encode_frames(batch.landmarks, batch.present, np.float16),
+    }
+
+    print(f"{'format':<8} {'bytes':>9} {'smaller':>8} {'decode ms':>10}")
+    for name, body in bodies.items():
+        decode = (lambda b: frames_from_json(json.loads(b))) if name == "json" else decode_frames
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            decode(body)
+        seconds = (time.perf_counter() - start) / args.repeat
+        print(f"{name:<8} {len(body):>9} {len(bodies['json']) / len(body):>7.1f}x {1000 * seconds:>10.3f}")
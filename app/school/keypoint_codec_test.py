@@ -0,0 +1,151 @@
+import os
+import struct
+from unittest import TestCase
+
+import numpy as np
+
+from app.school.keypoint_codec import (HEADER, LANDMARK_GROUPS, LANDMARKS_PER_FRAME, CHANNELS, KeypointFormatError,
+                                       decode_frames, encode_frames, frames_from_json)
+
+TESTDATA = os.path.join(os.path.dirname(__file__), "testdata")
+
+
+def fixture_frames():
+    """
+    JSON frames encoded by src/lib/keypointCodec.ts into testdata/keypoint_frames_ts_*.bin:
+    three frames (an odd count, so the presence bytes are padded), the second without its
+    left hand and the third without pose and right hand.
+    """
+    missing = [[], [1], [0, 2]]
+    frames = []
+    for i in range(3):
+        keypoints = []
+        for g, (_, size) in enumerate(LANDMARK_GROUPS):
+            if g in missing[i]:
+                keypoints.append(None)
+                continue
+            keypoints.append([{"x": i + j / 100, "y": g / 10 + 0.05, "z": -j / 1000, "visibility": (j % 4) / 4}
+                              for j in range(size)])
+        frames.append({"keypoints": keypoints})
+    return frames
+
+
+class TestKeypointCodec(TestCase):
+    """
+    Unit tests for the packed keypoint frame format.
+    """
+
+    def setUp(self):
+        self.batch = frames_from_json(fixture_frames())
+
+    def test_frames_from_json_zero_fills_missing_groups(self):
+        """
+        Test if missing groups are zero-filled and marked as not present.
+        """
+        self.assertEqual(self.batch.landmarks.shape, (3, LANDMARKS_PER_FRAME, len(CHANNELS)))
+        self.assertEqual(self.batch.present.tolist(), [[True, True, True], [True, False, True], [False, True, False]])
+        self.assertFalse(self.batch.landmarks[1, 33:54].any())
+        self.assertAlmostEqual(float(self.batch.landmarks[0, 34, 0]), 0.01, places=6)
+
+    def test_round_trip_float32_is_exact(self):
+        """
+        Test if float32 frames decode to exactly the encoded values.
+        """
+        decoded = decode_frames(encode_frames(self.batch.landmarks, self.batch.present, np.float32))
+        self.assertEqual(decoded.landmarks.dtype, np.float32)
+        np.testing.assert_array_equal(decoded.landmarks, self.batch.landmarks)
+        np.testing.assert_array_equal(decoded.present, self.batch.present)
+
+    def test_round_trip_float16_rounds_to_half_precision(self):
+        """
+        Test if float16 frames decode to the encoded values rounded to half precision.
+        """
+        decoded = decode_frames(encode_frames(self.batch.landmarks, self.batch.present, np.float16))
+        self.assertEqual(decoded.landmarks.dtype, np.float16)
+        np.testing.assert_array_equal(decoded.landmarks, self.batch.landmarks.astype(np.float16))
+        np.testing.assert_array_equal(decoded.present, self.batch.present)
+
+    def test_odd_frame_count_pads_presence_bytes(self):
+        """
+        Test if the payload starts at a multiple of 4 bytes after the presence bytes.
+        """
+        packed = encode_frames(self.batch.landmarks, self.batch.present, np.float32)
+        values = 3 * LANDMARKS_PER_FRAME * len(CHANNELS)
+        self.assertEqual(len(packed), HEADER.size + 4 + 4 * values)
+        self.assertEqual(packed[HEADER.size + 3:HEADER.size + 4], b"\0")
+
+    def test_present_defaults_to_non_zero_groups(self):
+        """
+        Test if groups that aren't all zero are marked as present when `present` isn't given.
+        """
+        decoded = decode_frames(encode_frames(self.batch.landmarks))
+        np.testing.assert_array_equal(decoded.present, self.batch.present)
+
+    def test_decode_is_a_view_of_the_buffer(self):
+        """
+        Test if decoded landmarks share memory with the buffer instead of copying it.
+        """
+        packed = bytearray(encode_frames(self.batch.landmarks, self.batch.present, np.float32))
+        decoded = decode_frames(packed)
+        packed[-4:] = struct.pack("<f", 42.0)
+        self.assertEqual(float(decoded.landmarks[-1, -1, -1]), 42.0)
+
+    def test_iterates_frames_in_order(self):
+        """
+        Test if iterating a batch yields (landmarks, present) per frame.
+        """
+        frames = list(decode_frames(encode_frames(self.batch.landmarks, self.batch.present)))
+        self.assertEqual(len(frames), 3)
+        self.assertEqual(frames[2][0].shape, (LANDMARKS_PER_FRAME, len(CHANNELS)))
+        self.assertEqual(frames[2][1].tolist(), [False, True, False])
+
+    def test_decodes_frames_from_typescript_encoder(self):
+        """
+        Test if frames packed by src/lib/keypointCodec.ts decode to the same values.
+        """
+        for name, dtype in (("keypoint_frames_ts_f16.bin", np.float16), ("keypoint_frames_ts_f32.bin", np.float32)):
+            with open(os.path.join(TESTDATA, name), "rb") as f:
+                decoded = decode_frames(f.read())
+            self.assertEqual(decoded.landmarks.dtype, dtype)
+            np.testing.assert_array_equal(decoded.landmarks, self.batch.landmarks.astype(dtype))
+            np.testing.assert_array_equal(decoded.present, self.batch.present)
+
+    def test_truncated_frames_raise(self):
+        """
+        Test if buffers shorter than their header or payload raise KeypointFormatError.
+        """
+        packed = encode_frames(self.batch.landmarks)
+        with self.assertRaises(KeypointFormatError):
+            decode_frames(packed[:HEADER.size - 1])
+        with self.assertRaises(KeypointFormatError):
+            decode_frames(packed[:-1])
+
+    def test_bad_magic_raises(self):
+        """
+        Test if a buffer without the "KP" magic raises KeypointFormatError.
+        """
+        packed = encode_frames(self.batch.landmarks)
+        with self.assertRaises(KeypointFormatError):
+            decode_frames(b"XX" + packed[2:])
+
+    def test_bad_dtype_and_shape_raise(self):
+        """
+        Test if an unknown dtype code or landmark count raises KeypointFormatError.
+        """
+        packed = bytearray(encode_frames(self.batch.landmarks))
+        bad_dtype = bytearray(packed)
+        bad_dtype[3] = 9
+        with self.assertRaises(KeypointFormatError):
+            decode_frames(bad_dtype)
+        bad_shape = bytearray(packed)
+        bad_shape[6] = LANDMARKS_PER_FRAME - 1
+        with self.assertRaises(KeypointFormatError):
+            decode_frames(bad_shape)
+
+    def test_invalid_json_frames_raise(self):
+        """
+        Test if JSON frames in the wrong format raise KeypointFormatError.
+        """
+        for frames in ([{}], [{"keypoints": 5}], [{"keypoints": [[{"x": "a"}]]}]):
+            with self.assertRaises(KeypointFormatError):
+                frames_from_json(frames)
@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+# Where sign to text sessions are kept:
+# - "memory": in this process only (default, fine with a single gunicorn worker)
+# - "sqlite": in a SQLite file shared by every worker process on the host
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", os.path.join(tempfile.gettempdir(), "auslan_sessions.sqlite3"))
+
+# Sessions not seen for this long (in seconds) are dropped, and at most this many are kept in memory
+SESSION_IDLE_TIMEOUT = float(os.getenv("SESSION_IDLE_TIMEOUT", 10 * 60))
+SESSION_MAX = int(os.getenv("SESSION_MAX", 10000))
+
+# Sessions whose state didn't change are marked as seen at most this often (in seconds)
+SESSION_TOUCH_INTERVAL = float(os.getenv("SESSION_TOUCH_INTERVAL", 30))
+
+# Session used by callers that don't send an id
+DEFAULT_SESSION_ID = "default"
+
+
+class SignSession:
+    """Sign to text state of one client: the words recognised so far and the last translation."""
+
+    def __init__(self, session_id, phrase=None, end_phrase_flag=False, prev_flag=False, translation='', last_seen=None):
+        self.session_id = session_id
+        self.phrase = phrase if phrase is not None else []
+        self.end_phrase_flag = end_phrase_flag
+        self.prev_flag = prev_flag
+        self.translation = translation
+        self.last_seen = last_seen if last_seen is not None else time.time()
+
+    def to_dict(self):
+        return {
+            "phrase": self.phrase,
+            "end_phrase_flag": self.end_phrase_flag,
+            "prev_flag": self.prev_flag,
+            "translation": self.translation,
+        }
+
+    @classmethod
+    def from_dict(cls, session_id, state, last_seen=None):
+        return cls(session_id, last_seen=last_seen, **state)
+
+    def snapshot(self):
+        """Copy of the state, to tell whether it changed since."""
+        return tuple(self.phrase), self.end_phrase_flag, self.prev_flag, self.translation
+
+
+class MemorySessionStore:
+    """Sessions in this process's memory. The least recently seen are evicted past `max_sessions`."""
+
+    def __init__(self, idle_timeout=SESSION_IDLE_TIMEOUT, max_sessions=SESSION_MAX):
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get(self, session_id=None):
+        """Return the session, creating it if it is new or was evicted."""
+        session_id = session_id or DEFAULT_SESSION_ID
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None and self.idle_timeout and now - session.last_seen > self.idle_timeout:
+                del self._sessions[session_id]
+                self.evictions += 1
+                session = None
+            if session is None:
+                # Stored right away, so concurrent first frames share one session
+                session = SignSession(session_id, last_seen=now)
+                self._sessions[session_id] = session
+                self.created += 1
+                self._evict(now)
+            return session
+
+    def save(self, session):
+        now = time.time()
+        session.last_seen = now
+        with self._lock:
+            self._sessions[session.session_id] = session
+            self._sessions.move_to_end(session.session_id)
+            self._evict(now)
+
+    def touch(self, session):
+        """Mark a session whose state didn't change as seen."""
+        self.save(session)
+
+    def _evict(self, now):
+        # Sessions are ordered by when they were last saved, so idle ones are at the front
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            idle = self.idle_timeout and now - oldest.last_seen > self.idle_timeout
+            if not idle and len(self._sessions) <= self.max_sessions:
+                break
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {"backend": "memory", "sessions": len(self._sessions),
+                    "created": self.created, "evictions": self.evictions}
+
+
+class SQLiteSessionStore:
+    """Sessions in a SQLite file, so every gunicorn worker on the host sees the same state."""
+
+    # Idle sessions are deleted at most this often (in seconds)
+    EVICT_INTERVAL = 60
+
+    def __init__(self, path=SESSION_STORE_PATH, idle_timeout=SESSION_IDLE_TIMEOUT):
+        self.path = path
+        self.idle_timeout = idle_timeout
+
+        self._lock = threading.Lock()
+        self._last_evict = 0.0
+        self.created = 0
+        self.evictions = 0
+        self._conn = self._connect()
+
+    def _connect(self):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        # WAL lets several gunicorn workers read while one writes
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                id TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                last_seen REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS sessions_last_seen ON sessions (last_seen)")
+        conn.commit()
+        return conn
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def get(self, session_id=None):
+        """Return the session, creating it if it is new or has been idle for too long."""
+        session_id = session_id or DEFAULT_SESSION_ID
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT state, last_seen FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        if row is not None and not (self.idle_timeout and now - row[1] > self.idle_timeout):
+            return SignSession.from_dict(session_id, json.loads(row[0]), last_seen=row[1])
+
+        with self._lock:
+            self.created += 1
+        return SignSession(session_id, last_seen=now)
+
+    def save(self, session):
+        now = time.time()
+        session.last_seen = now
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO sessions (id, state, last_seen) VALUES (?, ?, ?)",
+                               (session.session_id, json.dumps(session.to_dict()), now))
+            if self.idle_timeout and now - self._last_evict > self.EVICT_INTERVAL:
+                self._last_evict = now
+                deleted = self._conn.execute("DELETE FROM sessions WHERE last_seen < ?",
+                                             (now - self.idle_timeout,)).rowcount
+                self.evictions += deleted
+            self._conn.commit()
+
+    def touch(self, session, interval=SESSION_TOUCH_INTERVAL):
+        """Mark a session whose state didn't change as seen, writing at most every `interval` seconds."""
+        now = time.time()
+        if now - session.last_seen < interval:
+            return
+        session.last_seen = now
+        with self._lock:
+            self._conn.execute("UPDATE sessions SET last_seen = ? WHERE id = ?", (now, session.session_id))
+            self._conn.commit()
+
+    def stats(self):
+        return {"backend": "sqlite", "sessions": len(self), "created": self.created, "evictions": self.evictions}
+
+
+def create_session_store(backend=SESSION_BACKEND):
+    if backend == "memory":
+        return MemorySessionStore()
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+    raise ValueError(f"Unknown session backend: {backend} (expected memory or sqlite)")
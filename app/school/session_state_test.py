@@ -0,0 +1,199 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from app.school.session_state import (DEFAULT_SESSION_ID, MemorySessionStore, SignSession, SQLiteSessionStore,
+                                      create_session_store)
+
+
+class Clock:
+    """Stand-in for time.time that only moves when told to."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestSignSession(TestCase):
+    """
+    Unit tests for SignSession.
+    """
+
+    def test_dict_round_trip(self):
+        """
+        Test if a session rebuilt from its dict has the same state.
+        """
+        session = SignSession("a", phrase=["hello"], end_phrase_flag=True, translation="Hello")
+        restored = SignSession.from_dict("a", session.to_dict())
+        self.assertEqual(restored.snapshot(), session.snapshot())
+
+    def test_snapshot_detects_changes(self):
+        """
+        Test if a snapshot differs once the phrase or translation changes.
+        """
+        session = SignSession("a")
+        state = session.snapshot()
+        session.phrase.append("hello")
+        self.assertNotEqual(session.snapshot(), state)
+        state = session.snapshot()
+        session.translation = "Hello"
+        self.assertNotEqual(session.snapshot(), state)
+
+
+class SessionStoreTests:
+    """
+    Tests shared by both session stores. Subclasses set up `self.store` and `self.clock`.
+    """
+
+    def test_sessions_are_separate(self):
+        """
+        Test if state saved for one session isn't seen by another.
+        """
+        session = self.store.get("a")
+        session.phrase.append("hello")
+        self.store.save(session)
+        self.assertEqual(self.store.get("a").phrase, ["hello"])
+        self.assertEqual(self.store.get("b").phrase, [])
+
+    def test_missing_id_uses_default_session(self):
+        """
+        Test if callers without a session id share the default session.
+        """
+        session = self.store.get(None)
+        self.assertEqual(session.session_id, DEFAULT_SESSION_ID)
+        session.translation = "Hello"
+        self.store.save(session)
+        self.assertEqual(self.store.get("").translation, "Hello")
+
+    def test_idle_sessions_start_over(self):
+        """
+        Test if a session idle for longer than the timeout starts with empty state.
+        """
+        session = self.store.get("a")
+        session.translation = "Hello"
+        self.store.save(session)
+        self.clock.now += 61
+        self.assertEqual(self.store.get("a").translation, "")
+
+    def test_touch_keeps_session_alive(self):
+        """
+        Test if touching a session regularly keeps it from going idle.
+        """
+        session = self.store.get("a")
+        session.translation = "Hello"
+        self.store.save(session)
+        for _ in range(3):
+            self.clock.now += 40
+            self.store.touch(session)
+        self.assertEqual(self.store.get("a").translation, "Hello")
+
+
+class TestMemorySessionStore(SessionStoreTests, TestCase):
+    """
+    Unit tests for MemorySessionStore.
+    """
+
+    def setUp(self):
+        self.clock = Clock()
+        time_patch = patch("app.school.session_state.time.time", self.clock)
+        time_patch.start()
+        self.addCleanup(time_patch.stop)
+        self.store = MemorySessionStore(idle_timeout=60, max_sessions=2)
+
+    def test_get_returns_the_stored_session(self):
+        """
+        Test if concurrent callers of a new session get the same object.
+        """
+        self.assertIs(self.store.get("a"), self.store.get("a"))
+        self.assertEqual(self.store.stats()["created"], 1)
+
+    def test_evicts_least_recently_saved(self):
+        """
+        Test if the least recently saved session is evicted past max_sessions.
+        """
+        for session_id in ("a", "b"):
+            self.clock.now += 1
+            self.store.save(self.store.get(session_id))
+        self.clock.now += 1
+        self.store.save(self.store.get("a"))
+        self.clock.now += 1
+        self.store.get("c")
+
+        self.assertEqual(len(self.store), 2)
+        self.assertEqual(self.store.stats()["evictions"], 1)
+        self.assertEqual(self.store.stats()["created"], 3)
+        self.store.get("a")
+        self.assertEqual(self.store.stats()["created"], 3)
+
+
+class TestSQLiteSessionStore(SessionStoreTests, TestCase):
+    """
+    Unit tests for SQLiteSessionStore.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "sessions.sqlite3")
+        self.clock = Clock()
+        time_patch = patch("app.school.session_state.time.time", self.clock)
+        time_patch.start()
+        self.addCleanup(time_patch.stop)
+        self.store = self.open_store()
+
+    def open_store(self):
+        store = SQLiteSessionStore(self.path, idle_timeout=60)
+        self.addCleanup(store._conn.close)
+        return store
+
+    def test_sessions_are_shared_between_workers(self):
+        """
+        Test if a session saved through one store is read through another on the same file.
+        """
+        session = self.store.get("a")
+        session.phrase.extend(["i", "go"])
+        self.store.save(session)
+        self.assertEqual(self.open_store().get("a").phrase, ["i", "go"])
+
+    def test_touch_writes_at_most_once_per_interval(self):
+        """
+        Test if touching an unchanged session only writes once the touch interval has passed.
+        """
+        session = self.store.get("a")
+        self.store.save(session)
+        saved_at = self.clock.now
+
+        self.clock.now += 10
+        self.store.touch(session, interval=30)
+        self.assertEqual(self.open_store().get("a").last_seen, saved_at)
+
+        self.clock.now += 30
+        self.store.touch(session, interval=30)
+        self.assertEqual(self.open_store().get("a").last_seen, self.clock.now)
+
+    def test_idle_sessions_are_deleted(self):
+        """
+        Test if saving deletes sessions that have been idle for longer than the timeout.
+        """
+        self.store.save(self.store.get("a"))
+        self.clock.now += self.store.EVICT_INTERVAL + 61
+        self.store.save(self.store.get("b"))
+        self.assertEqual(len(self.store), 1)
+        self.assertEqual(self.store.stats()["evictions"], 1)
+
+
+class TestCreateSessionStore(TestCase):
+    """
+    Unit tests for create_session_store.
+    """
+
+    def test_unknown_backend_raises(self):
+        """
+        Test if an unknown backend raises ValueError.
+        """
+        self.assertIsInstance(create_session_store("memory"), MemorySessionStore)
+        with self.assertRaises(ValueError):
+            create_session_store("redis")
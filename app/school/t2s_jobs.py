@@ -0,0 +1,142 @@
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Text to sign jobs run at the same time, and how many may wait for a worker before new ones are rejected
+T2S_JOB_WORKERS = int(os.getenv("T2S_JOB_WORKERS", 2))
+T2S_JOB_QUEUE_DEPTH = int(os.getenv("T2S_JOB_QUEUE_DEPTH", 16))
+
+# How long (in seconds) finished jobs are kept for their status to be read
+T2S_JOB_TTL = float(os.getenv("T2S_JOB_TTL", 10 * 60))
+
+# Retry-After (in seconds) sent with requests rejected because the queue is full
+T2S_JOB_RETRY_AFTER = int(os.getenv("T2S_JOB_RETRY_AFTER", 5))
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    """Raised by JobQueue.submit when T2S_JOB_QUEUE_DEPTH jobs are already waiting."""
+
+
+class JobQueue:
+    """Runs text to sign requests in a bounded pool of background threads.
+
+    `submit` returns a job id straight away; `status` reports the job's state,
+    its current stage and, once it is done, its result. Jobs live in this
+    process's memory, so with several gunicorn workers a job's status must be
+    read from the worker it was submitted to.
+    """
+
+    def __init__(self, workers=T2S_JOB_WORKERS, queue_depth=T2S_JOB_QUEUE_DEPTH, ttl=T2S_JOB_TTL):
+        self.queue_depth = queue_depth
+        self.ttl = ttl
+
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="t2s-job")
+        self._jobs = OrderedDict()  # job id -> job dict, in submission order
+        self._lock = threading.Lock()
+        self._queued = 0
+
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def submit(self, func, *args):
+        """
+        Queue `func(*args, progress=callback)` and return the job id. `func` can call
+        `progress(stage)` to report which stage it is in.
+
+        Raises:
+            QueueFullError: if the queue is full; the caller should retry later.
+        """
+        with self._lock:
+            self._expire()
+            if self._queued >= self.queue_depth:
+                self.rejected += 1
+                raise QueueFullError(f"{self._queued} text to sign jobs are already waiting")
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {"status": QUEUED, "stage": QUEUED, "result": None, "error": None,
+                                  "submitted_at": time.time(), "started_at": None, "finished_at": None}
+            self._queued += 1
+
+        self._executor.submit(self._run, job_id, func, args)
+        return job_id
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _run(self, job_id, func, args):
+        with self._lock:
+            self._queued -= 1
+            self._jobs[job_id].update(status=RUNNING, stage=RUNNING, started_at=time.time())
+
+        try:
+            result = func(*args, progress=lambda stage: self._update(job_id, stage=stage))
+        except Exception as e:
+            print(f"(t2s_jobs) Job {job_id} failed: {e}")
+            with self._lock:
+                self.failed += 1
+                # The details are in the log; clients get the same message as the synchronous endpoint
+                self._jobs[job_id].update(status=FAILED, stage=FAILED, error="Internal Server Error",
+                                          finished_at=time.time())
+            return
+
+        with self._lock:
+            self.completed += 1
+            self._jobs[job_id].update(status=DONE, stage=DONE, result=result, finished_at=time.time())
+
+    def _expire(self):
+        # Drop finished jobs older than the TTL (called with the lock held)
+        cutoff = time.time() - self.ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job["finished_at"] is not None and job["finished_at"] < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def status(self, job_id):
+        """Return the state of a job, or None if it is unknown or has expired."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job = dict(job)
+            position = None
+            if job["status"] == QUEUED:
+                # Jobs are started in submission order
+                position = sum(1 for other in self._jobs.values()
+                               if other["status"] == QUEUED and other["submitted_at"] <= job["submitted_at"])
+
+        now = time.time()
+        status = {"job_id": job_id, "status": job["status"], "stage": job["stage"]}
+        if position is not None:
+            status["queue_position"] = position
+        if job["started_at"] is not None:
+            status["queued_seconds"] = job["started_at"] - job["submitted_at"]
+            status["running_seconds"] = (job["finished_at"] or now) - job["started_at"]
+        if job["status"] == DONE:
+            status["result"] = job["result"]
+        elif job["status"] == FAILED:
+            status["error"] = job["error"]
+        return status
+
+    def stats(self):
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job["status"] == RUNNING)
+            return {
+                "queued": self._queued,
+                "running": running,
+                "queue_depth": self.queue_depth,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+            }
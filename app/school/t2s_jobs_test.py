@@ -0,0 +1,107 @@
+import threading
+import time
+from unittest import TestCase
+
+from app.school.t2s_jobs import DONE, FAILED, QUEUED, RUNNING, JobQueue, QueueFullError
+
+
+class TestJobQueue(TestCase):
+    """
+    Unit tests for JobQueue.
+    """
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def queue(self, **kwargs):
+        queue = JobQueue(**kwargs)
+        self.addCleanup(queue._executor.shutdown)
+        # Cleanups run last in, first out: let blocked jobs finish before waiting for the workers
+        self.addCleanup(self.release.set)
+        return queue
+
+    def blocking_job(self, text, progress):
+        progress("grammar")
+        self.started.set()
+        self.release.wait(5)
+        return text.upper()
+
+    def wait_for(self, queue, job_id, states=(DONE, FAILED)):
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            status = queue.status(job_id)
+            if status["status"] in states:
+                return status
+            time.sleep(0.01)
+        self.fail(f"Job {job_id} didn't reach {states}")
+
+    def test_job_result(self):
+        """
+        Test if a finished job reports its result and timings.
+        """
+        queue = self.queue(workers=1, queue_depth=4)
+        job_id = queue.submit(lambda text, progress: text.upper(), "hello")
+        status = self.wait_for(queue, job_id)
+        self.assertEqual(status["status"], DONE)
+        self.assertEqual(status["result"], "HELLO")
+        self.assertGreaterEqual(status["running_seconds"], 0)
+        self.assertEqual(queue.stats()["completed"], 1)
+
+    def test_reports_stage_and_queue_position(self):
+        """
+        Test if a running job reports its stage and waiting jobs report their place in the queue.
+        """
+        queue = self.queue(workers=1, queue_depth=4)
+        running = queue.submit(self.blocking_job, "a")
+        self.assertTrue(self.started.wait(5))
+        first = queue.submit(self.blocking_job, "b")
+        second = queue.submit(self.blocking_job, "c")
+
+        status = queue.status(running)
+        self.assertEqual((status["status"], status["stage"]), (RUNNING, "grammar"))
+        self.assertEqual(queue.status(first)["queue_position"], 1)
+        self.assertEqual(queue.status(second)["queue_position"], 2)
+        self.assertEqual(queue.status(second)["status"], QUEUED)
+        self.assertEqual(queue.stats()["queued"], 2)
+
+        self.release.set()
+        self.assertEqual(self.wait_for(queue, second)["result"], "C")
+
+    def test_rejects_jobs_when_queue_is_full(self):
+        """
+        Test if submit raises QueueFullError once queue_depth jobs are waiting.
+        """
+        queue = self.queue(workers=1, queue_depth=1)
+        queue.submit(self.blocking_job, "a")
+        self.assertTrue(self.started.wait(5))
+        queue.submit(self.blocking_job, "b")
+        with self.assertRaises(QueueFullError):
+            queue.submit(self.blocking_job, "c")
+        self.assertEqual(queue.stats()["rejected"], 1)
+
+    def test_failed_job_hides_the_exception(self):
+        """
+        Test if a job that raises is marked as failed with a generic error.
+        """
+        def failing_job(text, progress):
+            raise ValueError("secret details")
+
+        queue = self.queue(workers=1, queue_depth=4)
+        status = self.wait_for(queue, queue.submit(failing_job, "hello"))
+        self.assertEqual(status["status"], FAILED)
+        self.assertEqual(status["error"], "Internal Server Error")
+        self.assertNotIn("result", status)
+        self.assertEqual(queue.stats()["failed"], 1)
+
+    def test_finished_jobs_expire(self):
+        """
+        Test if finished jobs are dropped after the ttl and unknown jobs have no status.
+        """
+        queue = self.queue(workers=1, queue_depth=4, ttl=0)
+        job_id = queue.submit(lambda text, progress: text, "hello")
+        self.wait_for(queue, job_id)
+        time.sleep(0.01)
+        queue.submit(lambda text, progress: text, "again")
+        self.assertIsNone(queue.status(job_id))
+        self.assertIsNone(queue.status("unknown"))
@@ -1,95 +1,43 @@
 import os
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 import google.generativeai as genai
 from dotenv import load_dotenv
 from app.school.text_to_animation.WordSenseDisambig import WordSenseDisambiguation
-
-import spacy # Import spaCy for lemmatization mock
+from app.school.text_to_animation.nlp_service import nlp_service
+from app.school.text_to_animation.spoken_to_signed.text_to_gloss.auslan import auslan_glosses
+from app.school.text_to_animation.grammar_cache import GrammarResponseCache, response_cache_key
 
 load_dotenv(override=True)
 
-class GrammarParser:
-    def time() -> float: ...
-    def __init__(self):
-        """Initialize the GrammarParser with WordSenseDisambiguation instance and text-to-text model."""
-        self.wsd = WordSenseDisambiguation()
-        self.prefix = "translate English to Auslan gloss: "
-        
-        # Configure genai with API key from environment variables
-        api_key = os.getenv("GOOGLE_API_KEY")
-        if not api_key:
-            raise ValueError("GOOGLE_API_KEY not found in environment variables")
-        genai.configure(api_key=api_key)
+GEMINI_MODEL_NAME = "gemini-2.5-flash-lite"
 
-    def lemmatize(self, sentence):
-        """
-        Convert words in a sentence to their base/root forms using spaCy.
-        
-        Args:
-            sentence (str): Input sentence to lemmatize
-            
-        Returns:
-            str: Sentence with words converted to their lemma forms
-            
-        Example:
-            "I am running to the stores" → "I be run to the store"
-        """
-        try:
-            # Load English language model for natural language processing
-            nlp = spacy.load("en_core_web_sm")
-            
-            # Process the sentence to extract linguistic features
-            doc = nlp(sentence)
-            
-            # Extract the lemma (base form) of each word and join them
-            lemmatized_sentence = " ".join([token.lemma_ for token in doc])
+# Threads running WSD while the grammar model is called (one per concurrent request)
+GRAMMAR_PARSER_WORKERS = int(os.getenv("GRAMMAR_PARSER_WORKERS", 4))
+NO_VALID_RESPONSE = "No valid response"
 
-            return lemmatized_sentence
-        
+# Grammar conversion backend:
+# - "gemini": the LLM, falling back to the local rules if it fails or times out (default)
+# - "rules": the local rule-based glosser only, no network calls
+GRAMMAR_BACKEND = os.getenv("GRAMMAR_BACKEND", "gemini")
+GRAMMAR_BACKENDS = ("gemini", "rules")
 
-        except OSError:
-            # Handle case where spaCy model is not installed
-            print("Error: spaCy English model not found. Please install with: pip install spacy, or run pip install -r requirements.txt.")
-            print("If missing, install the model with: python -m spacy download en_core_web_sm")
-            return sentence  # Return original sentence as fallback
-        except Exception as e:
-            # Handle any other unexpected errors
-            print(f"Error during lemmatization: {e}")
-            return sentence  # Return original sentence as fallback
+# Seconds to wait for the LLM before using the local rules instead (0 waits as long as it takes)
+GRAMMAR_LLM_TIMEOUT = float(os.getenv("GRAMMAR_LLM_TIMEOUT", 0))
 
-    def parse_text_to_auslan_grammar(self, t2s_input):
-        # takes a regular sentence and converts it to Auslan grammar
-        start = time.time()
-        
-        print(f"(GrammarParser.py): Starting parse with input: '{t2s_input}'")
-        
-        if not t2s_input:
-            print("(GrammarParser.py): ERROR - Empty or invalid input received")
-            return {"error": "Invalid input from user"}
+# Threads for LLM calls made with a timeout. A timed out call keeps its thread until the request
+# itself ends, so these are kept apart from the WSD threads
+GRAMMAR_LLM_WORKERS = int(os.getenv("GRAMMAR_LLM_WORKERS", 8))
 
-        if len(t2s_input.split()) > 1:
-            print(f"(GrammarParser.py): Processing multi-word sentence ({len(t2s_input.split())} words)")
+# Seconds before the Gemini request itself is abandoned, so calls left running after a timeout end
+GRAMMAR_LLM_REQUEST_TIMEOUT = float(os.getenv("GRAMMAR_LLM_REQUEST_TIMEOUT", 30))
 
-            # 1. Lemmatise words using spaCy
-            print("(GrammarParser.py): STAGE 1 - Starting lemmatization...")
-            lemmatized_sentence = self.lemmatize(t2s_input)
-            print(f"(GrammarParser.py): Original: '{t2s_input}' → Lemmatized: '{lemmatized_sentence}'")
+# Stream the LLM response, so glosses are handed on (e.g. to start fetching poses) while it is generated
+GRAMMAR_STREAMING = os.getenv("GRAMMAR_STREAMING", "false").lower() in ("1", "true", "yes")
 
-            # 2. Use WSD to disambiguate words if necessary
-            print("(GrammarParser.py): STAGE 2 - Starting word sense disambiguation...")
-            disambiguated_words = {}
-            disambiguated_words = self.wsd.disambiguate_words(lemmatized_sentence)
-            print(f"(GrammarParser.py): Found {len(disambiguated_words)} disambiguated words: {disambiguated_words}")
-
-            # 3. Use model for grammar parsing here
-            # start timer to count gemini processing time
-            start_time = time.time()
-            print("(GrammarParser.py): STAGE 3 - Generating Auslan grammar using GEMINI 2.5 FLASH model...")
-            model = genai.GenerativeModel("gemini-2.5-flash-lite")
-
-            response = model.generate_content(
-                """You are a professional Auslan linguist and translator. Convert written English sentences into their Auslan-style English equivalent using correct Auslan grammar — not word-for-word translation.
+# Instructions sent to the model; the lemmatized sentence is appended to the end
+AUSLAN_GRAMMAR_PROMPT = """You are a professional Auslan linguist and translator. Convert written English sentences into their Auslan-style English equivalent using correct Auslan grammar — not word-for-word translation.
 
                 Output rules:
                 - Output must contain English letters and spaces only. Do NOT include any symbols, punctuation, brackets, or capitalization markers.
@@ -153,22 +101,310 @@ class GrammarParser:
 
                 Now, convert the following sentence into Auslan-style English:
                 
-                """ + lemmatized_sentence
-            )
+                """
+
+
+def clean_response_text(text):
+    """Strip the formatting the model sometimes adds (surrounding whitespace, line breaks and quotes)."""
+    return text.strip().replace("\n", "").replace("\"", "")
+
+
+def final_words(partial_text):
+    """
+    Words of a partial model response that can no longer change as more text arrives,
+    i.e. the words of clean_response_text(partial_text) that are followed by a space.
+    """
+    # Line breaks and quotes are removed rather than split on, so a word before one isn't final yet
+    cleaned = partial_text.replace("\n", "").replace("\"", "")
+    words = cleaned.split()
+    if cleaned and not cleaned[-1].isspace():
+        words = words[:-1]
+    return words
+
+
+class GeminiTextModel:
+    """Text model used for grammar conversion. Anything with `model_name` and `generate(prompt)` can replace it.
+    Models that also have `generate_stream(prompt)` can be used in streaming mode."""
+
+    def __init__(self, model_name=GEMINI_MODEL_NAME, request_timeout=GRAMMAR_LLM_REQUEST_TIMEOUT):
+        self.model_name = model_name
+        self.request_options = {"timeout": request_timeout} if request_timeout else None
+
+        # Configure genai with API key from environment variables
+        api_key = os.getenv("GOOGLE_API_KEY")
+        if not api_key:
+            raise ValueError("GOOGLE_API_KEY not found in environment variables")
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+
+    def generate(self, prompt):
+        """Return the cleaned up response text, or NO_VALID_RESPONSE."""
+        response = self.model.generate_content(prompt, request_options=self.request_options)
+        response_dict = response.to_dict()
+
+        return (
+            clean_response_text(response_dict["candidates"][0]["content"]["parts"][0]["text"])
             
-            response_dict = response.to_dict()
+            # if no response, set result to a default value
+            if response_dict["candidates"]
+            else NO_VALID_RESPONSE
+        )
 
-            result = (
-                response_dict["candidates"][0]["content"]["parts"][0]["text"].strip().replace(
-                    "\n", "").replace("\"", "")
-                
-                # if no response, set result to a default value
-                if response_dict["candidates"]
-                else "No valid response"
-            )
+    def generate_stream(self, prompt):
+        """
+        Yield the raw response text piece by piece as it is generated.
+        clean_response_text of the joined pieces is what `generate` returns.
+        """
+        received = False
+        for chunk in self.model.generate_content(prompt, stream=True, request_options=self.request_options):
+            chunk_dict = chunk.to_dict()
+            if not chunk_dict["candidates"]:
+                continue
+            received = True
+            parts = chunk_dict["candidates"][0]["content"].get("parts", [])
+            if parts:
+                yield parts[0].get("text", "")
+
+        # if no response, set result to a default value
+        if not received:
+            yield NO_VALID_RESPONSE
+
+
+class GrammarParser:
+    def time() -> float: ...
+    def __init__(self, text_model=None, response_cache=None, backend=GRAMMAR_BACKEND, llm_timeout=GRAMMAR_LLM_TIMEOUT,
+                 streaming=GRAMMAR_STREAMING):
+        """Initialize the GrammarParser with WordSenseDisambiguation instance and text-to-text model.
+
+        Args:
+            text_model: Model for grammar conversion, with `model_name` and `generate(prompt)`.
+                Defaults to Gemini; tests can pass a local stub.
+            response_cache: Cache of grammar conversions. Defaults to the persistent SQLite cache.
+            backend: "gemini" or "rules" (see GRAMMAR_BACKEND).
+            llm_timeout: Seconds to wait for the text model before falling back to the rules, 0 to wait indefinitely.
+            streaming: Stream the text model's response and pass glosses to `on_gloss` as they arrive.
+        """
+        if backend not in GRAMMAR_BACKENDS:
+            raise ValueError(f"Unknown grammar backend: {backend} (expected one of {', '.join(GRAMMAR_BACKENDS)})")
+
+        self.wsd = WordSenseDisambiguation()
+        self.prefix = "translate English to Auslan gloss: "
+        self.backend = backend
+        self.llm_timeout = llm_timeout
+        self.streaming = streaming
+
+        # The rules backend never calls the text model, so it doesn't need an API key
+        if text_model is None and backend == "gemini":
+            text_model = GeminiTextModel()
+        self.text_model = text_model
+        self.response_cache = response_cache if response_cache is not None else GrammarResponseCache()
+
+        # Runs WSD alongside the grammar model call
+        self._executor = ThreadPoolExecutor(max_workers=GRAMMAR_PARSER_WORKERS, thread_name_prefix="grammar-parser")
+        # Runs grammar model calls that have a timeout; hung calls must not hold up WSD
+        self._llm_executor = ThreadPoolExecutor(max_workers=GRAMMAR_LLM_WORKERS, thread_name_prefix="grammar-llm")
+
+    def lemmatize(self, sentence):
+        """
+        Convert words in a sentence to their base/root forms using spaCy.
+        
+        Args:
+            sentence (str): Input sentence to lemmatize
             
-            time_taken = time.time() - start_time
-            print(f"(GrammarParser.py): COMPLETE GEMINI response received in {time_taken:.4f} seconds")
+        Returns:
+            str: Sentence with words converted to their lemma forms
+            
+        Example:
+            "I am running to the stores" → "I be run to the store"
+        """
+        try:
+            # Shared English pipeline, loaded once per process on first use
+            return nlp_service.lemmatize(sentence)
+
+
+        except OSError:
+            # Handle case where spaCy model is not installed
+            print("Error: spaCy English model not found. Please install with: pip install spacy, or run pip install -r requirements.txt.")
+            print("If missing, install the model with: python -m spacy download en_core_web_sm")
+            return sentence  # Return original sentence as fallback
+        except Exception as e:
+            # Handle any other unexpected errors
+            print(f"Error during lemmatization: {e}")
+            return sentence  # Return original sentence as fallback
+
+    def lemmatize_batch(self, sentences):
+        """
+        Lemmatize many sentences in one batched pass through spaCy.
+
+        Args:
+            sentences (list): Input sentences to lemmatize
+
+        Returns:
+            list: Lemmatized sentences, in the same order (originals if spaCy fails)
+        """
+        try:
+            return nlp_service.lemmatize_batch(sentences)
+        except Exception as e:
+            print(f"Error during lemmatization: {e}")
+            return list(sentences)
+
+    def _convert_grammar(self, lemmatized_sentence, emit=None):
+        """
+        Convert a lemmatized sentence to Auslan grammar with the text model, using the response cache.
+
+        Args:
+            lemmatized_sentence (str): Lemmatized input sentence
+            emit (callable, optional): Called with each word of the result as soon as it is final.
+                If given and the model supports it, the response is streamed.
+
+        Returns:
+            tuple: (converted sentence, whether it was served from the cache)
+        """
+        cache_key = response_cache_key(lemmatized_sentence, self.text_model.model_name, AUSLAN_GRAMMAR_PROMPT)
+        result = self.response_cache.get(cache_key)
+        if result is not None:
+            if emit is not None:
+                for word in result.split():
+                    emit(word)
+            return result, True
+
+        prompt = AUSLAN_GRAMMAR_PROMPT + lemmatized_sentence
+        if emit is not None and hasattr(self.text_model, "generate_stream"):
+            partial_text = ""
+            emitted = 0
+            for piece in self.text_model.generate_stream(prompt):
+                partial_text += piece
+                words = final_words(partial_text)
+                for word in words[emitted:]:
+                    emit(word)
+                emitted = len(words)
+            result = clean_response_text(partial_text)
+            # The last word is only final once the response is complete
+            for word in result.split()[emitted:]:
+                emit(word)
+        else:
+            result = self.text_model.generate(prompt)
+            if emit is not None:
+                for word in result.split():
+                    emit(word)
+
+        # Don't keep failed generations around
+        if result != NO_VALID_RESPONSE:
+            self.response_cache.put(cache_key, result, self.text_model.model_name, lemmatized_sentence)
+        return result, False
+
+    def _rules_grammar(self, sentence):
+        """
+        Convert a sentence to Auslan grammar with the local rule-based glosser.
+
+        Args:
+            sentence (str): Original (not lemmatized) sentence; the rules need its tense and negation
+
+        Returns:
+            str: Converted sentence
+        """
+        doc = nlp_service.process(sentence)
+        return " ".join(gloss for _, gloss in auslan_glosses(doc))
+
+    def _generate_grammar(self, t2s_input, lemmatized_sentence, emit=None):
+        """
+        Convert a sentence to Auslan grammar with the configured backend.
+
+        The text model gets the lemmatized sentence. If it raises, returns no valid response
+        or takes longer than `llm_timeout`, the rules are used on the original sentence.
+        Words passed to `emit` before that happens are not taken back; they are only hints.
+
+        Returns:
+            tuple: (converted sentence, backend that produced it: "gemini", "cache" or "rules")
+        """
+        if self.backend == "rules":
+            return self._rules_grammar(t2s_input), "rules"
+
+        try:
+            if self.llm_timeout:
+                # A late response still finishes in the background and is cached for next time
+                future = self._llm_executor.submit(self._convert_grammar, lemmatized_sentence, emit)
+                result, cached = future.result(timeout=self.llm_timeout)
+            else:
+                result, cached = self._convert_grammar(lemmatized_sentence, emit)
+            if result != NO_VALID_RESPONSE:
+                return result, "cache" if cached else "gemini"
+            print("(GrammarParser.py): No valid response from the grammar model, using the local rules")
+        except FutureTimeoutError:
+            print(f"(GrammarParser.py): Grammar model took longer than {self.llm_timeout}s, using the local rules")
+        except Exception as e:
+            print(f"(GrammarParser.py): Grammar model failed ({e}), using the local rules")
+
+        return self._rules_grammar(t2s_input), "rules"
+
+    @staticmethod
+    def _gloss_for_word(word, disambiguated_words):
+        """The final gloss of a word of the converted sentence: its disambiguated sense, if it has one."""
+        gloss = disambiguated_words.get(word.lower(), word)
+        if gloss.lower() == 'finish':
+            gloss = 'finish (complete)'
+        return gloss
+
+    @staticmethod
+    def _timed(func, *args):
+        start = time.time()
+        result = func(*args)
+        return result, time.time() - start
+
+    def parse_text_to_auslan_grammar(self, t2s_input, metrics=None, on_gloss=None):
+        """
+        Convert a sentence to Auslan grammar, with ambiguous words replaced by their senses.
+
+        Args:
+            t2s_input (str): Input sentence
+            metrics (dict, optional): Filled with the duration of each stage in seconds
+                (lemmatize, wsd, llm, apply_senses, total), the backend that produced the grammar
+                (grammar_backend: gemini, cache or rules) and whether it was cached (llm_cached).
+                In streaming mode also the time until the first gloss was known (first_gloss).
+            on_gloss (callable, optional): In streaming mode, called with each final gloss (with
+                its sense applied) while the model is still generating. Glosses are hints for
+                prefetching; the returned list is the result.
+
+        Returns:
+            list: Words of the converted sentence
+        """
+        # takes a regular sentence and converts it to Auslan grammar
+        start = time.time()
+        if metrics is None:
+            metrics = {}
+        
+        print(f"(GrammarParser.py): Starting parse with input: '{t2s_input}'")
+        
+        if not t2s_input:
+            print("(GrammarParser.py): ERROR - Empty or invalid input received")
+            return {"error": "Invalid input from user"}
+
+        if len(t2s_input.split()) > 1:
+            print(f"(GrammarParser.py): Processing multi-word sentence ({len(t2s_input.split())} words)")
+
+            # 1. Lemmatise words using spaCy
+            print("(GrammarParser.py): STAGE 1 - Starting lemmatization...")
+            lemmatized_sentence, metrics["lemmatize"] = self._timed(self.lemmatize, t2s_input)
+            print(f"(GrammarParser.py): Original: '{t2s_input}' → Lemmatized: '{lemmatized_sentence}'")
+
+            # 2. and 3. WSD and grammar conversion both only need the lemmatized sentence, so the
+            # embedding work runs in the background while we wait on the network-bound model call
+            print("(GrammarParser.py): STAGE 2 + 3 - Starting word sense disambiguation and Auslan grammar generation...")
+            wsd_future = self._executor.submit(self._timed, self.wsd.disambiguate_words, lemmatized_sentence)
+
+            emit = None
+            if self.streaming and on_gloss is not None:
+                def emit(word):
+                    # WSD is local, so it is normally done before the model's first word arrives
+                    disambiguated, _ = wsd_future.result()
+                    metrics.setdefault("first_gloss", time.time() - start)
+                    on_gloss(self._gloss_for_word(word, disambiguated))
+
+            (result, metrics["grammar_backend"]), metrics["llm"] = self._timed(
+                self._generate_grammar, t2s_input, lemmatized_sentence, emit)
+            metrics["llm_cached"] = metrics["grammar_backend"] == "cache"
+            disambiguated_words, metrics["wsd"] = wsd_future.result()
+            print(f"(GrammarParser.py): Found {len(disambiguated_words)} disambiguated words: {disambiguated_words}")
             
             # from the result string, create a list of words
             sentence = result.split()
@@ -176,28 +412,21 @@ class GrammarParser:
             
             # loop over the sentence and clarify ambiguous words
             print("(GrammarParser.py): STAGE 4 - Applying word sense disambiguation...")
+            apply_start = time.time()
             original_sentence = sentence.copy()  # Keep a copy for comparison
             for i, word in enumerate(sentence):
-                # Check if the word is in the disambiguated words dictionary (squash to lowercase for matching)
-                # print(f"(GrammarParser.py): Checking word for disambiguation: '{word}'")
-                word_lower = word.lower()
-                if word_lower in disambiguated_words:
-                    # If the word is ambiguous, replace it with its disambiguated form
-                    old_word = sentence[i]
-                    sentence[i] = disambiguated_words[word_lower]
-                    print(f"(GrammarParser.py): Position {i}: '{old_word}' → '{sentence[i]}'")
-            
-            # Check for 'finish' and replace with 'finish (complete)'
-            for i, word in enumerate(sentence):
-                if word.lower() == 'finish':
-                    sentence[i] = 'finish (complete)'
-                    print(f"(GrammarParser.py): Position {i}: 'finish' → 'finish (complete)'")
+                # Ambiguous words become their disambiguated form (squashed to lowercase for matching),
+                # and 'finish' becomes 'finish (complete)'
+                sentence[i] = self._gloss_for_word(word, disambiguated_words)
+                if sentence[i] != word:
+                    print(f"(GrammarParser.py): Position {i}: '{word}' → '{sentence[i]}'")
             
             if original_sentence != sentence:
                 print(f"(GrammarParser.py): Before disambiguation: {original_sentence}")
                 print(f"(GrammarParser.py): After disambiguation: {sentence}")
             else:
                 print("(GrammarParser.py): No words were disambiguated in final sentence")
+            metrics["apply_senses"] = time.time() - apply_start
 
         else:
             print(f"(GrammarParser.py): Short sentence ({len(t2s_input.split())} words) - skipping processing")
@@ -209,7 +438,8 @@ class GrammarParser:
         print(f"(GrammarParser.py): Lowercase string: '{lowercase_sentence}'")
         
         # print(f"(GrammarParser.py): FINAL RESULT: {sentence}")
-        print(f"(GrammarParser.py): Processing completed in {time.time()-start:.4f} seconds")
+        metrics["total"] = time.time() - start
+        print(f"(GrammarParser.py): Stage metrics: {json.dumps(metrics)}")
         return sentence
 
     def save_as_json(self, parsed_result, output_filename="parsed_input.json"):
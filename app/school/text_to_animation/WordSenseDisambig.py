@@ -3,29 +3,109 @@ import os
 # Set environment variable to disable tokenizers parallelism warning
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+import threading
+from collections import OrderedDict
 import numpy as np
-import spacy
+from app.school.text_to_animation.nlp_service import nlp_service
+from app.school.text_to_animation.sense_index import SenseIndex, model_fingerprint, index_path_for
+from app.school.text_to_animation.wsd_backend import load_model, DEFAULT_BACKEND
+
+# Sentences per forward pass in disambiguate_batch
+DEFAULT_BATCH_SIZE = int(os.getenv("WSD_BATCH_SIZE", 32))
+
+# Context compared against the senses: the whole "sentence", or a "window" of tokens around each ambiguous word
+DEFAULT_CONTEXT_MODE = os.getenv("WSD_CONTEXT_MODE", "sentence")
+# Tokens kept on each side of the ambiguous word in window mode
+DEFAULT_CONTEXT_WINDOW = int(os.getenv("WSD_CONTEXT_WINDOW", 6))
+# Window embeddings remembered per process
+DEFAULT_CONTEXT_CACHE_ITEMS = int(os.getenv("WSD_CONTEXT_CACHE_ITEMS", 4096))
+
+
+class ContextEmbeddingCache:
+    """LRU of normalized context embeddings, keyed on (context text, model)."""
+
+    def __init__(self, model_id, max_items=DEFAULT_CONTEXT_CACHE_ITEMS):
+        self.model_id = model_id
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def get_many(self, texts, encode):
+        """Embeddings for `texts`, in order, calling `encode` once with the distinct texts that aren't cached."""
+        found = {}
+        with self._lock:
+            for text in texts:
+                key = (text, self.model_id)
+                if key in self._items:
+                    self._items.move_to_end(key)
+                    found[text] = self._items[key]
+            self.hits += sum(1 for text in texts if text in found)
+            self.misses += sum(1 for text in texts if text not in found)
+
+        missing = list(dict.fromkeys(text for text in texts if text not in found))
+        if missing:
+            for text, embedding in zip(missing, encode(missing)):
+                found[text] = embedding
+            with self._lock:
+                for text in missing:
+                    self._items[(text, self.model_id)] = found[text]
+                while len(self._items) > self.max_items:
+                    self._items.popitem(last=False)
+
+        return np.stack([found[text] for text in texts])
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"items": len(self._items), "hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / lookups if lookups else 0.0}
 
 class WordSenseDisambiguation:
     
-    def __init__(self):
-        """Initialize the word sense disambiguation with the ambiguous dictionary."""
+    def __init__(self, context_mode=DEFAULT_CONTEXT_MODE, context_window=DEFAULT_CONTEXT_WINDOW,
+                 backend=DEFAULT_BACKEND):
+        """Initialize the word sense disambiguation with the ambiguous dictionary.
+
+        Args:
+            context_mode (str): "sentence" to compare senses with the whole sentence, or "window"
+                to compare them with only `context_window` tokens on each side of the word.
+            context_window (int): Tokens on each side of the ambiguous word in window mode.
+            backend (str): Inference backend for the model: "torch", "int8" or "onnx" (see wsd_backend).
+        """
+        if context_mode not in ("sentence", "window"):
+            raise ValueError(f"Unknown WSD context mode: {context_mode}")
+        self.context_mode = context_mode
+        self.context_window = context_window
+
         self.ambiguous_dict = self._load_ambiguous_dict()
         
         # Load custom trained model - point to model directory, not the safetensors file
         model_path = os.path.join(os.path.dirname(__file__), 
                                  "wsd_models", "model")
         try:
-            self.model = SentenceTransformer(model_path)
-            print(f"SUCCESS - Loaded custom MPNet model from: {model_path}")
+            self.model = load_model(model_path, backend)
+            self.backend = backend
+            print(f"SUCCESS - Loaded custom MPNet model from: {model_path} ({backend} backend)")
         except Exception as e:
             print(f"FAILURE - Failed to load custom model: {e}")
             print("Falling back to base model...")
-            self.model = SentenceTransformer('all-mpnet-base-v2')
+            model_path = 'all-mpnet-base-v2'
+            self.model = SentenceTransformer(model_path)
+            self.backend = "torch"
+        self.model_id = f"{model_fingerprint(model_path)}:{self.backend}"
+
+        # Sense embeddings only depend on the dictionary and model, so they are encoded once, not per request
+        self.sense_index = SenseIndex.load_or_build(self.model, self.ambiguous_dict, self.model_id,
+                                                    index_path_for(self.backend))
+        self.context_cache = ContextEmbeddingCache(self.model_id)
         
-        """Load spaCy with only lemmatization capabilities."""
-        self.nlp = spacy.load("en_core_web_sm", disable=["parser", "ner", "tagger"])
+        # Shared spaCy pipeline, loaded on first use instead of a second copy per instance
+        self.nlp = nlp_service
         
     
     def _load_ambiguous_dict(self):
@@ -49,43 +129,147 @@ class WordSenseDisambiguation:
             list: A list of words with their senses disambiguated based on context.
         """
         
-        # dictionary of disambiguated words that have been disambiguated
-        disambiguated_words = {}
-        
         # Check if sentence contains any words that need disambiguation
         # split sentence into list of individual words
         words = sentence.lower().split()
 
         print("(WordSenseDisambig) Starting word sense disambiguation with words..." + str(words))
 
+        # dictionary of disambiguated words that have been disambiguated
+        disambiguated_words, ambiguous_words = self._collect_words(words, verbose=True)
+
+        if ambiguous_words:
+            # One forward pass for the sentence (or its windows), whatever the number of ambiguous words
+            context_embedding = self._context_embeddings([sentence], [ambiguous_words])[0]
+            for word, (best_sense, confidence) in zip(ambiguous_words, self._best_senses(ambiguous_words, context_embedding)):
+                print(f"Best sense for '{word}': {best_sense} with similarity {confidence}")
+                disambiguated_words[word] = best_sense
+
+        return disambiguated_words
+
+    def disambiguate_batch(self, sentences, batch_size=None):
+        """Disambiguates the words of many sentences, embedding all of them in one batched encode call.
+
+        Args:
+            sentences (list): Input sentences containing words to disambiguate.
+            batch_size (int, optional): Sentences per forward pass. Defaults to WSD_BATCH_SIZE.
+
+        Returns:
+            list: One dictionary of disambiguated words per sentence, as returned by disambiguate_words.
+        """
+        results = []
+        pending = []  # (result index, ambiguous words) of sentences that need an embedding
+        for sentence in sentences:
+            disambiguated_words, ambiguous_words = self._collect_words(sentence.lower().split())
+            if ambiguous_words:
+                pending.append((len(results), ambiguous_words))
+            results.append(disambiguated_words)
+
+        if pending:
+            embeddings = self._context_embeddings([sentences[i] for i, _ in pending],
+                                                  [ambiguous_words for _, ambiguous_words in pending], batch_size)
+            for (i, ambiguous_words), context_embedding in zip(pending, embeddings):
+                for word, (best_sense, _) in zip(ambiguous_words, self._best_senses(ambiguous_words, context_embedding)):
+                    results[i][word] = best_sense
+
+        print(f"(WordSenseDisambig) Disambiguated {len(sentences)} sentences, {len(pending)} needed context")
+        return results
+
+    def _collect_words(self, words, verbose=False):
+        """Look up each word in the ambiguous dictionary.
+
+        Args:
+            words (list): Lowercase words of a sentence.
+            verbose (bool): Log every word that is looked up.
+
+        Returns:
+            tuple: Dictionary with the words that have a single sense already resolved, and the
+                distinct words with several senses, which need the sentence to pick one.
+        """
+        disambiguated_words = {}
+        ambiguous_words = []
         for word in words:
 
             # check json file dictionary for words and their senses
-            if word in self.ambiguous_dict:
-                # disambiguate words based on context using semantic similarity
-                print(f"Disambiguating word: {word}")
-                
+            if word in self.ambiguous_dict and word not in disambiguated_words:
                 # Get the possible senses for the word
                 senses = self.ambiguous_dict[word]
-                print(f"Possible senses for '{word}': {senses}")
-                
+                if verbose:
+                    # disambiguate words based on context using semantic similarity
+                    print(f"Disambiguating word: {word}")
+                    print(f"Possible senses for '{word}': {senses}")
+
                 if len(senses) > 1:
-                    # Encode sentence and all possible senses
-                    sentence_embedding = self.model.encode([sentence])
-                    sense_embeddings = self.model.encode(senses)
-                    
-                    # Calculate cosine similarities
-                    similarities = cosine_similarity(sentence_embedding, sense_embeddings)[0]
-                    
-                    # Get the sense with highest similarity
-                    best_sense_idx = np.argmax(similarities)
-                    best_sense = senses[best_sense_idx]
-                    confidence = similarities[best_sense_idx]
-                    
-                    print(f"Best sense for '{word}': {best_sense} with similarity {confidence}")
-                    disambiguated_words[word] = best_sense
+                    ambiguous_words.append(word)
+                    disambiguated_words[word] = None
                 else:
                     # Only one sense available
                     disambiguated_words[word] = senses[0]
-        
-        return disambiguated_words
\ No newline at end of file
+        return disambiguated_words, ambiguous_words
+
+    def _context_window(self, sentence, word):
+        """The tokens of `sentence` within `context_window` of the first occurrence of `word`."""
+        tokens = sentence.split()
+        for i, token in enumerate(tokens):
+            if token.lower() == word:
+                return " ".join(tokens[max(0, i - self.context_window):i + self.context_window + 1])
+        return sentence
+
+    def _context_embeddings(self, sentences, ambiguous_words, batch_size=None):
+        """Embed the context of the ambiguous words of each sentence in one encode call.
+
+        Args:
+            sentences (list): Sentences to embed.
+            ambiguous_words (list): The ambiguous words of each sentence.
+            batch_size (int, optional): Texts per forward pass. Defaults to WSD_BATCH_SIZE.
+
+        Returns:
+            list: Per sentence, its normalized embedding in sentence mode, or one row per
+                ambiguous word (the embedding of its window) in window mode.
+        """
+        def encode(texts):
+            return self.model.encode(texts, batch_size=batch_size or DEFAULT_BATCH_SIZE,
+                                     normalize_embeddings=True, show_progress_bar=False)
+
+        if self.context_mode == "sentence":
+            return list(encode(sentences))
+
+        # Windows repeat across requests (and within long inputs), so they are cached by text
+        windows = [[self._context_window(sentence, word) for word in words]
+                   for sentence, words in zip(sentences, ambiguous_words)]
+        embeddings = self.context_cache.get_many([window for words in windows for window in words], encode)
+
+        contexts = []
+        start = 0
+        for words in windows:
+            contexts.append(embeddings[start:start + len(words)])
+            start += len(words)
+        return contexts
+
+    def _best_senses(self, words, context_embedding):
+        """Pick the sense of each word closest to its context embedding.
+
+        Args:
+            words (list): Ambiguous words, each with more than one sense.
+            context_embedding (np.ndarray): Normalized embedding of the context, either one
+                shared by all words or one row per word.
+
+        Returns:
+            list: (best sense, similarity) for each word, in order.
+        """
+        rows, offsets = self.sense_index.rows_for(words)
+        sense_embeddings = self.sense_index.embeddings[rows]
+
+        # Sense embeddings are unit length, so one matrix product gives every cosine similarity
+        if context_embedding.ndim == 1:
+            similarities = sense_embeddings @ context_embedding
+        else:
+            # Pair each sense with the context of its own word
+            counts = np.diff(offsets + [len(rows)])
+            similarities = np.einsum("ij,ij->i", sense_embeddings, np.repeat(context_embedding, counts, axis=0))
+
+        best = []
+        for word, start, end in zip(words, offsets, offsets[1:] + [len(rows)]):
+            best_sense_idx = int(np.argmax(similarities[start:end]))
+            best.append((self.ambiguous_dict[word][best_sense_idx], similarities[start + best_sense_idx]))
+        return best
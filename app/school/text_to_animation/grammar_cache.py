@@ -0,0 +1,151 @@
+import os
+import time
+import sqlite3
+import hashlib
+import tempfile
+import threading
+
+
+# SQLite file shared by every worker process on the host
+DEFAULT_CACHE_PATH = os.getenv("GRAMMAR_CACHE_PATH", os.path.join(tempfile.gettempdir(), "auslan_grammar_cache.sqlite3"))
+
+# How long (in seconds) a response is reused for, and how many responses are kept
+DEFAULT_TTL = float(os.getenv("GRAMMAR_CACHE_TTL", 30 * 24 * 60 * 60))
+DEFAULT_MAX_ENTRIES = int(os.getenv("GRAMMAR_CACHE_MAX_ENTRIES", 50000))
+
+
+def prompt_hash(prompt):
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def response_cache_key(sentence, model_name, prompt):
+    """Key for a grammar conversion: the lemmatized sentence, the model and the prompt it was sent with."""
+    normalized = " ".join(sentence.split())
+    payload = f"{model_name}\0{prompt_hash(prompt)}\0{normalized}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class GrammarResponseCache:
+    """Persistent cache of LLM grammar conversions, stored in SQLite.
+
+    Entries older than `ttl` seconds are ignored and removed. Once there are more
+    than `max_entries`, the least recently used ones are evicted. A `max_entries`
+    of 0 disables the cache.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+        self._conn = None
+        if self.max_entries > 0:
+            try:
+                self._conn = self._connect()
+            except sqlite3.Error as e:
+                print(f"(grammar_cache) Could not open {self.path}, caching disabled: {e}")
+
+    def _connect(self):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        # WAL lets several gunicorn workers read while one writes
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                sentence TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+        conn.commit()
+        return conn
+
+    @property
+    def enabled(self):
+        return self._conn is not None
+
+    def get(self, key):
+        """Return the cached response for `key`, or None."""
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None and self.ttl and now - row[1] > self.ttl:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                    self.expired += 1
+                    row = None
+
+                if row is None:
+                    self.misses += 1
+                    return None
+
+                self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+                self.hits += 1
+                return row[0]
+        except sqlite3.Error as e:
+            print(f"(grammar_cache) Lookup failed: {e}")
+            return None
+
+    def put(self, key, response, model_name="", sentence=""):
+        if not self.enabled:
+            return
+
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, sentence, response, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model_name, sentence, response, now, now))
+                count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+                if count > self.max_entries:
+                    excess = count - self.max_entries
+                    self._conn.execute(
+                        "DELETE FROM responses WHERE key IN "
+                        "(SELECT key FROM responses ORDER BY accessed_at ASC LIMIT ?)", (excess,))
+                    self.evictions += excess
+                self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"(grammar_cache) Could not store response: {e}")
+
+    def clear(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self):
+        entries = 0
+        if self.enabled:
+            try:
+                with self._lock:
+                    entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            except sqlite3.Error:
+                pass
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
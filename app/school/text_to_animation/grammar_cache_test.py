@@ -0,0 +1,126 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from app.school.text_to_animation.grammar_cache import GrammarResponseCache, response_cache_key
+
+
+class Clock:
+    """Stand-in for time.time that only moves when told to."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestResponseCacheKey(TestCase):
+    """
+    Unit tests for response_cache_key.
+    """
+
+    def test_key_ignores_whitespace(self):
+        """
+        Test if sentences differing only in whitespace share a key.
+        """
+        self.assertEqual(response_cache_key("i go  shop ", "model", "prompt"),
+                         response_cache_key("i go shop", "model", "prompt"))
+
+    def test_key_depends_on_model_and_prompt(self):
+        """
+        Test if a different model or prompt gives a different key.
+        """
+        key = response_cache_key("i go shop", "model", "prompt")
+        self.assertNotEqual(key, response_cache_key("i go shop", "other model", "prompt"))
+        self.assertNotEqual(key, response_cache_key("i go shop", "model", "other prompt"))
+
+
+class TestGrammarResponseCache(TestCase):
+    """
+    Unit tests for GrammarResponseCache.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "grammar.sqlite3")
+        self.clock = Clock()
+        time_patch = patch("app.school.text_to_animation.grammar_cache.time.time", self.clock)
+        time_patch.start()
+        self.addCleanup(time_patch.stop)
+
+    def cache(self, **kwargs):
+        cache = GrammarResponseCache(path=self.path, **kwargs)
+        self.addCleanup(lambda: cache._conn and cache._conn.close())
+        return cache
+
+    def test_put_and_get(self):
+        """
+        Test if a stored response is returned, and an unknown key misses.
+        """
+        cache = self.cache(ttl=60, max_entries=10)
+        cache.put("k1", "shop i go", model_name="model", sentence="i go shop")
+        self.assertEqual(cache.get("k1"), "shop i go")
+        self.assertIsNone(cache.get("k2"))
+        stats = cache.stats()
+        self.assertEqual((stats["entries"], stats["hits"], stats["misses"], stats["hit_rate"]), (1, 1, 1, 0.5))
+
+    def test_responses_are_shared_between_instances(self):
+        """
+        Test if a response stored by one cache (e.g. another worker) is read by another on the same file.
+        """
+        self.cache(ttl=60, max_entries=10).put("k1", "shop i go")
+        self.assertEqual(self.cache(ttl=60, max_entries=10).get("k1"), "shop i go")
+
+    def test_expired_responses_are_removed(self):
+        """
+        Test if responses older than the ttl miss and are deleted.
+        """
+        cache = self.cache(ttl=60, max_entries=10)
+        cache.put("k1", "shop i go")
+        self.clock.now += 61
+        self.assertIsNone(cache.get("k1"))
+        stats = cache.stats()
+        self.assertEqual((stats["entries"], stats["expired"]), (0, 1))
+
+    def test_evicts_least_recently_used(self):
+        """
+        Test if the least recently used responses are evicted over max_entries.
+        """
+        cache = self.cache(ttl=0, max_entries=2)
+        cache.put("k1", "one")
+        self.clock.now += 1
+        cache.put("k2", "two")
+        self.clock.now += 1
+        cache.get("k1")
+        self.clock.now += 1
+        cache.put("k3", "three")
+
+        self.assertIsNone(cache.get("k2"))
+        self.assertEqual(cache.get("k1"), "one")
+        self.assertEqual(cache.get("k3"), "three")
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_zero_entries_disables_cache(self):
+        """
+        Test if a cache of zero entries doesn't create its file or store anything.
+        """
+        cache = self.cache(max_entries=0)
+        cache.put("k1", "one")
+        self.assertFalse(cache.enabled)
+        self.assertIsNone(cache.get("k1"))
+        self.assertFalse(os.path.exists(self.path))
+        self.assertFalse(cache.stats()["enabled"])
+
+    def test_clear(self):
+        """
+        Test if clear removes every response.
+        """
+        cache = self.cache(ttl=60, max_entries=10)
+        cache.put("k1", "one")
+        cache.put("k2", "two")
+        cache.clear()
+        self.assertEqual(cache.stats()["entries"], 0)
+        self.assertIsNone(cache.get("k1"))
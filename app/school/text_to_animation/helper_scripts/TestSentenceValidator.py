@@ -11,9 +11,12 @@ Checks per entry:
 5) (Soft check) Sentence should not contain explicit hint words pointing to
    multiple senses or to a non-answer sense. Hints are extracted from any
    parenthetical labels in options, e.g., "formal (dress)" -> hint "dress".
+6) (Soft check, --wsd) The WSD model picks the "answer" sense for the sentence.
+   All entries that pass 1-4 are disambiguated together with disambiguate_batch.
 
 Usage:
   python validate_wsd.py --input data.json --out bad_entries.txt
+  python -m app.school.text_to_animation.helper_scripts.TestSentenceValidator --wsd
 """
 
 import argparse
@@ -108,8 +111,31 @@ def validate_entry(entry: Dict[str, Any]) -> List[str]:
 
     return reasons
 
+def wsd_disagreements(entries: List[Dict[str, Any]], indices: List[int]) -> Dict[int, str]:
+    """
+    Disambiguate the sentences of the given entries in one batch and return
+    {entry index: chosen sense} for those where the model doesn't pick the answer.
+    """
+    # Imported here, so the structural checks don't need the model
+    from app.school.text_to_animation.WordSenseDisambig import WordSenseDisambiguation
+
+    wsd = WordSenseDisambiguation()
+    # WSD looks words up by whitespace-separated tokens, so punctuation is dropped first
+    sentences = [re.sub(r"[^\w\s'-]", " ", entries[idx]["test_sentence"]) for idx in indices]
+    results = wsd.disambiguate_batch(sentences)
+
+    disagreements = {}
+    for idx, result in zip(indices, results):
+        entry = entries[idx]
+        chosen = result.get(entry["ambiguous_word"].strip().lower())
+        if chosen != entry["answer"].strip():
+            disagreements[idx] = chosen if chosen is not None else "<word not disambiguated>"
+    return disagreements
+
 def main():
     ap = argparse.ArgumentParser()
+    ap.add_argument("--wsd", action="store_true",
+                    help="also report entries whose answer the WSD model doesn't pick (soft check)")
     input_path = "app/school/text_to_animation/helper_scripts/outputs/wsd_test_cases_single.json"
     output_path = "app/school/text_to_animation/helper_scripts/outputs/wsd_test_cases_validation.txt"
     failed_words_path = "app/school/text_to_animation/helper_scripts/outputs/failed_words.txt"
@@ -119,6 +145,7 @@ def main():
 
     bad_lines: List[str] = []
     failed_words: List[str] = []
+    valid_indices: List[int] = []
     total = 0
     bad = 0
 
@@ -149,6 +176,18 @@ def main():
             )
             # Add the failed ambiguous word
             failed_words.append(aw)
+        else:
+            valid_indices.append(idx)
+
+    # 6) Soft check: doesn't count as a failure, but is listed with the details
+    soft_lines: List[str] = []
+    if args.wsd and valid_indices:
+        for idx, chosen in wsd_disagreements(entries, valid_indices).items():
+            entry = entries[idx]
+            soft_lines.append(
+                f"[{idx}] ambiguous_word='{entry['ambiguous_word']}' | answer='{entry['answer']}' | "
+                f"model chose='{chosen}' | sentence='{entry['test_sentence'].strip()}'"
+            )
 
     # Write detailed validation results
     with open(output_path, "w", encoding="utf-8") as f:
@@ -156,6 +195,9 @@ def main():
             f.write("\n".join(bad_lines) + "\n")
         else:
             f.write("All entries passed validation.\n")
+        if soft_lines:
+            f.write(f"\nWSD model disagrees with the answer ({len(soft_lines)} entries):\n")
+            f.write("\n".join(soft_lines) + "\n")
 
     # Write failed words only
     with open(failed_words_path, "w", encoding="utf-8") as f:
@@ -168,6 +210,8 @@ def main():
 
     print(f"Checked {total} entries.")
     print(f"Failures: {bad}. Valid: {total - bad}.")
+    if args.wsd:
+        print(f"WSD disagreements (soft): {len(soft_lines)} of {len(valid_indices)} valid entries.")
     print(f"Wrote details to: {output_path}")
     print(f"Wrote failed words to: {failed_words_path}")
     
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Accuracy / latency report for WordSenseDisambiguation context modes.
+
+Runs every test case through the whole-sentence mode and the context-window
+mode (for each requested window size) and reports, per mode:
+- accuracy: chosen sense == "answer" for the entry's ambiguous_word
+- missed: the ambiguous word was not found in the (lemmatized) sentence
+- batch time for all cases, and per-request latency from disambiguate_words
+
+Sentences are lemmatized first, as GrammarParser does before WSD (--no-lemmatize to skip).
+
+Usage (from the repository root):
+  python -m app.school.text_to_animation.helper_scripts.WSDEvaluator --windows 3 6 10
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import time
+from typing import Any, Dict, List
+
+from app.school.text_to_animation.WordSenseDisambig import WordSenseDisambiguation, ContextEmbeddingCache
+from app.school.text_to_animation.nlp_service import nlp_service
+
+INPUT_PATH = "app/school/text_to_animation/helper_scripts/outputs/test cases/wsd_test_cases.json"
+OUTPUT_PATH = "app/school/text_to_animation/helper_scripts/outputs/wsd_context_report.json"
+
+
+def load_cases(path: str) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def evaluate(wsd: WordSenseDisambiguation, cases: List[Dict[str, Any]], sentences: List[str],
+             latency_sample: int) -> Dict[str, Any]:
+    wsd.context_cache = ContextEmbeddingCache(wsd.model_id)  # start each mode with a cold cache
+
+    start = time.time()
+    results = wsd.disambiguate_batch(sentences)
+    batch_seconds = time.time() - start
+
+    correct = missed = 0
+    for case, result in zip(cases, results):
+        chosen = result.get(case["ambiguous_word"].lower())
+        if chosen is None:
+            missed += 1
+        elif chosen == case["answer"]:
+            correct += 1
+
+    # Per-request latency, as seen by /api/t2s (the per-word logging is silenced)
+    batch_cache = wsd.context_cache.stats()
+    wsd.context_cache = ContextEmbeddingCache(wsd.model_id)
+    latencies = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for sentence in sentences[:latency_sample]:
+            start = time.time()
+            wsd.disambiguate_words(sentence)
+            latencies.append(time.time() - start)
+    latencies.sort()
+
+    return {
+        "cases": len(cases),
+        "accuracy": correct / len(cases) if cases else 0.0,
+        "accuracy_found": correct / (len(cases) - missed) if len(cases) > missed else 0.0,
+        "missed": missed,
+        "batch_seconds": batch_seconds,
+        "latency_ms_mean": 1000 * sum(latencies) / len(latencies) if latencies else 0.0,
+        "latency_ms_p95": 1000 * latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0,
+        "context_cache": batch_cache,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input", default=INPUT_PATH)
+    ap.add_argument("--out", default=OUTPUT_PATH)
+    ap.add_argument("--windows", type=int, nargs="+", default=[3, 6, 10],
+                    help="window sizes (tokens on each side) to evaluate")
+    ap.add_argument("--latency-sample", type=int, default=200,
+                    help="number of cases timed one request at a time")
+    ap.add_argument("--no-lemmatize", action="store_true")
+    args = ap.parse_args()
+
+    cases = load_cases(args.input)
+    sentences = [case["test_sentence"] for case in cases]
+    if not args.no_lemmatize:
+        sentences = nlp_service.lemmatize_batch(sentences)
+
+    wsd = WordSenseDisambiguation()
+    report = {}
+
+    wsd.context_mode = "sentence"
+    report["sentence"] = evaluate(wsd, cases, sentences, args.latency_sample)
+
+    wsd.context_mode = "window"
+    for window in args.windows:
+        wsd.context_window = window
+        report[f"window_{window}"] = evaluate(wsd, cases, sentences, args.latency_sample)
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'mode':<12} {'accuracy':>9} {'missed':>7} {'batch s':>8} {'mean ms':>8} {'p95 ms':>8}")
+    for mode, row in report.items():
+        print(f"{mode:<12} {row['accuracy']:>9.3f} {row['missed']:>7} {row['batch_seconds']:>8.2f} "
+              f"{row['latency_ms_mean']:>8.1f} {row['latency_ms_p95']:>8.1f}")
+    print(f"Wrote report to: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
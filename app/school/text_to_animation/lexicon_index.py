@@ -0,0 +1,193 @@
+import os
+import json
+import threading
+import time
+
+
+# Default seed file, generated by src/scripts/wordDisambiguation/firebaseFilenames.py
+DEFAULT_LEXICON_FILE = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'firebase_filenames.json')
+
+# How often (in seconds) the index is rebuilt from the bucket listing
+DEFAULT_REFRESH_INTERVAL = float(os.getenv("LEXICON_REFRESH_INTERVAL", 15 * 60))
+
+
+class LexiconIndex:
+    """In-memory index of the .pose files available in Firebase Storage.
+
+    Replaces the per-word `bucket.blob(...).exists()` probes with an in-process
+    lookup. The index is seeded from a bucket listing, falling back to
+    `firebase_filenames.json` when the bucket can't be listed, and is rebuilt
+    in the background once it is older than `refresh_interval` seconds.
+    """
+
+    def __init__(self, bucket_factory=None, seed_file=DEFAULT_LEXICON_FILE,
+                 refresh_interval=DEFAULT_REFRESH_INTERVAL):
+        self.bucket_factory = bucket_factory
+        self.seed_file = os.getenv("LEXICON_INDEX_FILE", seed_file)
+        self.refresh_interval = refresh_interval
+
+        # Exact pose names (without .pose), and lowercase name -> exact names
+        self._names = set()
+        self._by_lower = {}
+        # Pose name -> storage generation, when known from the bucket listing
+        self._generations = {}
+        # Pose name -> number of times it was re-registered in this process, for when the generation isn't known
+        self._revisions = {}
+
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, pose_name):
+        self._ensure_fresh()
+        return pose_name in self._names
+
+    def _build(self, names, generations=None):
+        exact = set()
+        by_lower = {}
+        pose_generations = {}
+        for name in names:
+            generation = generations.get(name) if generations else None
+            if name.endswith(".pose"):
+                name = name[:-len(".pose")]
+            if not name or "/" in name:
+                # Only top-level .pose files are lexicon entries
+                continue
+            exact.add(name)
+            by_lower.setdefault(name.lower(), []).append(name)
+            if generation is not None:
+                pose_generations[name] = generation
+        return exact, by_lower, pose_generations
+
+    def _list_bucket(self):
+        bucket = self.bucket_factory()
+        # Filter server side: "*" doesn't cross "/", so renders under output_videos/ aren't paged through
+        blobs = [blob for blob in bucket.list_blobs(match_glob="*.pose") if blob.name.endswith(".pose")]
+        return [blob.name for blob in blobs], {blob.name: blob.generation for blob in blobs}
+
+    def _read_seed_file(self):
+        with open(self.seed_file, 'r') as file:
+            data = json.load(file)
+        # Accept both a plain list and the {"metadata": ..., "files": [...]} export format
+        if isinstance(data, dict):
+            data = data.get("files", [])
+        return data
+
+    def refresh(self):
+        """Rebuild the index. Returns the number of indexed pose files."""
+        start = time.time()
+        names = None
+        generations = None
+        source = None
+
+        if self.bucket_factory is not None:
+            try:
+                names, generations = self._list_bucket()
+                source = "bucket listing"
+            except Exception as e:
+                print(f"(lexicon_index) Bucket listing failed: {e}")
+
+        if names is None:
+            try:
+                names = self._read_seed_file()
+                source = self.seed_file
+            except (OSError, ValueError) as e:
+                print(f"(lexicon_index) Could not read seed file {self.seed_file}: {e}")
+                names = []
+                source = "empty"
+
+        exact, by_lower, pose_generations = self._build(names, generations)
+        with self._lock:
+            self._names = exact
+            self._by_lower = by_lower
+            self._generations = pose_generations
+            self._loaded_at = time.time()
+
+        print(f"(lexicon_index) Indexed {len(exact)} pose files from {source} in {time.time() - start:.2f} seconds")
+        return len(exact)
+
+    def invalidate(self):
+        """Mark the index as stale so the next lookup rebuilds it."""
+        with self._lock:
+            self._loaded_at = None
+
+    def add(self, pose_name):
+        """Register a newly uploaded pose file without a full rebuild."""
+        exact, _, _ = self._build([pose_name])
+        with self._lock:
+            for name in exact:
+                # A re-upload replaces the content, so the old generation no longer applies
+                self._generations.pop(name, None)
+                if name in self._names:
+                    self._revisions[name] = self._revisions.get(name, 0) + 1
+                else:
+                    self._names.add(name)
+                    self._by_lower.setdefault(name.lower(), []).append(name)
+
+    def remove(self, pose_name):
+        """Forget a deleted pose file without a full rebuild."""
+        if pose_name.endswith(".pose"):
+            pose_name = pose_name[:-len(".pose")]
+        with self._lock:
+            self._names.discard(pose_name)
+            self._generations.pop(pose_name, None)
+            matches = self._by_lower.get(pose_name.lower(), [])
+            if pose_name in matches:
+                matches.remove(pose_name)
+                if not matches:
+                    del self._by_lower[pose_name.lower()]
+
+    def names(self):
+        """All indexed pose names (without .pose), sorted."""
+        self._ensure_fresh()
+        return sorted(self._names)
+
+    def generation(self, pose_name):
+        """Storage generation of a pose file, or None if it isn't known."""
+        return self._generations.get(pose_name)
+
+    def version(self, pose_name):
+        """
+        Identify the current content of a pose file: its storage generation, plus a
+        revision bumped whenever the pose is re-registered with `add`. Seeded indexes
+        have no generations, so the revision is what tells a re-upload apart.
+        """
+        return self._generations.get(pose_name), self._revisions.get(pose_name, 0)
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        finally:
+            self._refreshing = False
+
+    def _ensure_fresh(self):
+        if self._loaded_at is None:
+            # Nothing usable yet, so the first caller has to wait for the load
+            self.refresh()
+            return
+
+        if self.refresh_interval and time.time() - self._loaded_at > self.refresh_interval:
+            with self._lock:
+                if self._refreshing:
+                    return
+                self._refreshing = True
+            # Keep serving the current index while the new one is built
+            threading.Thread(target=self._background_refresh, daemon=True).start()
+
+    def find(self, word):
+        """
+        Find the pose name for a word, trying the same casings as the bucket probes did.
+        Returns the pose name (without .pose) if found, else None.
+        """
+        self._ensure_fresh()
+
+        if word.lower() not in self._by_lower:
+            return None
+
+        for candidate in (word.lower(), word.capitalize(), word):
+            if candidate in self._names:
+                return candidate
+        return None
@@ -0,0 +1,71 @@
+import os
+import threading
+
+
+# spaCy pipeline shared by the grammar parser and word sense disambiguation
+DEFAULT_SPACY_MODEL = os.getenv("SPACY_MODEL", "en_core_web_sm")
+
+# Batch size for nlp.pipe
+DEFAULT_PIPE_BATCH_SIZE = int(os.getenv("SPACY_PIPE_BATCH_SIZE", 64))
+
+# Components each caller runs. Lemmas need the tagger and attribute ruler, while
+# part-of-speech tags don't need the lemmatizer.
+LEMMATIZER_DISABLE = ()
+TAGGER_DISABLE = ("lemmatizer",)
+
+# Nothing in the app uses dependency parses or entities, so they are never loaded
+EXCLUDED_COMPONENTS = ("parser", "ner")
+
+
+class NLPService:
+    """Process-wide spaCy pipeline, loaded on first use.
+
+    The pipeline is loaded once without the parser and NER. Callers then
+    disable the components they don't need per call, so the lemmatizer and
+    tagger users share one copy of the model instead of loading their own.
+    """
+
+    def __init__(self, model_name=DEFAULT_SPACY_MODEL, batch_size=DEFAULT_PIPE_BATCH_SIZE):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._nlp = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._nlp is not None
+
+    def load(self):
+        """Return the shared pipeline, loading it on the first call."""
+        if self._nlp is None:
+            with self._lock:
+                if self._nlp is None:
+                    import spacy
+                    self._nlp = spacy.load(self.model_name, exclude=list(EXCLUDED_COMPONENTS))
+                    print(f"(nlp_service) Loaded spaCy pipeline '{self.model_name}' with components {self._nlp.pipe_names}")
+        return self._nlp
+
+    def _disabled(self, nlp, disable):
+        # Only disable components this pipeline actually has
+        return [name for name in disable if name in nlp.pipe_names]
+
+    def process(self, text, disable=LEMMATIZER_DISABLE):
+        """Run the pipeline over a single text."""
+        nlp = self.load()
+        return nlp(text, disable=self._disabled(nlp, disable))
+
+    def pipe(self, texts, disable=LEMMATIZER_DISABLE, batch_size=None):
+        """Run the pipeline over many texts in batches. Yields one Doc per text, in order."""
+        nlp = self.load()
+        return nlp.pipe(texts, disable=self._disabled(nlp, disable), batch_size=batch_size or self.batch_size)
+
+    def lemmatize(self, text):
+        """Replace every token of `text` with its lemma."""
+        return " ".join(token.lemma_ for token in self.process(text))
+
+    def lemmatize_batch(self, texts, batch_size=None):
+        """Lemmatize many texts with a single batched pass through the pipeline."""
+        return [" ".join(token.lemma_ for token in doc) for doc in self.pipe(texts, batch_size=batch_size)]
+
+
+nlp_service = NLPService()
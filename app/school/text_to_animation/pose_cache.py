@@ -0,0 +1,277 @@
+import io
+import os
+import copy
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+from app.school.text_to_animation.pose_format.pose import Pose
+
+
+# Number of parsed raw poses kept in memory per process. Raw poses are only read to build
+# preprocessed ones (which have their own memory tier), so by default they are cached on disk only.
+DEFAULT_MEMORY_ITEMS = int(os.getenv("POSE_CACHE_MEMORY_ITEMS", 0))
+
+# Local directory and size budget (in bytes) for raw .pose files
+DEFAULT_DISK_DIR = os.getenv("POSE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "auslan_pose_cache"))
+DEFAULT_DISK_BYTES = int(os.getenv("POSE_CACHE_DISK_BYTES", 512 * 1024 * 1024))
+
+# Bump when the preprocessing changes, so stored poses from the old version are not reused
+PREPROCESS_VERSION = 1
+
+# Reduced poses are much smaller than raw ones, so more of them fit in the same budget
+DEFAULT_PREPROCESSED_MEMORY_ITEMS = int(os.getenv("PREPROCESSED_POSE_MEMORY_ITEMS", 1024))
+DEFAULT_PREPROCESSED_DISK_DIR = os.path.join(
+    os.getenv("PREPROCESSED_POSE_DIR", os.path.join(tempfile.gettempdir(), "auslan_preprocessed_poses")),
+    f"v{PREPROCESS_VERSION}")
+DEFAULT_PREPROCESSED_DISK_BYTES = int(os.getenv("PREPROCESSED_POSE_DISK_BYTES", 2 * 1024 * 1024 * 1024))
+
+
+def _cache_key(blob_name, generation):
+    return (blob_name, generation)
+
+
+class PoseMemoryCache:
+    """LRU of parsed Pose objects, bounded by number of entries.
+
+    The pipeline modifies poses in place, so `get` hands out a copy and the
+    cached object is never shared with a request.
+    """
+
+    def __init__(self, max_items=DEFAULT_MEMORY_ITEMS):
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key):
+        with self._lock:
+            pose = self._items.get(key)
+            if pose is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(pose)
+
+    def put(self, key, pose):
+        if self.max_items <= 0:
+            return
+        pose = copy.deepcopy(pose)
+        with self._lock:
+            self._items[key] = pose
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, blob_name):
+        with self._lock:
+            for key in [key for key in self._items if key[0] == blob_name]:
+                del self._items[key]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class PoseDiskCache:
+    """On-disk cache of raw .pose bytes, keyed by blob name and storage generation.
+
+    Files are evicted least-recently-used first (by modification time, which is
+    bumped on every hit) once the directory grows past `max_bytes`.
+    """
+
+    def __init__(self, directory=DEFAULT_DISK_DIR, max_bytes=DEFAULT_DISK_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._size = sum(size for _, size, _ in self._entries())
+
+    @property
+    def size_bytes(self):
+        return self._size
+
+    def _path(self, key):
+        blob_name, generation = key
+        digest = hashlib.sha1(f"{blob_name}\0{generation}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.pose")
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".pose"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key, data):
+        if self.max_bytes <= 0 or len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+
+        # Write to a temp file first so concurrent readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"(pose_cache) Could not write {path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        with self._lock:
+            self._size += len(data) - previous_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Called with the lock held
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        self._size = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
+            self.evictions += 1
+
+    def discard(self, key):
+        path = self._path(key)
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                return
+            self._size -= size
+
+    def clear(self):
+        with self._lock:
+            for path, _, _ in self._entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._size = 0
+
+
+class TieredPoseCache:
+    """Memory LRU of parsed poses in front of an on-disk cache of raw .pose bytes."""
+
+    def __init__(self, memory=None, disk=None):
+        self.memory = memory if memory is not None else PoseMemoryCache()
+        self.disk = disk if disk is not None else PoseDiskCache()
+
+    def get_pose(self, blob_name, generation, download):
+        """
+        Return the parsed pose for a blob, checking memory, then disk, then calling
+        `download()` for the raw bytes. Returns None if `download` returns None.
+        """
+        key = _cache_key(blob_name, generation)
+
+        pose = self.memory.get(key)
+        if pose is not None:
+            return pose
+
+        data = self.disk.get(key)
+        if data is None:
+            data = download()
+            if data is None:
+                return None
+            self.disk.put(key, data)
+
+        pose = Pose.read(data)
+        self.memory.put(key, pose)
+        return pose
+
+    def invalidate(self, blob_name, generation=None):
+        """Drop a blob that was re-uploaded. Entries keyed by a known generation go stale on their own."""
+        self.memory.discard(blob_name)
+        self.disk.discard(_cache_key(blob_name, generation))
+
+    def clear(self):
+        self.memory.clear()
+        self.disk.clear()
+
+    def stats(self):
+        return {
+            "memory": {
+                "items": len(self.memory),
+                "hits": self.memory.hits,
+                "misses": self.memory.misses,
+                "evictions": self.memory.evictions,
+            },
+            "disk": {
+                "bytes": self.disk.size_bytes,
+                "hits": self.disk.hits,
+                "misses": self.disk.misses,
+                "evictions": self.disk.evictions,
+            },
+        }
+
+
+class PreprocessedPoseStore(TieredPoseCache):
+    """Reduced and normalized (but untrimmed) lexicon poses, ready for concatenation.
+
+    Stored poses are written back in the .pose format, so a hit costs a read of
+    the already reduced file instead of a download, parse, reduce and normalize.
+    """
+
+    def __init__(self, preprocess, memory=None, disk=None):
+        super().__init__(
+            memory if memory is not None else PoseMemoryCache(DEFAULT_PREPROCESSED_MEMORY_ITEMS),
+            disk if disk is not None else PoseDiskCache(DEFAULT_PREPROCESSED_DISK_DIR, DEFAULT_PREPROCESSED_DISK_BYTES))
+        self.preprocess = preprocess
+
+    def get_preprocessed_pose(self, blob_name, generation, load_pose):
+        """
+        Return the preprocessed pose for a blob, calling `load_pose()` for the
+        source pose on a miss. Returns None if `load_pose` returns None.
+        """
+        def build():
+            pose = load_pose()
+            if pose is None:
+                return None
+            buffer = io.BytesIO()
+            self.preprocess(pose).write(buffer)
+            return buffer.getvalue()
+
+        return self.get_pose(blob_name, generation, build)
@@ -0,0 +1,232 @@
+import io
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from app.school.text_to_animation.pose_cache import (PoseDiskCache, PoseMemoryCache, PreprocessedPoseStore,
+                                                     TieredPoseCache)
+from app.school.text_to_animation.pose_format.utils.generic import fake_pose
+
+
+def pose_bytes(pose):
+    buffer = io.BytesIO()
+    pose.write(buffer)
+    return buffer.getvalue()
+
+
+class TestPoseMemoryCache(TestCase):
+    """
+    Unit tests for PoseMemoryCache.
+    """
+
+    def test_get_returns_a_copy(self):
+        """
+        Test if changing a pose returned by get doesn't change the cached pose.
+        """
+        cache = PoseMemoryCache(max_items=2)
+        cache.put(("hello", 1), fake_pose(2))
+
+        first = cache.get(("hello", 1))
+        first.body.data[:] = 0
+        second = cache.get(("hello", 1))
+        self.assertIsNot(first, second)
+        self.assertTrue(np.any(second.body.data != 0))
+
+    def test_evicts_least_recently_used(self):
+        """
+        Test if the least recently used pose is evicted when the cache is full.
+        """
+        cache = PoseMemoryCache(max_items=2)
+        cache.put(("a", 1), fake_pose(1))
+        cache.put(("b", 1), fake_pose(1))
+        cache.get(("a", 1))
+        cache.put(("c", 1), fake_pose(1))
+
+        self.assertIsNone(cache.get(("b", 1)))
+        self.assertIsNotNone(cache.get(("a", 1)))
+        self.assertIsNotNone(cache.get(("c", 1)))
+        self.assertEqual((cache.hits, cache.misses, cache.evictions), (3, 1, 1))
+
+    def test_zero_items_disables_cache(self):
+        """
+        Test if a cache of zero items never stores a pose.
+        """
+        cache = PoseMemoryCache(max_items=0)
+        cache.put(("a", 1), fake_pose(1))
+        self.assertEqual(len(cache), 0)
+        self.assertIsNone(cache.get(("a", 1)))
+
+    def test_discard_drops_every_generation(self):
+        """
+        Test if discard drops all generations of a blob and keeps other blobs.
+        """
+        cache = PoseMemoryCache(max_items=4)
+        cache.put(("a", 1), fake_pose(1))
+        cache.put(("a", 2), fake_pose(1))
+        cache.put(("b", 1), fake_pose(1))
+        cache.discard("a")
+        self.assertEqual(len(cache), 1)
+        self.assertIsNotNone(cache.get(("b", 1)))
+
+
+class TestPoseDiskCache(TestCase):
+    """
+    Unit tests for PoseDiskCache.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_put_and_get(self):
+        """
+        Test if stored bytes are read back, and unknown keys miss.
+        """
+        cache = PoseDiskCache(self.tmp.name, max_bytes=1024)
+        cache.put(("a", 1), b"pose a")
+        self.assertEqual(cache.get(("a", 1)), b"pose a")
+        self.assertIsNone(cache.get(("a", 2)))
+        self.assertEqual(cache.size_bytes, 6)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_evicts_oldest_files_over_budget(self):
+        """
+        Test if the least recently read files are removed once the directory is over budget.
+        """
+        cache = PoseDiskCache(self.tmp.name, max_bytes=20)
+        cache.put(("a", 1), b"a" * 8)
+        cache.put(("b", 1), b"b" * 8)
+        # Make "a" older than "b", then read it so it becomes the most recently used
+        for key, mtime in ((("a", 1), 1000), (("b", 1), 2000)):
+            os.utime(cache._path(key), (mtime, mtime))
+        cache.get(("a", 1))
+        cache.put(("c", 1), b"c" * 8)
+
+        self.assertIsNone(cache.get(("b", 1)))
+        self.assertEqual(cache.get(("a", 1)), b"a" * 8)
+        self.assertEqual(cache.get(("c", 1)), b"c" * 8)
+        self.assertEqual(cache.size_bytes, 16)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_skips_files_larger_than_budget(self):
+        """
+        Test if a file larger than the whole budget isn't stored.
+        """
+        cache = PoseDiskCache(self.tmp.name, max_bytes=4)
+        cache.put(("a", 1), b"too large")
+        self.assertIsNone(cache.get(("a", 1)))
+        self.assertEqual(cache.size_bytes, 0)
+
+    def test_discard_and_clear(self):
+        """
+        Test if discard removes one file and clear removes the rest.
+        """
+        cache = PoseDiskCache(self.tmp.name, max_bytes=1024)
+        cache.put(("a", 1), b"aaaa")
+        cache.put(("b", 1), b"bb")
+        cache.discard(("a", 1))
+        self.assertIsNone(cache.get(("a", 1)))
+        self.assertEqual(cache.size_bytes, 2)
+        cache.clear()
+        self.assertIsNone(cache.get(("b", 1)))
+        self.assertEqual(cache.size_bytes, 0)
+
+    def test_size_is_read_from_existing_files(self):
+        """
+        Test if a new cache over an existing directory counts the files already in it.
+        """
+        PoseDiskCache(self.tmp.name, max_bytes=1024).put(("a", 1), b"aaaa")
+        cache = PoseDiskCache(self.tmp.name, max_bytes=1024)
+        self.assertEqual(cache.size_bytes, 4)
+        self.assertEqual(cache.get(("a", 1)), b"aaaa")
+
+
+class TestTieredPoseCache(TestCase):
+    """
+    Unit tests for TieredPoseCache and PreprocessedPoseStore.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.pose = fake_pose(3)
+        self.data = pose_bytes(self.pose)
+        self.downloads = 0
+
+    def download(self):
+        self.downloads += 1
+        return self.data
+
+    def cache(self, memory_items=2):
+        return TieredPoseCache(PoseMemoryCache(memory_items), PoseDiskCache(self.tmp.name, max_bytes=1024 * 1024))
+
+    def test_downloads_once(self):
+        """
+        Test if a pose is downloaded once and then served from memory.
+        """
+        cache = self.cache()
+        first = cache.get_pose("hello.pose", 1, self.download)
+        second = cache.get_pose("hello.pose", 1, self.download)
+        self.assertEqual(self.downloads, 1)
+        np.testing.assert_allclose(first.body.data, self.pose.body.data, rtol=1e-6)
+        np.testing.assert_array_equal(first.body.data, second.body.data)
+        stats = cache.stats()
+        self.assertEqual((stats["memory"]["hits"], stats["disk"]["misses"]), (1, 1))
+
+    def test_disk_tier_survives_a_new_memory_tier(self):
+        """
+        Test if a new cache over the same directory reads the pose from disk instead of downloading it.
+        """
+        self.cache(memory_items=0).get_pose("hello.pose", 1, self.download)
+        cache = self.cache(memory_items=0)
+        cache.get_pose("hello.pose", 1, self.download)
+        self.assertEqual(self.downloads, 1)
+        self.assertEqual(cache.stats()["disk"]["hits"], 1)
+
+    def test_new_generation_is_downloaded(self):
+        """
+        Test if a different storage generation of a blob isn't served from the cache.
+        """
+        cache = self.cache()
+        cache.get_pose("hello.pose", 1, self.download)
+        cache.get_pose("hello.pose", 2, self.download)
+        self.assertEqual(self.downloads, 2)
+
+    def test_invalidate_forces_a_download(self):
+        """
+        Test if invalidating a blob makes the next lookup download it again.
+        """
+        cache = self.cache()
+        cache.get_pose("hello.pose", None, self.download)
+        cache.invalidate("hello.pose")
+        cache.get_pose("hello.pose", None, self.download)
+        self.assertEqual(self.downloads, 2)
+
+    def test_missing_blob_returns_none(self):
+        """
+        Test if a download returning None isn't cached.
+        """
+        cache = self.cache()
+        self.assertIsNone(cache.get_pose("missing.pose", 1, lambda: None))
+        self.assertEqual(cache.disk.size_bytes, 0)
+
+    def test_preprocessed_store_preprocesses_once(self):
+        """
+        Test if the preprocessed store runs the preprocessing once per blob and generation.
+        """
+        calls = []
+
+        def preprocess(pose):
+            calls.append(pose)
+            pose.body.data[:] = 1
+            return pose
+
+        store = PreprocessedPoseStore(preprocess, PoseMemoryCache(2), PoseDiskCache(self.tmp.name, 1024 * 1024))
+        first = store.get_preprocessed_pose("hello.pose", 1, lambda: fake_pose(3))
+        second = store.get_preprocessed_pose("hello.pose", 1, lambda: fake_pose(3))
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(np.all(first.body.data == 1))
+        self.assertTrue(np.all(second.body.data == 1))
+        self.assertIsNone(store.get_preprocessed_pose("missing.pose", 1, lambda: None))
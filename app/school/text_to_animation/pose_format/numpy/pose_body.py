@@ -292,10 +292,70 @@ class NumPyPoseBody(PoseBody):
 
         return NumPyPoseBody(self.fps, new_data, confidence)
 
+    @staticmethod
+    def _interpolate_linear(steps: np.ndarray, new_steps: np.ndarray, points: ma.MaskedArray) -> np.ndarray:
+        """
+        Linearly interpolates all points at once.
+
+        Gives the same values as fitting ``interp1d(kind='linear')`` to the unmasked frames of every point:
+        zeros where a point has no data at all, and before its first or after its last unmasked frame.
+
+        Parameters
+        ----------
+        steps : np.ndarray
+            Time step of every frame, in [0, 1].
+        new_steps : np.ndarray
+            Time steps to interpolate at, in [0, 1].
+        points : ma.MaskedArray
+            Pose data with confidence as last dimension, shaped (points, people, frames, dims).
+
+        Returns
+        -------
+        np.ndarray
+            Interpolated data, shaped (points, people, new_frames, dims).
+        """
+        _points, _people, _frames, _dims = points.shape
+        values = points.data.reshape(-1, _dims)  # (points * people * frames, dims)
+        valid = ~ma.getmaskarray(points)[..., 0].reshape(-1, _frames)
+        series = np.arange(len(valid))[:, None]
+
+        counts = valid.sum(axis=1)
+        # Frame indexes of each point's unmasked frames, in order, followed by the masked ones
+        valid_frames = np.argsort(~valid, axis=1, kind='stable')
+
+        # Number of unmasked frames strictly before each new step, like `searchsorted` over the unmasked steps
+        cumulative = np.concatenate([np.zeros((len(valid), 1), dtype=int), np.cumsum(valid, axis=1)], axis=1)
+        hi = cumulative[:, np.searchsorted(steps, new_steps, side='left')]
+        hi = np.clip(hi, 1, np.maximum(counts - 1, 1)[:, None])
+        lo = hi - 1
+
+        lo_frames = np.take_along_axis(valid_frames, lo, axis=1)
+        hi_frames = np.take_along_axis(valid_frames, hi, axis=1)
+        x_lo, x_hi = steps[lo_frames], steps[hi_frames]
+        y_lo = values[(lo_frames + series * _frames).ravel()].reshape(*lo.shape, _dims)
+        y_hi = values[(hi_frames + series * _frames).ravel()].reshape(*hi.shape, _dims)
+
+        # Same operations, in the same order and precision, as `interp1d`
+        with np.errstate(divide='ignore', invalid='ignore'):  # Points with less than 2 frames divide by zero
+            new_values = np.subtract(y_hi, y_lo) / (x_hi - x_lo)[..., None]
+            new_values *= (new_steps - x_lo)[..., None]
+            new_values += y_lo
+        # A single frame is repeated as is
+        new_values = np.where((counts == 1)[:, None, None], y_lo, new_values)
+
+        first_step = steps[valid_frames[:, 0]]
+        last_step = steps[valid_frames[series[:, 0], np.maximum(counts - 1, 0)]]
+        in_range = (counts > 0)[:, None] & (new_steps >= first_step[:, None]) & (new_steps <= last_step[:, None])
+        new_values = np.where(in_range[..., None], new_values, 0)
+
+        return new_values.reshape(_points, _people, len(new_steps), _dims)
+
     def interpolate(self, new_fps: int = None, kind='cubic'):
         """
         Interpolates the pose data to match a new frame rate.
 
+        Linear interpolation is done for all points at once. Other kinds fit a spline per point.
+
         Parameters
         ----------
         new_fps : int, optional
@@ -329,6 +389,15 @@ class NumPyPoseBody(PoseBody):
         confidence = ma.expand_dims(masked_confidence.transpose(), axis=3)  # (points, people, frames, 1)
         points = ma.concatenate([transposed, confidence], axis=3)
 
+        # The vectorized path needs every dimension of a frame to be masked together
+        points_mask = ma.getmaskarray(points)
+        if kind == 'linear' and np.all(points_mask == points_mask[..., :1]):
+            new_data = self._interpolate_linear(steps, new_steps, points).transpose([2, 1, 0, 3])
+            dimensions, confidence = np.split(new_data, [-1], axis=3)
+            confidence = np.squeeze(confidence, axis=3)
+
+            return NumPyPoseBody(fps=new_fps, data=dimensions, confidence=confidence)
+
         new_people = []
         for people in points:
             new_frames = []
@@ -1,7 +1,9 @@
 import itertools
 import logging
 import math
-from functools import lru_cache
+from collections import deque
+from concurrent.futures import Executor
+from dataclasses import dataclass
 from io import BytesIO
 from typing import Iterable, Tuple, Union
 
@@ -10,9 +12,63 @@ import numpy.ma as ma
 from tqdm import tqdm
 
 from .pose import Pose
+from .pose_header import PoseHeader
 
 from typing import List
 
+_DRAW_CIRCLE, _DRAW_LINE, _DRAW_RECTANGLE = 0, 1, 2
+
+
+@dataclass
+class _DrawPlan:
+    """
+    Per-header draw operations for `PoseVisualizer._draw_frame`, in the order they are drawn before sorting by z.
+
+    Parameters
+    ----------
+    base_colors : np.ndarray
+        BGR color of every point, shape (points, 3).
+    kinds : np.ndarray
+        Kind of every operation (_DRAW_CIRCLE, _DRAW_LINE or _DRAW_RECTANGLE).
+    first : np.ndarray
+        Index of the first point of every operation.
+    second : np.ndarray
+        Index of the second point of every operation (the same point for circles).
+    """
+    base_colors: np.ndarray
+    kinds: np.ndarray
+    first: np.ndarray
+    second: np.ndarray
+
+    @staticmethod
+    def from_header(header: PoseHeader) -> "_DrawPlan":
+        base_colors = []
+        kinds, first, second = [], [], []
+        idx = 0
+        for component in header.components:
+            colors = [np.array(color[::-1], dtype=np.float64) for color in component.colors]
+            n = len(component.points)
+            base_colors.extend(colors[i % len(colors)] for i in range(n))
+
+            kinds.extend([_DRAW_CIRCLE] * n)
+            first.extend(range(idx, idx + n))
+            second.extend(range(idx, idx + n))
+            if header.is_bbox:
+                kinds.append(_DRAW_RECTANGLE)
+                first.append(idx)
+                second.append(idx + 1)
+            else:
+                for (p1, p2) in component.limbs:
+                    kinds.append(_DRAW_LINE)
+                    first.append(p1 + idx)
+                    second.append(p2 + idx)
+            idx += n
+
+        return _DrawPlan(base_colors=np.array(base_colors, dtype=np.float64).reshape(-1, 3),
+                         kinds=np.array(kinds, dtype=np.int64),
+                         first=np.array(first, dtype=np.int64),
+                         second=np.array(second, dtype=np.int64))
+
 class PoseVisualizer:
     """
     A class for visualizing Pose objects using OpenCV.
@@ -34,6 +90,8 @@ class PoseVisualizer:
         self.pose = pose
         self.thickness = thickness
         self.pose_fps = float(self.pose.body.fps)
+        self._plan = None
+        self._plan_header = None
 
         try:
             import cv2
@@ -41,8 +99,23 @@ class PoseVisualizer:
         except ImportError:
             raise ImportError("Please install OpenCV with: pip install opencv-python")
 
+    def _draw_plan(self) -> "_DrawPlan":
+        """
+        Draw plan for the current header, built once and reused for every frame.
+
+        Returns
+        -------
+        _DrawPlan
+            Point colors and draw operations, which only depend on the header.
+        """
+        header = self.pose.header
+        if self._plan_header is not header:
+            self._plan = _DrawPlan.from_header(header)
+            self._plan_header = header
+        return self._plan
+
     def _draw_frame(self, frame: ma.MaskedArray, frame_confidence: np.ndarray, img,
-                    transparency: bool = False, title: str = "") -> np.ndarray:
+                    transparency: bool = False, title: str = "", scale: float = 1.0) -> np.ndarray:
         """
         Draw frame of pose data of an image and add title at the bottom.
 
@@ -58,6 +131,8 @@ class PoseVisualizer:
             Transparency decides opacity of background color.
         title : str, optional
             The title to be displayed at the bottom of the frame.
+        scale : float, optional
+            Size of img relative to the pose dimensions, used to scale a fixed thickness and the title.
 
         Returns
         -------
@@ -71,164 +146,171 @@ class PoseVisualizer:
         thickness = self.thickness
         if self.thickness is None:
             thickness = round(math.sqrt(img.shape[0] * img.shape[1]) / 150)
+        elif scale != 1.0:
+            thickness = max(1, round(thickness * scale))
         radius = round(thickness / 2)
 
-        draw_operations = []
+        plan = self._draw_plan()
+        frame = np.asarray(frame)
+        frame_confidence = np.asarray(frame_confidence, dtype=np.float64)
 
-        for person, person_confidence in zip(frame, frame_confidence):
-            c = person_confidence.tolist()
-            points = [p for p in person.tolist()]
-            idx = 0
-            for component in self.pose.header.components:
-                colors = [np.array(c[::-1]) for c in component.colors]
-
-                @lru_cache(maxsize=None)
-                def _point_color(p_i: int):
-                    opacity = c[p_i + idx]
-                    np_color = colors[p_i % len(component.colors)] * opacity + (1 - opacity) * background_color[
-                                                                                               :3]  # [:3] ignores alpha value if present
-                    if transparency:
-                        np_color = np.append(np_color, opacity * 255)
-                    return tuple([int(c) for c in np_color])
-
-                # Collect Points
-                for i, point_name in enumerate(component.points):
-                    if c[i + idx] > 0:
-                        center = points[i + idx]
-                        draw_operations.append({
-                            'type': 'circle',
-                            'center': center,
-                            'radius': radius,
-                            'color': _point_color(i),
-                            'thickness': -1,
-                            'lineType': 16,
-                            'z': center[2] if len(center) > 2 else 0
-                        })
-
-                if self.pose.header.is_bbox:
-                    point1 = points[0 + idx]
-                    point2 = points[1 + idx]
-                    color = tuple(np.mean([_point_color(0), _point_color(1)], axis=0))
-
-                    draw_operations.append({
-                        'type': 'rectangle',
-                        'pt1': point1,
-                        'pt2': point2,
-                        'color': color,
-                        'thickness': thickness,
-                        'z': (point1[2] + point2[2]) / 2 if len(point1) > 2 else 0
-                    })
-                else:
-                    # Collect Limbs
-                    for (p1, p2) in component.limbs:
-                        if c[p1 + idx] > 0 and c[p2 + idx] > 0:
-                            point1 = points[p1 + idx]
-                            point2 = points[p2 + idx]
-
-                            color = tuple(np.mean([_point_color(p1), _point_color(p2)], axis=0))
-
-                            draw_operations.append({
-                                'type': 'line',
-                                'pt1': point1,
-                                'pt2': point2,
-                                'color': color,
-                                'thickness': thickness,
-                                'lineType': self.cv2.LINE_AA,
-                                'z': (point1[2] + point2[2]) / 2 if len(point1) > 2 else 0
-                            })
+        # Point colors fade towards the background as confidence drops. [:3] ignores alpha value if present
+        opacity = frame_confidence[..., np.newaxis]
+        point_colors = plan.base_colors * opacity + (1 - opacity) * background_color[:3]
+        if transparency:
+            point_colors = np.concatenate([point_colors, opacity * 255], axis=-1)
+        point_colors = point_colors.astype(np.int64)
+
+        # Operations in their unsorted order, for every person: a circle per visible point, then a line per
+        # limb with both ends visible (or a box per component for bbox poses)
+        first, second, kinds = plan.first, plan.second, plan.kinds
+        visible = ((frame_confidence[:, first] > 0) & (frame_confidence[:, second] > 0)) | (kinds == _DRAW_RECTANGLE)
+        if frame.shape[-1] > 2:
+            z = (frame[:, first, 2] + frame[:, second, 2]) / 2
+        else:
+            z = np.zeros(visible.shape)
 
-                idx += len(component.points)
+        people, ops = np.nonzero(visible)
+        order = np.argsort(z[people, ops], kind="stable")
+        people, ops = people[order], ops[order]
 
-        draw_operations = sorted(draw_operations, key=lambda op: op['z'])
+        points = frame[..., :2].tolist()
+        circle_colors = point_colors.tolist()
+        limb_colors = ((point_colors[:, first] + point_colors[:, second]) / 2).tolist()
 
         # Execute draw operations
-        for op in draw_operations:
-            if op['type'] == 'circle':
+        for person, op, kind, p1, p2 in zip(people.tolist(), ops.tolist(), kinds[ops].tolist(),
+                                            first[ops].tolist(), second[ops].tolist()):
+            if kind == _DRAW_CIRCLE:
                 self.cv2.circle(img=img,
-                                center=tuple(op['center'][:2]),
-                                radius=op['radius'],
-                                color=op['color'],
-                                thickness=op['thickness'],
-                                lineType=op['lineType'])
-            elif op['type'] == 'rectangle':
+                                center=tuple(points[person][p1]),
+                                radius=radius,
+                                color=tuple(circle_colors[person][p1]),
+                                thickness=-1,
+                                lineType=16)
+            elif kind == _DRAW_RECTANGLE:
                 self.cv2.rectangle(img=img,
-                                   pt1=tuple(op['pt1'][:2]),
-                                   pt2=tuple(op['pt2'][:2]),
-                                   color=op['color'],
-                                   thickness=op['thickness'])
-            elif op['type'] == 'line':
+                                   pt1=tuple(points[person][p1]),
+                                   pt2=tuple(points[person][p2]),
+                                   color=tuple(limb_colors[person][op]),
+                                   thickness=thickness)
+            else:
                 self.cv2.line(img,
-                              pt1=tuple(op['pt1'][:2]),
-                              pt2=tuple(op['pt2'][:2]),
-                              color=op['color'],
-                              thickness=op['thickness'],
-                              lineType=op['lineType'])
+                              pt1=tuple(points[person][p1]),
+                              pt2=tuple(points[person][p2]),
+                              color=tuple(limb_colors[person][op]),
+                              thickness=thickness,
+                              lineType=self.cv2.LINE_AA)
         # (This part of the code handles drawing the pose points and limbs)
 
         # Adding the title to the top of the image
         if title:
             font = self.cv2.FONT_HERSHEY_SIMPLEX
-            font_scale = 3  # Adjust as necessary
+            font_scale = 3 * scale  # Adjust as necessary
             color = (255, 255, 0)  # blue text
-            thickness = 8  # Thickness of the text
+            thickness = max(1, round(8 * scale))  # Thickness of the text
             text_size = self.cv2.getTextSize(title, font, font_scale, thickness)[0]
             text_x = (img.shape[1] - text_size[0]) // 2  # Center the text horizontally
-            text_y = 30 + text_size[1]  # Position the text closer to the top edge
+            text_y = round(30 * scale) + text_size[1]  # Position the text closer to the top edge
             self.cv2.putText(img, title, (text_x, text_y), font, font_scale, color, thickness, lineType=self.cv2.LINE_AA)
 
         return img
 
 
-    def draw_frame_with_filename(self, frame_ranges: List[Tuple[int, int, str]], max_frames: int = None):
+    @staticmethod
+    def _frame_titles(frame_ranges: List[Tuple[int, int, str]], frames: int) -> List[str]:
+        """
+        Filename to overlay on each frame, based on frame_ranges.
+
+        Parameters
+        ----------
+        frame_ranges : List[Tuple[int, int, str]]
+            (start_frame, end_frame, filename) for each concatenated pose, in order.
+        frames : int
+            Number of frames to get titles for.
+
+        Returns
+        -------
+        List[str]
+            Title of every frame.
+        """
+        titles = []
+        filename = None
+        current_range_idx = 0
+        for frame_idx in range(frames):
+            # Determine which filename to use for this frame based on frame_ranges
+            if current_range_idx < len(frame_ranges):
+                start_frame, end_frame, filename = frame_ranges[current_range_idx]
+                if frame_idx > end_frame:
+                    current_range_idx += 1
+                    if current_range_idx < len(frame_ranges):
+                        start_frame, end_frame, filename = frame_ranges[current_range_idx]
+            titles.append(filename)
+        return titles
+
+    def draw_frame_with_filename(self, frame_ranges: List[Tuple[int, int, str]], max_frames: int = None,
+                                 executor: Executor = None, prefetch: int = 32,
+                                 output_size: Tuple[int, int] = None):
         """
         draws pose on plain background using the specified color - for a number of frames.
 
         Parameters
         ----------
-        background_color : Tuple[int, int, int], optional
-            RGB value for background color, default is white (255, 255, 255).
+        frame_ranges : List[Tuple[int, int, str]]
+            (start_frame, end_frame, filename) for each concatenated pose, used as the title of its frames.
         max_frames : int, optional
             Maximum number of frames to process, if it is None, it processes all frames.
-        transparency : bool
-            transparency decides opacity of background color, it is only used in the case of PNG i.e It doesn't affect GIF.
+        executor : Executor, optional
+            If given, frames are drawn ahead in the executor and still yielded in order.
+        prefetch : int
+            Maximum number of frames drawn ahead when using an executor.
+        output_size : Tuple[int, int], optional
+            (width, height) to draw at. Coordinates, thickness and title are scaled before drawing,
+            so frames come out at this size without resizing. Defaults to the pose dimensions.
         Yields
         ------
         np.ndarray
             Frames with the pose data drawn on a custom background color.
         """
-        # ...
-        # if transparency:
-        #     background_color += (0,)
-        # int_frames = np.array(np.around(self.pose.body.data.data), dtype="int32")
-        # background = np.full(
-        #     (self.pose.header.dimensions.height, self.pose.header.dimensions.width, len(background_color)),
-        #     fill_value=background_color,
-        #     dtype="uint8")
-        # for frame, confidence in itertools.islice(zip(int_frames, self.pose.body.confidence), max_frames):
-        #     yield self._draw_frame(frame, confidence, img=background.copy(), transparency=transparency, title=title)
-        
-        int_frames = np.array(np.around(self.pose.body.data.data), dtype="int32")
+        width, height = self.pose.header.dimensions.width, self.pose.header.dimensions.height
+        data = self.pose.body.data.data
+        scale = 1.0
+        if output_size is not None and tuple(output_size) != (width, height):
+            scale_x, scale_y = output_size[0] / width, output_size[1] / height
+            scale = math.sqrt(scale_x * scale_y)
+            data = data.copy()
+            data[..., 0] *= scale_x
+            data[..., 1] *= scale_y
+            width, height = output_size
+
+        int_frames = np.array(np.around(data), dtype="int32")
         background = np.full(
-        (self.pose.header.dimensions.height, self.pose.header.dimensions.width, 3),  # Assuming RGB
+        (height, width, 3),  # Assuming RGB
         fill_value=(0, 0, 0),  # Background color
         dtype="uint8"
     )
 
-        current_range_idx = 0
-        for frame_idx, (frame, confidence) in enumerate(zip(int_frames, self.pose.body.confidence)):
-            if max_frames is not None and frame_idx >= max_frames:
-                break
-            
-            # Determine which filename to use for this frame based on frame_ranges
-            if current_range_idx < len(frame_ranges):
-                start_frame, end_frame, filename = frame_ranges[current_range_idx]
-                if frame_idx > end_frame:
-                    current_range_idx += 1
-                    if current_range_idx < len(frame_ranges):
-                        start_frame, end_frame, filename = frame_ranges[current_range_idx]
-            
+        frames = len(int_frames) if max_frames is None else min(max_frames, len(int_frames))
+        titles = self._frame_titles(frame_ranges, frames)
+
+        def draw(frame_idx):
             # Draw the frame with the correct filename overlay
-            yield self._draw_frame(frame, confidence, img=background.copy(), title=filename)
+            return self._draw_frame(int_frames[frame_idx], self.pose.body.confidence[frame_idx],
+                                    img=background.copy(), title=titles[frame_idx], scale=scale)
+
+        if executor is None:
+            for frame_idx in range(frames):
+                yield draw(frame_idx)
+            return
+
+        # Keep up to `prefetch` frames in flight, yielding them in order
+        pending = deque()
+        for frame_idx in range(frames):
+            pending.append(executor.submit(draw, frame_idx))
+            if len(pending) >= prefetch:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
 
     def draw_on_video(self, background_video, max_frames: int = None, blur=False, title: str = ""):
         """
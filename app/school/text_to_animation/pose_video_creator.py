@@ -2,15 +2,21 @@ import os
 import tempfile
 import firebase_admin
 from firebase_admin import credentials, storage
-from app.school.text_to_animation.pose_format.pose import Pose
+from google.api_core.exceptions import NotFound
 from app.school.text_to_animation.pose_format.pose_visualizer import PoseVisualizer
-import io
 import cv2
-from app.school.text_to_animation.spoken_to_signed.gloss_to_pose import concatenate_poses
+from app.school.text_to_animation.spoken_to_signed.gloss_to_pose import concatenate_poses, preprocess_pose
+from app.school.text_to_animation.lexicon_index import LexiconIndex
+from app.school.text_to_animation.pose_cache import TieredPoseCache, PreprocessedPoseStore, PREPROCESS_VERSION
+from app.school.text_to_animation.video_cache import RenderedVideoCache, render_cache_key, RENDER_KEY_METADATA
 from dotenv import load_dotenv
 import numpy as np
 import subprocess
 import time
+import copy
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 
 # Load environment variables from the .env file
@@ -40,38 +46,66 @@ if not firebase_admin._apps:
     cred = credentials.Certificate(firebase_credentials)
     firebase_admin.initialize_app(cred, {'storageBucket': 'auslan-194e5.appspot.com'})
 
-def find_word_pose_name(word, bucket):
+# Maximum number of pose files downloaded at the same time
+POSE_FETCH_WORKERS = int(os.getenv("POSE_FETCH_WORKERS", 8))
+
+# Index of available .pose files, so blob resolution doesn't need a network call per word
+lexicon_index = LexiconIndex(bucket_factory=storage.bucket)
+
+# Parsed poses in memory, raw .pose bytes on local disk
+pose_cache = TieredPoseCache()
+
+# Reduced + normalized poses, so requests start straight at concatenation
+preprocessed_store = PreprocessedPoseStore(preprocess_pose)
+
+# Finished renders, so repeated gloss sequences return the existing video
+video_cache = RenderedVideoCache(bucket_factory=storage.bucket)
+
+# Everything besides the poses themselves that changes the rendered video
+RENDER_PARAMS = {
+    "preprocess_version": PREPROCESS_VERSION,
+    "resize_factor": 0.5,
+    "encoder": "libx264",
+    "preset": "ultrafast",
+    "crf": 32,
+    # Frames are drawn at the output size rather than drawn full size and downscaled
+    "draw_at_output_size": True,
+    # "streaming" uploads a fragmented MP4 while it is encoded, "file" uploads a faststart MP4 afterwards
+    "pipeline": os.getenv("RENDER_PIPELINE", "file"),
+}
+
+# Frame drawing workers, and how many frames may be drawn ahead of ffmpeg
+RENDER_DRAW_WORKERS = int(os.getenv("RENDER_DRAW_WORKERS", 4))
+RENDER_FRAME_QUEUE = int(os.getenv("RENDER_FRAME_QUEUE", 32))
+
+# Resumable upload chunk size for the streaming pipeline (a multiple of 256 KB)
+RENDER_UPLOAD_CHUNK = 1024 * 1024
+
+def find_word_pose_name(word):
     """
     Try to find a pose file for the full word in different casings.
     Returns the pose name (without .pose) if found, else None.
     """
-    lowercase_blob    = bucket.blob(f"{word.lower()}.pose")
-    capitalized_blob  = bucket.blob(f"{word.capitalize()}.pose")
-    regular_case_blob = bucket.blob(f"{word}.pose")
-
-    if lowercase_blob.exists():
-        return word.lower()
-    elif capitalized_blob.exists():
-        return word.capitalize()
-    elif regular_case_blob.exists():
-        return word
-    return None
-
-# Process pose file from Firebase Storage
+    return lexicon_index.find(word)
+
+# Process pose file from Firebase Storage, going through the local pose cache first
 def process_pose_file(blob_name):
     file_start_time = time.time()
     try:
-        bucket = storage.bucket()
-        # Assuming each word corresponds to a .pose file
-        blob = bucket.blob(f"{blob_name}.pose")
-        if not blob.exists():
-            print(f"Blob {blob_name} does not exist.")
-            return None
-
-        data_buffer = io.BytesIO()
-        blob.download_to_file(data_buffer)
-        data_buffer.seek(0)
-        pose = Pose.read(data_buffer.read())
+        def download():
+            bucket = storage.bucket()
+            # Assuming each word corresponds to a .pose file
+            blob = bucket.blob(f"{blob_name}.pose")
+
+            # Names come from the lexicon index, so skip the exists() round-trip and handle a stale index here
+            try:
+                return blob.download_as_bytes()
+            except NotFound:
+                print(f"Blob {blob_name} does not exist.")
+                lexicon_index.remove(blob_name)
+                return None
+
+        pose = pose_cache.get_pose(blob_name, lexicon_index.generation(blob_name), download)
         
         file_end_time = time.time()
         
@@ -81,21 +115,112 @@ def process_pose_file(blob_name):
         print(f"Error processing {blob_name} (took {file_end_time - file_start_time:.2f}s): {e}")
         return None
 
+# Reduced and normalized pose, ready for concatenate_poses(..., preprocessed=True)
+def process_preprocessed_pose_file(blob_name):
+    try:
+        return preprocessed_store.get_preprocessed_pose(
+            blob_name, lexicon_index.generation(blob_name), lambda: process_pose_file(blob_name))
+    except Exception as e:
+        print(f"Error preprocessing {blob_name}: {e}")
+        return None
+
+def _timed_process_pose_file(blob_name):
+    file_start_time = time.time()
+    pose = process_preprocessed_pose_file(blob_name)
+    return pose, time.time() - file_start_time
+
+def fetch_pose_files(blob_names, max_workers=POSE_FETCH_WORKERS, prefetched=None):
+    """Download and preprocess pose files concurrently.
+
+    Args:
+        blob_names (list): Pose names (without .pose), in sentence order.
+        max_workers (int): Upper bound on concurrent downloads.
+        prefetched (dict, optional): Futures of fetches already started (see PosePrefetcher),
+            by pose name. Those are waited on instead of being fetched again.
+
+    Returns:
+        list: (blob_name, pose or None, seconds taken) tuples, in the same order as blob_names.
+    """
+    if not blob_names:
+        return []
+
+    # Repeated words (e.g. fingerspelled letters) only need to be fetched once
+    unique_names = list(dict.fromkeys(blob_names))
+    prefetched = prefetched or {}
+    missing = [name for name in unique_names if name not in prefetched]
+
+    workers = max(1, min(max_workers, len(missing)))
+
+    fetched = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(_timed_process_pose_file, missing)
+        # Prefetched poses are collected while the rest download
+        for name in unique_names:
+            if name in prefetched:
+                fetched[name] = prefetched[name].result()
+        fetched.update(zip(missing, results))
+
+    results = []
+    for blob_name in blob_names:
+        pose, latency = fetched[blob_name]
+        results.append((blob_name, pose, latency))
+    return results
+
+class PosePrefetcher:
+    """Starts fetching the poses of glosses as they arrive, before the whole sentence is known.
+
+    Pass `add_word` as the `on_gloss` callback of GrammarParser.parse_text_to_auslan_grammar,
+    then the prefetcher to process_sentence, which waits on the fetches already started.
+    """
+
+    def __init__(self, max_workers=POSE_FETCH_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="pose-prefetch")
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def add_word(self, word):
+        """Resolve a gloss to its pose names and start fetching any that aren't already."""
+        blob_names = get_valid_blobs_from_sentence([word]) or []
+        with self._lock:
+            # A late gloss (e.g. from a timed out model call) arrives after the request is done
+            if self._closed:
+                return
+            for blob_name in blob_names:
+                if blob_name not in self._futures:
+                    self._futures[blob_name] = self._executor.submit(_timed_process_pose_file, blob_name)
+
+    def futures(self):
+        """Fetches started so far, by pose name."""
+        with self._lock:
+            return dict(self._futures)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=False)
+
 # Concatenate poses and upload the video back to Firebase
-def concatenate_poses_and_upload(blob_names:list, sentence:list):
+def concatenate_poses_and_upload(blob_names:list, sentence:list, metadata=None, timings=None, prefetched=None):
     start_time = time.time()
     # print(f"(pose_video_creator) Starting pose processing for {len(blob_names)} files...")
     
     all_poses = []
     valid_filenames = []
 
-    # Process pose files sequentially
+    # Process pose files concurrently, keeping sentence order
     pose_start_time = time.time()
-    print(f"(pose_video_creator) Processing pose files sequentially...")
-    
-    for blob_name in blob_names:
-        pose = process_pose_file(blob_name)
+    print(f"(pose_video_creator) Processing pose files concurrently (up to {POSE_FETCH_WORKERS} at a time)...")
+
+    seen = set()
+    for blob_name, pose, latency in fetch_pose_files(blob_names, prefetched=prefetched):
+        if blob_name not in seen:
+            seen.add(blob_name)
+            print(f"(pose_video_creator) Fetched '{blob_name}' in {latency:.2f} seconds")
         if pose:
+            # concatenate_poses modifies poses in place, so repeated words each need their own copy
+            if any(p is pose for p in all_poses):
+                pose = copy.deepcopy(pose)
             all_poses.append(pose)
             valid_filenames.append(os.path.splitext(
                 os.path.basename(blob_name))[0])
@@ -108,7 +233,7 @@ def concatenate_poses_and_upload(blob_names:list, sentence:list):
         # Concatenation phase
         concat_start_time = time.time()
         concatenated_pose, frame_ranges = concatenate_poses(
-            all_poses, valid_filenames)
+            all_poses, valid_filenames, preprocessed=True)
         visualizer = PoseVisualizer(concatenated_pose)
         concat_end_time = time.time()
         print(f"(pose_video_creator) Pose concatenation completed in {concat_end_time - concat_start_time:.2f} seconds")
@@ -117,24 +242,29 @@ def concatenate_poses_and_upload(blob_names:list, sentence:list):
         height = visualizer.pose.header.dimensions.height
         fps    = visualizer.pose_fps
 
-        # Video generation phase
+        # Video generation phase: frames are drawn ahead in a worker pool, at the output size, and fed to ffmpeg in order
         video_start_time = time.time()
-        print("(pose_video_creator) Starting video generation...")
-        def frames_from_pose(visualizer: PoseVisualizer, frame_ranges):
-            for frame in visualizer.draw_frame_with_filename(frame_ranges):
-                yield frame  # raw BGR
-
-        # Upload phase
-        upload_start_time = time.time()
-        print("(pose_video_creator) Starting Firebase upload...")
-        url = mp4_to_firebase(frames_from_pose(visualizer, frame_ranges), width, height, fps,  f"output_videos/{sentence}.mp4")
-        upload_end_time = time.time()
-        
+        output_size = output_dimensions(width, height, RENDER_PARAMS["resize_factor"])
+        print(f"(pose_video_creator) Starting video generation ({RENDER_PARAMS['pipeline']} pipeline)...")
+        upload = mp4_to_firebase_streaming if RENDER_PARAMS["pipeline"] == "streaming" else mp4_to_firebase
+        stage_timings = {}
+        with ThreadPoolExecutor(max_workers=RENDER_DRAW_WORKERS) as draw_executor:
+            frames = visualizer.draw_frame_with_filename(frame_ranges, executor=draw_executor,
+                                                         prefetch=RENDER_FRAME_QUEUE, output_size=output_size)
+            url = upload(frames, width, height, fps, f"output_videos/{sentence}.mp4",
+                         resize_factor=RENDER_PARAMS["resize_factor"], metadata=metadata, timings=stage_timings)
         video_end_time = time.time()
-        print(f"(pose_video_creator) Video generation completed in {video_end_time - video_start_time:.2f} seconds")
-        print(f"(pose_video_creator) Firebase upload completed in {upload_end_time - upload_start_time:.2f} seconds")
+
+        print(f"(pose_video_creator) Video generation and upload completed in {video_end_time - video_start_time:.2f} seconds")
+        print("(pose_video_creator) Render stages: " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in stage_timings.items()))
         print(f"Video uploaded to Firebase at 'output_videos/{sentence}.mp4' and accessible at: {url}")
 
+        if timings is not None:
+            timings["fetch"] = pose_end_time - pose_start_time
+            timings["concatenate"] = concat_end_time - concat_start_time
+            timings.update(stage_timings)
+            timings["render"] = video_end_time - video_start_time
+
         total_time = time.time() - start_time
         # print(f"(pose_video_creator) Total processing time: {total_time:.2f} seconds")
 
@@ -143,21 +273,33 @@ def concatenate_poses_and_upload(blob_names:list, sentence:list):
         print("Not enough .pose files to concatenate")
         return None
 
-def mp4_to_firebase(frame_iter, width, height, fps, gcs_path,
-                           resize_factor=0.5, target_fps=None):
+def output_dimensions(width, height, resize_factor=0.5):
     """
-    Faster: write a seekable MP4 to a temp file using CPU encoder,
-    then upload to Firebase Storage. Returns public URL. Filenames unchanged.
+    Size of the encoded video for a pose canvas of width x height.
 
-    - Uses libx264 CPU encoder with speed-first settings.
+    Args:
+        width (int): Pose canvas width.
+        height (int): Pose canvas height.
+        resize_factor (float): Scale applied to the canvas.
+
+    Returns:
+        tuple: (width, height), rounded up to even numbers for yuv420p.
     """
-    # Base dimensions (even for yuv420p)
     w0, h0 = int(width), int(height)
     if resize_factor != 1.0:
         w0 = max(2, int(round(w0 * resize_factor)))
         h0 = max(2, int(round(h0 * resize_factor)))
-    w = w0 + (w0 % 2)
-    h = h0 + (h0 % 2)
+    return w0 + (w0 % 2), h0 + (h0 % 2)
+
+def _ffmpeg_encode_command(width, height, fps, output, resize_factor=0.5, target_fps=None, fragmented=False):
+    """
+    Build the ffmpeg command that encodes raw BGR frames from stdin into an MP4.
+    Returns the command and the frame width and height ffmpeg expects.
+
+    - Uses libx264 CPU encoder with speed-first settings.
+    """
+    # Base dimensions (even for yuv420p)
+    w, h = output_dimensions(width, height, resize_factor)
     src_fps = float(fps)
     out_fps = float(target_fps or src_fps)
 
@@ -168,58 +310,203 @@ def mp4_to_firebase(frame_iter, width, height, fps, gcs_path,
 
     # libx264 (CPU) - speed first
     enc_args = [
-        "-c:v", "libx264",
-        "-preset", "ultrafast",
+        "-c:v", RENDER_PARAMS["encoder"],
+        "-preset", RENDER_PARAMS["preset"],
         "-tune", "zerolatency",
-        "-crf", "32",                 # raise to 34–36 for smaller/faster previews
+        "-crf", str(RENDER_PARAMS["crf"]),  # raise to 34–36 for smaller/faster previews
         "-x264-params", "keyint=2*{k}:min-keyint={k}:scenecut=0:rc-lookahead=0:bframes=0".format(k=int(out_fps)),
         "-pix_fmt", "yuv420p"
     ]
 
-    # Temp file for MP4
-    tmp_fd, tmp_path = tempfile.mkstemp(suffix=".mp4")
-    os.close(tmp_fd)
+    if fragmented:
+        # Fragmented MP4 can be written to a pipe, since the moov atom doesn't need the finished file
+        mux_args = ["-f", "mp4", "-movflags", "frag_keyframe+empty_moov+default_base_moof"]
+    else:
+        mux_args = ["-movflags", "+faststart"]
 
     # Input & output chain
     # - If you want to decimate FPS, we’ll push frames at src_fps but tell ffmpeg to output constant out_fps.
-    # - Resize is done on the CPU before feeding (keeps ffmpeg simpler and avoids extra filters).
+    # - Frames should already be drawn at w x h; anything else is resized on the CPU before feeding.
     cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y", "-f", "rawvideo", "-vcodec", "rawvideo", "-pix_fmt", "bgr24", 
-           "-s", f"{w}x{h}", "-r", f"{out_fps}", "-i", "-", "-an", *enc_args, "-movflags", "+faststart", tmp_path]
+           "-s", f"{w}x{h}", "-r", f"{out_fps}", "-i", "-", "-an", *enc_args, *mux_args, output]
+    return cmd, w, h
 
+def _kill_ffmpeg(proc):
+    # Stop ffmpeg after a failed render, which also ends its output for whoever is reading it
+    if proc.poll() is None:
+        proc.kill()
     try:
-        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=10_000_000)
+        proc.stdin.close()
+    except OSError:
+        pass
+    proc.wait()
 
-        # Feed frames
+def _close_ffmpeg_output(proc):
+    for pipe in (proc.stdout, proc.stderr):
         try:
-            frame_idx = 0
-            for frame in frame_iter:
-                if frame.shape[1] != w or frame.shape[0] != h:
-                    frame = cv2.resize(frame, (w, h), interpolation=cv2.INTER_AREA)
-                proc.stdin.write(frame.astype(np.uint8).tobytes())
-            proc.stdin.close()
-        except BrokenPipeError:
+            pipe.close()
+        except OSError:
             pass
 
+def _feed_ffmpeg(proc, frame_iter, w, h, timings):
+    # Write frames to ffmpeg in order, timing how long we wait for frames vs. for ffmpeg
+    draw_time = 0.0
+    write_time = 0.0
+    frame_iter = iter(frame_iter)
+    try:
+        while True:
+            draw_start = time.time()
+            frame = next(frame_iter, None)
+            draw_time += time.time() - draw_start
+            if frame is None:
+                break
+
+            write_start = time.time()
+            if frame.shape[1] != w or frame.shape[0] != h:
+                frame = cv2.resize(frame, (w, h), interpolation=cv2.INTER_AREA)
+            proc.stdin.write(frame.astype(np.uint8).tobytes())
+            write_time += time.time() - write_start
+        proc.stdin.close()
+    except BrokenPipeError:
+        pass
+    except BaseException:
+        # e.g. drawing a frame failed: don't leave ffmpeg waiting for more input
+        _kill_ffmpeg(proc)
+        raise
+
+    if timings is not None:
+        timings["draw_wait"] = draw_time
+        timings["encode_write"] = write_time
+
+def mp4_to_firebase(frame_iter, width, height, fps, gcs_path,
+                           resize_factor=0.5, target_fps=None, metadata=None, timings=None):
+    """
+    Faster: write a seekable MP4 to a temp file using CPU encoder,
+    then upload to Firebase Storage. Returns public URL. Filenames unchanged.
+
+    If a `timings` dict is given, it is filled with per-stage durations in seconds.
+    """
+    # Temp file for MP4
+    tmp_fd, tmp_path = tempfile.mkstemp(suffix=".mp4")
+    os.close(tmp_fd)
+
+    cmd, w, h = _ffmpeg_encode_command(width, height, fps, tmp_path, resize_factor, target_fps)
+
+    proc = None
+    try:
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=10_000_000)
+
+        # Feed frames
+        _feed_ffmpeg(proc, frame_iter, w, h, timings)
+
+        encode_start = time.time()
         ret = proc.wait()
         if ret != 0:
             stderr_data = proc.stderr.read().decode("utf-8", errors="ignore")
             raise RuntimeError(f"ffmpeg failed (code {ret}). stderr:\n{stderr_data}")
 
         # Upload seekable MP4
+        upload_start = time.time()
         bucket = storage.bucket()
         blob = bucket.blob(gcs_path)
         blob.cache_control = "public, max-age=31536000"
+        if metadata:
+            blob.metadata = metadata
         blob.upload_from_filename(tmp_path, content_type="video/mp4")
         blob.make_public()
+
+        if timings is not None:
+            timings["encode_finish"] = upload_start - encode_start
+            timings["upload"] = time.time() - upload_start
         return blob.public_url
 
     finally:
+        if proc is not None:
+            _close_ffmpeg_output(proc)
         try:
             if os.path.exists(tmp_path):
                 os.remove(tmp_path)
         except Exception:
             pass
 
+def mp4_to_firebase_streaming(frame_iter, width, height, fps, gcs_path,
+                              resize_factor=0.5, target_fps=None, metadata=None, timings=None):
+    """
+    Pipelined: encode a fragmented MP4 to ffmpeg's stdout and send it to Firebase Storage
+    through a chunked resumable upload while frames are still being encoded. Returns public URL.
+
+    If a `timings` dict is given, it is filled with per-stage durations in seconds.
+    """
+    cmd, w, h = _ffmpeg_encode_command(width, height, fps, "pipe:1", resize_factor, target_fps, fragmented=True)
+
+    bucket = storage.bucket()
+    blob = bucket.blob(gcs_path)
+    blob.cache_control = "public, max-age=31536000"
+    if metadata:
+        blob.metadata = metadata
+
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=10_000_000)
+
+    stderr_chunks = []
+    upload_state = {"writer": None, "busy": 0.0, "error": None}
+
+    def drain_stderr():
+        stderr_chunks.append(proc.stderr.read())
+
+    def upload():
+        try:
+            # Not used as a context manager: closing the writer would finalize a half-written video on errors
+            writer = blob.open("wb", chunk_size=RENDER_UPLOAD_CHUNK, content_type="video/mp4")
+            upload_state["writer"] = writer
+            while True:
+                chunk = proc.stdout.read(RENDER_UPLOAD_CHUNK)
+                if not chunk:
+                    break
+                write_start = time.time()
+                writer.write(chunk)
+                upload_state["busy"] += time.time() - write_start
+        except Exception as e:
+            upload_state["error"] = e
+            # Keep draining so ffmpeg doesn't block on a full pipe
+            proc.stdout.read()
+
+    stderr_thread = threading.Thread(target=drain_stderr, daemon=True)
+    upload_thread = threading.Thread(target=upload, daemon=True)
+    stderr_thread.start()
+    upload_thread.start()
+
+    try:
+        # Feed frames while the upload thread consumes ffmpeg's output
+        _feed_ffmpeg(proc, frame_iter, w, h, timings)
+
+        encode_start = time.time()
+        ret = proc.wait()
+    except BaseException:
+        _kill_ffmpeg(proc)
+        raise
+    finally:
+        # ffmpeg has exited either way, so both readers reach the end of its output
+        upload_wait_start = time.time()
+        upload_thread.join()
+        stderr_thread.join()
+        _close_ffmpeg_output(proc)
+
+    if ret != 0:
+        stderr_data = b"".join(stderr_chunks).decode("utf-8", errors="ignore")
+        raise RuntimeError(f"ffmpeg failed (code {ret}). stderr:\n{stderr_data}")
+    if upload_state["error"] is not None:
+        raise RuntimeError(f"Streaming upload failed: {upload_state['error']}")
+
+    # Sends the last chunk and finalizes the object
+    upload_state["writer"].close()
+    blob.make_public()
+
+    if timings is not None:
+        timings["encode_finish"] = upload_wait_start - encode_start
+        timings["upload_busy"] = upload_state["busy"]
+        timings["upload_tail"] = time.time() - upload_wait_start
+    return blob.public_url
+
 # Check if a word has a corresponding pose file in Firebase
 def get_valid_blobs_from_sentence(sentence):
     """Get valid blob names from the sentence.
@@ -238,11 +525,9 @@ def get_valid_blobs_from_sentence(sentence):
     start_time = time.time()
     valid_blob_names = []
 
-    bucket = storage.bucket()
-
     for word in sentence:
         # 1) Try to find a whole-word pose first
-        pose_name = find_word_pose_name(word, bucket)
+        pose_name = find_word_pose_name(word)
         if pose_name is not None:
             # Use the full word’s pose
             valid_blob_names.append(pose_name)
@@ -257,8 +542,7 @@ def get_valid_blobs_from_sentence(sentence):
                 continue
 
             letter = ch.upper()   # we assume 'A.pose', 'B.pose', etc.
-            letter_blob = bucket.blob(f"{letter}.pose")
-            if letter_blob.exists():
+            if letter in lexicon_index:
                 valid_blob_names.append(letter)
             else:
                 print(f"(pose_video_creator) Skipping letter '{letter}', no corresponding .pose file found.")
@@ -268,21 +552,81 @@ def get_valid_blobs_from_sentence(sentence):
     # print(f"(pose_video_creator) Valid blob names found: {valid_blob_names}")
     return valid_blob_names
 
-def process_sentence(sentence):
+def warm_preprocessed_store(blob_names=None, max_workers=POSE_FETCH_WORKERS):
+    """Preprocess lexicon entries ahead of time, so requests never pay for it.
+
+    Args:
+        blob_names (list, optional): Pose names to warm. Defaults to the whole lexicon.
+        max_workers (int): Upper bound on concurrent downloads.
+
+    Returns:
+        int: The number of poses now in the preprocessed store.
+    """
+    if blob_names is None:
+        blob_names = lexicon_index.names()
+
+    start_time = time.time()
+    print(f"(pose_video_creator) Warming preprocessed pose store with {len(blob_names)} poses...")
+
+    warmed = 0
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for i, pose in enumerate(executor.map(process_preprocessed_pose_file, blob_names)):
+            if pose is not None:
+                warmed += 1
+            if (i + 1) % 500 == 0:
+                print(f"(pose_video_creator) Warmed {i + 1}/{len(blob_names)} poses...")
+
+    print(f"(pose_video_creator) Warmed {warmed} out of {len(blob_names)} poses in {time.time() - start_time:.2f} seconds")
+    return warmed
+
+def process_sentence(sentence, prefetcher=None, metrics=None):
+    """Render the sign video for a list of glosses, or reuse an earlier render of it.
+
+    Args:
+        sentence (list): Glosses, in signing order.
+        prefetcher (PosePrefetcher, optional): Pose fetches already started for these glosses.
+        metrics (dict, optional): Filled with the duration of each stage in seconds (resolve,
+            then fetch, concatenate, render and its sub-stages if the video is rendered, and total)
+            and whether the video came from the render cache (video_cached).
+
+    Returns:
+        str: Public URL of the video, or None if no gloss has a pose.
+    """
     overall_start_time = time.time()
+    if metrics is None:
+        metrics = {}
     # print(f"(pose_video_creator) Starting sentence processing: '{sentence}'")
     
     # Get valid blob names (i.e., words that have a corresponding .pose file)
     valid_blob_names = get_valid_blobs_from_sentence(sentence)
+    metrics["resolve"] = time.time() - overall_start_time
+    metrics["video_cached"] = False
 
     if len(valid_blob_names) == 0:
         print("(pose_video_creator) No valid words found with corresponding .pose files.")
         return None
 
+    # Reuse an earlier render of the same gloss sequence if there is one
+    gcs_path = f"output_videos/{sentence}.mp4"
+    # Pose versions are part of the key, so re-uploaded poses get a fresh render
+    render_key = render_cache_key(
+        [(name, *lexicon_index.version(name)) for name in valid_blob_names], RENDER_PARAMS)
+    cached_url = video_cache.lookup(render_key, gcs_path)
+    if cached_url:
+        metrics["video_cached"] = True
+        metrics["total"] = time.time() - overall_start_time
+        print(f"(pose_video_creator) Reusing cached render at '{gcs_path}' "
+              f"(found in {metrics['total']:.2f} seconds)")
+        return cached_url
+
     # Get the Firebase URL directly
-    firebase_url = concatenate_poses_and_upload(valid_blob_names, sentence)
+    firebase_url = concatenate_poses_and_upload(valid_blob_names, sentence,
+                                                metadata={RENDER_KEY_METADATA: render_key}, timings=metrics,
+                                                prefetched=prefetcher.futures() if prefetcher else None)
+    metrics["total"] = time.time() - overall_start_time
 
     if firebase_url:
+        video_cache.put(render_key, gcs_path, firebase_url)
         overall_end_time = time.time()
         print(f"(pose_video_creator) Complete pipeline finished in {overall_end_time - overall_start_time:.2f} seconds")
         return firebase_url
@@ -291,6 +635,14 @@ def process_sentence(sentence):
         return None
    
 if __name__ == "__main__":
-    # Example usage: replace with actual API response
-    api_response_sentence = "I do himself make first new greatest little hers last day their"
-    process_sentence(api_response_sentence)
+    args_parser = argparse.ArgumentParser()
+    args_parser.add_argument("--warm", action="store_true",
+                             help="Preprocess the whole lexicon into the preprocessed pose store and exit")
+    args = args_parser.parse_args()
+
+    if args.warm:
+        warm_preprocessed_store()
+    else:
+        # Example usage: replace with actual API response
+        api_response_sentence = "I do himself make first new greatest little hers last day their"
+        process_sentence(api_response_sentence)
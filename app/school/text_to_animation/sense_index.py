@@ -0,0 +1,207 @@
+import os
+import json
+import hashlib
+import argparse
+import tempfile
+
+import numpy as np
+
+
+WSD_MODEL_DIR = os.path.join(os.path.dirname(__file__), "wsd_models", "model")
+AMBIGUOUS_DICT_PATH = os.path.join(os.path.dirname(__file__), "ambiguous_dict_lowercase.json")
+
+# Persisted index: normalized sense embeddings (.npy) plus a manifest describing them
+DEFAULT_INDEX_PATH = os.getenv("WSD_SENSE_INDEX",
+                               os.path.join(os.path.dirname(__file__), "wsd_models", "sense_index.npy"))
+
+# Bump when the layout of the persisted index changes
+INDEX_VERSION = 1
+
+# Files larger than this are fingerprinted by size and their first and last block instead of in full
+_FINGERPRINT_FULL_BYTES = 4 * 1024 * 1024
+_FINGERPRINT_BLOCK = 1024 * 1024
+
+
+def model_fingerprint(model_path):
+    """
+    Identify a SentenceTransformer model, so an index built with another model is not reused.
+    Local model directories are hashed; anything else (e.g. a hub model name) is used as is.
+    """
+    if not os.path.isdir(model_path):
+        return f"name:{model_path}"
+
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(model_path):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            size = os.path.getsize(path)
+            digest.update(f"{os.path.relpath(path, model_path)}\0{size}\0".encode("utf-8"))
+            with open(path, "rb") as f:
+                if size <= _FINGERPRINT_FULL_BYTES:
+                    digest.update(f.read())
+                else:
+                    digest.update(f.read(_FINGERPRINT_BLOCK))
+                    f.seek(-_FINGERPRINT_BLOCK, os.SEEK_END)
+                    digest.update(f.read(_FINGERPRINT_BLOCK))
+    return digest.hexdigest()
+
+
+def index_checksum(ambiguous_dict, model_id):
+    """Checksum of everything an index depends on: the senses, in order, and the model."""
+    payload = json.dumps({"version": INDEX_VERSION, "senses": ambiguous_dict, "model": model_id})
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def index_path_for(backend, index_path=DEFAULT_INDEX_PATH):
+    """Each inference backend gets its own index, since quantized models give slightly different embeddings."""
+    if backend == "torch":
+        return index_path
+    root, ext = os.path.splitext(index_path)
+    return f"{root}_{backend}{ext}"
+
+
+def _manifest_path(index_path):
+    return os.path.splitext(index_path)[0] + ".json"
+
+
+class SenseIndex:
+    """Unit-length embeddings of every sense in the ambiguous words dictionary.
+
+    Rows are stored word by word, in dictionary order, so the candidate senses
+    of a word are a contiguous slice of the matrix. Scoring a word is then a
+    dot product with the (normalized) sentence embedding, i.e. cosine similarity.
+    """
+
+    def __init__(self, ambiguous_dict, embeddings, checksum):
+        self.embeddings = embeddings
+        self.checksum = checksum
+
+        self._slices = {}
+        start = 0
+        for word, senses in ambiguous_dict.items():
+            self._slices[word] = (start, start + len(senses))
+            start += len(senses)
+
+        if start != len(embeddings):
+            raise ValueError(f"Sense index has {len(embeddings)} rows but the dictionary has {start} senses")
+
+    def __len__(self):
+        return len(self.embeddings)
+
+    def __contains__(self, word):
+        return word in self._slices
+
+    def embeddings_for(self, word):
+        """Embeddings of the senses of `word`, in the same order as the dictionary lists them."""
+        start, end = self._slices[word]
+        return self.embeddings[start:end]
+
+    def rows_for(self, words):
+        """
+        Row indices of the senses of all `words`, concatenated, and the offset where each word's rows start.
+        Lets the senses of several words be scored with a single matrix product.
+        """
+        rows = []
+        offsets = []
+        for word in words:
+            start, end = self._slices[word]
+            offsets.append(len(rows))
+            rows.extend(range(start, end))
+        return np.array(rows, dtype=np.int64), offsets
+
+    @classmethod
+    def build(cls, model, ambiguous_dict, checksum, batch_size=64):
+        """Encode every sense with `model` in one batched call."""
+        senses = [sense for word_senses in ambiguous_dict.values() for sense in word_senses]
+        embeddings = model.encode(senses, batch_size=batch_size, normalize_embeddings=True,
+                                  convert_to_numpy=True, show_progress_bar=False)
+        return cls(ambiguous_dict, np.asarray(embeddings, dtype=np.float32), checksum)
+
+    def save(self, index_path=DEFAULT_INDEX_PATH):
+        """Write the embeddings and manifest atomically. The manifest is written last."""
+        directory = os.path.dirname(index_path) or "."
+        os.makedirs(directory, exist_ok=True)
+
+        # Drop the old manifest first, so the new embeddings are never paired with it
+        try:
+            os.remove(_manifest_path(index_path))
+        except FileNotFoundError:
+            pass
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".npy.tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, self.embeddings)
+        os.replace(tmp_path, index_path)
+
+        manifest = {"version": INDEX_VERSION, "checksum": self.checksum,
+                    "rows": len(self.embeddings), "dimensions": int(self.embeddings.shape[1])}
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".json.tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, _manifest_path(index_path))
+
+    @classmethod
+    def load(cls, ambiguous_dict, checksum, index_path=DEFAULT_INDEX_PATH):
+        """
+        Memory-map a persisted index. Returns None if it is missing or was built
+        from a different dictionary or model.
+        """
+        try:
+            with open(_manifest_path(index_path), "r") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if manifest.get("checksum") != checksum:
+            print(f"(sense_index) Index at {index_path} is out of date, rebuilding")
+            return None
+
+        try:
+            embeddings = np.load(index_path, mmap_mode="r")
+            return cls(ambiguous_dict, embeddings, checksum)
+        except (OSError, ValueError) as e:
+            print(f"(sense_index) Could not load {index_path}: {e}")
+            return None
+
+    @classmethod
+    def load_or_build(cls, model, ambiguous_dict, model_id, index_path=DEFAULT_INDEX_PATH):
+        """Load the persisted index if it matches the dictionary and model, otherwise build and persist it."""
+        checksum = index_checksum(ambiguous_dict, model_id)
+        index = cls.load(ambiguous_dict, checksum, index_path)
+        if index is not None:
+            print(f"(sense_index) Loaded {len(index)} sense embeddings from {index_path}")
+            return index
+
+        index = cls.build(model, ambiguous_dict, checksum)
+        try:
+            index.save(index_path)
+            print(f"(sense_index) Built and saved {len(index)} sense embeddings to {index_path}")
+        except OSError as e:
+            # e.g. a read-only deployment: keep the index in memory for this process
+            print(f"(sense_index) Built {len(index)} sense embeddings, could not save to {index_path}: {e}")
+        return index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the WSD sense-embedding index.")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="rebuild even if the persisted index matches the dictionary and model")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="path of the .npy index")
+    parser.add_argument("--backend", default="torch", help="WSD inference backend the index is for")
+    args = parser.parse_args()
+
+    from app.school.text_to_animation.wsd_backend import load_model
+
+    with open(AMBIGUOUS_DICT_PATH, "r") as file:
+        senses_dict = json.load(file)
+    model_id = f"{model_fingerprint(WSD_MODEL_DIR)}:{args.backend}"
+    checksum = index_checksum(senses_dict, model_id)
+    index_path = index_path_for(args.backend, args.index)
+
+    if not args.rebuild and SenseIndex.load(senses_dict, checksum, index_path) is not None:
+        print(f"(sense_index) Index at {index_path} is up to date")
+    else:
+        index = SenseIndex.build(load_model(WSD_MODEL_DIR, args.backend), senses_dict, checksum)
+        index.save(index_path)
+        print(f"(sense_index) Wrote {len(index)} sense embeddings to {index_path}")
@@ -2,7 +2,7 @@ from typing import Union
 
 from app.school.text_to_animation.pose_format.pose import Pose
 
-from .concatenate import concatenate_poses
+from .concatenate import concatenate_poses, preprocess_pose
 from .lookup import PoseLookup, CSVPoseLookup
 from ..text_to_gloss.types import Gloss
 
@@ -11,6 +11,11 @@ def normalize_pose(pose: Pose) -> Pose:
     return pose.normalize(pose_normalization_info(pose.header))
 
 
+def preprocess_pose(pose: Pose) -> Pose:
+    # Reducing and normalizing only depend on the source file, so the result can be stored per lexicon entry
+    return normalize_pose(reduce_holistic(pose))
+
+
 def trim_pose(pose, start=True, end=True):
     if len(pose.body.data) == 0:
         return pose
@@ -53,12 +58,11 @@ def trim_pose(pose, start=True, end=True):
 
 #     return pose
 
-def concatenate_poses(poses: List[Pose], filenames: List[str]) -> tuple[Pose, List[tuple[int, int, str]]]:
-    # print('Reducing poses...')
-    poses = [reduce_holistic(p) for p in poses]
-
-    #print('Normalizing poses...')
-    poses = [normalize_pose(p) for p in poses]
+def concatenate_poses(poses: List[Pose], filenames: List[str],
+                      preprocessed: bool = False) -> tuple[Pose, List[tuple[int, int, str]]]:
+    if not preprocessed:
+        # print('Reducing and normalizing poses...')
+        poses = [preprocess_pose(p) for p in poses]
 
     # print('Trimming poses...')
     poses = [trim_pose(p, i > 0, i < len(poses) - 1) for i, p in enumerate(poses)]
@@ -0,0 +1,248 @@
+# Rule-based English to Auslan gloss, following the grammar rules the app gives the LLM:
+# - Time-Topic-Comment order: time words first, then a fronted topic, then the comment
+# - function words Auslan drops (articles, be, do-support, will, "to"/"at") are removed
+# - negation becomes a clause-final "not"
+# - completed actions get "finish" after the verb
+# - wh-words go to the end of questions
+#
+# Only part-of-speech tags and lemmas are used, so a pipeline without the parser works too.
+import re
+from typing import Dict, List, Tuple
+
+from .common import load_spacy_model
+from .types import Gloss
+
+LANGUAGE_MODELS_AUSLAN = {
+    "en": "en_core_web_sm",
+}
+
+TIME_ADVERBS = {"yesterday", "today", "tomorrow", "tonight", "now", "later", "soon", "recently"}
+TIME_NOUNS = {"morning", "afternoon", "evening", "night", "day", "week", "weekend", "month", "year",
+              "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"}
+# Words that make a following time noun a time phrase: "last week", "tomorrow morning", "on monday".
+# Modifiers move to the front with the time word, the prepositions are dropped.
+TIME_MODIFIERS = {"last", "next", "this", "every", "yesterday", "tomorrow"}
+TIME_PREPOSITIONS = {"in", "on", "at", "during"}
+
+ARTICLES = {"a", "an", "the"}
+DROPPED_MODALS = {"will", "shall", "would"}
+DROPPED_PREPOSITIONS = {"to", "at"}
+COMPLETION_ADVERBS = {"already", "just", "earlier"}
+WH_TAGS = {"WDT", "WP", "WP$", "WRB"}
+CLAUSE_BREAK_TAGS = {",", ".", ":"}
+
+# Parts of speech allowed in a post-verbal noun phrase that can be moved to the front as the topic
+TOPIC_POS = {"DET", "ADJ", "NOUN", "PROPN", "NUM"}
+
+
+def _lemma(token) -> str:
+    # Words added by the rules have no token
+    return token.lemma_.lower() if token is not None else ""
+
+
+def _gloss_word(token) -> str:
+    # Pronouns and names keep their surface form, everything else is reduced to its base form
+    if token.pos_ in ("PRON", "PROPN", "NUM"):
+        word = token.text.lower()
+    else:
+        word = _lemma(token)
+    return re.sub(r"[^a-z0-9]", "", word)
+
+
+def _split_clauses(tokens) -> List[list]:
+    clauses = [[]]
+    for token in tokens:
+        if token.is_punct and (token.tag_ in CLAUSE_BREAK_TAGS or token.text in ("?", "!", ";")):
+            if clauses[-1]:
+                clauses.append([])
+        else:
+            clauses[-1].append(token)
+    return [clause for clause in clauses if clause]
+
+
+def _is_negation(token) -> bool:
+    return _lemma(token) == "not" or token.text.lower() in ("not", "n't")
+
+
+def _is_time_word(tokens, i) -> bool:
+    token = tokens[i]
+    lemma = _lemma(token)
+    if lemma in TIME_ADVERBS and token.pos_ in ("ADV", "NOUN"):
+        return True
+    if lemma in TIME_NOUNS and token.pos_ in ("NOUN", "PROPN"):
+        j = i - 1
+        while j >= 0 and _lemma(tokens[j]) in ARTICLES:
+            j -= 1
+        return token.pos_ == "PROPN" or (j >= 0 and _lemma(tokens[j]) in TIME_MODIFIERS | TIME_PREPOSITIONS)
+    return False
+
+
+def _next_content(tokens, i):
+    """Index of the first token after `i` that isn't an adverb or negation, or None."""
+    for j in range(i + 1, len(tokens)):
+        if tokens[j].pos_ == "ADV" or _is_negation(tokens[j]):
+            continue
+        return j
+    return None
+
+
+class _Clause:
+    """Glosses of one clause, split into the parts that are reordered."""
+
+    def __init__(self):
+        self.time = []     # (text, gloss) pairs moved to the front of the sentence
+        self.words = []    # (text, gloss, token) triples of the comment, in order
+        self.wh = []
+        self.negated = False
+        self.completed = False
+
+    def glosses(self, front_topic: bool) -> List[Tuple[str, str]]:
+        words = self.words
+        if front_topic:
+            words = _front_topic(words)
+
+        glosses = [(text, gloss) for text, gloss, _ in words]
+        if self.completed:
+            # "finish" follows the last verb of the clause, or ends it if there is none
+            verbs = [i for i, (_, _, token) in enumerate(words) if token is not None and token.pos_ == "VERB"]
+            position = verbs[-1] + 1 if verbs else len(glosses)
+            glosses.insert(position, ("", "finish"))
+        if self.negated:
+            glosses.append(("", "not"))
+        return glosses + self.wh
+
+
+def _front_topic(words):
+    """
+    Move a noun phrase that follows the main verb to the front ("go shop" -> "shop ... go").
+    Only done when everything after the verb is that noun phrase, and not for possessive "have".
+    """
+    verbs = [i for i, (_, _, token) in enumerate(words) if token is not None and token.pos_ == "VERB"]
+    if not verbs or verbs[0] == 0:
+        return words
+
+    verb = verbs[0]
+    if _lemma(words[verb][2]) == "have":
+        return words
+
+    topic = words[verb + 1:]
+    if not topic or any(token is None or (token.pos_ not in TOPIC_POS and token.tag_ != "PRP$")
+                        for _, _, token in topic):
+        return words
+    if topic[-1][2].pos_ not in ("NOUN", "PROPN"):
+        return words
+    return topic + words[:verb + 1]
+
+
+def _gloss_clause(tokens, is_question: bool) -> _Clause:
+    clause = _Clause()
+    skip = set()
+
+    for i, token in enumerate(tokens):
+        if i in skip:
+            continue
+        lemma = _lemma(token)
+        nxt = _next_content(tokens, i)
+        next_token = tokens[nxt] if nxt is not None else None
+
+        if _is_negation(token):
+            clause.negated = True
+        elif _is_time_word(tokens, i):
+            clause.time.append((token.text, _gloss_word(token)))
+            # "last week", "in the morning": the modifier goes with it, the preposition is dropped
+            while clause.words and _lemma(clause.words[-1][2]) in TIME_MODIFIERS | TIME_PREPOSITIONS:
+                text, gloss, modifier = clause.words.pop()
+                if _lemma(modifier) in TIME_MODIFIERS:
+                    clause.time.insert(len(clause.time) - 1, (text, gloss))
+        elif is_question and token.tag_ in WH_TAGS:
+            clause.wh.append((token.text, _gloss_word(token)))
+        elif lemma == "have" and next_token is not None and next_token.tag_ == "TO":
+            # obligation: "have to go" -> "must go"
+            clause.words.append((token.text, "must", None))
+            skip.add(nxt)
+        elif lemma == "have" and next_token is not None and next_token.tag_ == "VBN":
+            # perfect aspect: "has eaten" -> "eat finish"
+            clause.completed = True
+        elif lemma == "go" and token.tag_ == "VBG" and next_token is not None and next_token.tag_ == "TO" \
+                and nxt + 1 < len(tokens) and tokens[nxt + 1].tag_ == "VB":
+            # "going to" as future marker: "going to eat" -> "eat"
+            skip.add(nxt)
+        elif lemma in COMPLETION_ADVERBS and token.pos_ == "ADV":
+            clause.completed = True
+        elif lemma == "be" or (lemma == "do" and token.pos_ == "AUX") or lemma in DROPPED_MODALS:
+            continue
+        elif (token.pos_ == "DET" and lemma in ARTICLES) or token.tag_ in ("TO", "POS"):
+            continue
+        elif token.pos_ == "ADP" and lemma in DROPPED_PREPOSITIONS:
+            continue
+        else:
+            gloss = _gloss_word(token)
+            if gloss:
+                clause.words.append((token.text, gloss, token))
+
+    return clause
+
+
+def auslan_glosses(doc) -> List[Tuple[str, str]]:
+    """
+    Gloss a processed English sentence in Auslan word order.
+
+    Returns a list of (text, gloss) pairs. Words the rules add ("finish", "not", "must")
+    have an empty or different text.
+    """
+    tokens = list(doc)
+    is_question = any(token.text == "?" for token in tokens) or (bool(tokens) and tokens[0].tag_ in WH_TAGS)
+
+    time_glosses = []
+    topics = []
+    comments = []
+    clauses = _split_clauses(tokens)
+    for n, clause_tokens in enumerate(clauses):
+        # "after lunch, ..." -> "lunch finish ..."
+        if _lemma(clause_tokens[0]) == "after" and clause_tokens[0].pos_ in ("ADP", "SCONJ"):
+            rest = clause_tokens[1:]
+            if n + 1 < len(clauses):
+                # "after lunch, we walk": the whole clause is the topic
+                topic_tokens, clause_tokens = rest, []
+            else:
+                # "after lunch we walk": the topic is the noun phrase right after "after"
+                end = 0
+                while end < len(rest) and rest[end].pos_ in TOPIC_POS:
+                    end += 1
+                topic_tokens, clause_tokens = rest[:end], rest[end:]
+
+            if topic_tokens:
+                topic = _gloss_clause(topic_tokens, is_question)
+                topic.completed = True
+                time_glosses.extend(topic.time)
+                topics.extend(topic.glosses(front_topic=False))
+            if not clause_tokens:
+                continue
+
+        clause = _gloss_clause(clause_tokens, is_question)
+        time_glosses.extend(clause.time)
+        comments.append(clause)
+
+    glosses = time_glosses + topics
+    for clause in comments:
+        front_topic = not topics and not clause.wh and len(comments) == 1
+        glosses.extend(clause.glosses(front_topic))
+    return glosses
+
+
+def text_to_gloss_given_spacy_model(text: str, spacy_model) -> Dict[str, object]:
+    glosses = auslan_glosses(spacy_model(text))
+    return {
+        "glosses": [gloss for _, gloss in glosses],
+        "tokens": [text for text, _ in glosses],
+        "gloss_string": " ".join(gloss for _, gloss in glosses),
+    }
+
+
+def text_to_gloss(text: str, language: str = "en") -> List[Gloss]:
+    if language not in LANGUAGE_MODELS_AUSLAN:
+        raise NotImplementedError("Don't know language '%s'." % language)
+
+    spacy_model = load_spacy_model(LANGUAGE_MODELS_AUSLAN[language], disable=("parser", "ner"))
+    glosses = auslan_glosses(spacy_model(text))
+    return [[(text or None, gloss) for text, gloss in glosses]]
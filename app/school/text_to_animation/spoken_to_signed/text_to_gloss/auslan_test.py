@@ -0,0 +1,119 @@
+from unittest import TestCase
+
+from app.school.text_to_animation.spoken_to_signed.text_to_gloss.auslan import (auslan_glosses,
+                                                                                 text_to_gloss_given_spacy_model)
+
+
+class Token:
+    """Stand-in for a spaCy token, from "text/lemma/POS/TAG" as en_core_web_sm would tag it."""
+
+    def __init__(self, spec):
+        self.text, self.lemma_, self.pos_, self.tag_ = spec.split("/")
+        self.is_punct = self.pos_ == "PUNCT"
+
+
+def doc(tagged):
+    return [Token(spec) for spec in tagged.split()]
+
+
+def gloss_string(tagged):
+    return " ".join(gloss for _, gloss in auslan_glosses(doc(tagged)))
+
+
+class TestAuslanGlosses(TestCase):
+    """
+    Unit tests for the rule-based Auslan glosser.
+    """
+
+    def test_drops_function_words_and_fronts_topic(self):
+        """
+        Test if articles, "be" and "to" are dropped and the object is moved to the front.
+        """
+        self.assertEqual(gloss_string(
+            "I/I/PRON/PRP am/be/AUX/VBP going/go/VERB/VBG to/to/ADP/IN the/the/DET/DT shop/shop/NOUN/NN ././PUNCT/."),
+            "shop i go")
+        self.assertEqual(gloss_string(
+            "Do/do/AUX/VBP you/you/PRON/PRP want/want/VERB/VB coffee/coffee/NOUN/NN ?/?/PUNCT/."),
+            "coffee you want")
+
+    def test_time_words_come_first(self):
+        """
+        Test if time words, with their modifiers, are moved to the start.
+        """
+        self.assertEqual(gloss_string(
+            "She/she/PRON/PRP is/be/AUX/VBZ studying/study/VERB/VBG at/at/ADP/IN university/university/NOUN/NN "
+            "today/today/NOUN/NN ././PUNCT/."),
+            "today university she study")
+        self.assertEqual(gloss_string(
+            "I/I/PRON/PRP am/be/AUX/VBP going/go/VERB/VBG to/to/PART/TO eat/eat/VERB/VB pizza/pizza/NOUN/NN "
+            "next/next/ADJ/JJ week/week/NOUN/NN ././PUNCT/."),
+            "next week pizza i eat")
+        self.assertEqual(gloss_string(
+            "I/I/PRON/PRP work/work/VERB/VBP in/in/ADP/IN the/the/DET/DT morning/morning/NOUN/NN"),
+            "morning i work")
+
+    def test_negation_goes_to_the_end(self):
+        """
+        Test if "not" is moved to the end of the clause.
+        """
+        self.assertEqual(gloss_string(
+            "He/he/PRON/PRP did/do/AUX/VBD n't/not/PART/RB go/go/VERB/VB home/home/ADV/RB "
+            "yesterday/yesterday/NOUN/NN ././PUNCT/."),
+            "yesterday he go home not")
+
+    def test_wh_word_goes_to_the_end(self):
+        """
+        Test if the wh-word of a question is moved to the end.
+        """
+        self.assertEqual(gloss_string(
+            "Where/where/SCONJ/WRB are/be/AUX/VBP you/you/PRON/PRP meeting/meet/VERB/VBG them/they/PRON/PRP "
+            "?/?/PUNCT/."),
+            "you meet them where")
+
+    def test_completed_actions_get_finish(self):
+        """
+        Test if the perfect and "already" become "finish" after the verb.
+        """
+        self.assertEqual(gloss_string("He/he/PRON/PRP has/have/AUX/VBZ eaten/eat/VERB/VBN ././PUNCT/."),
+                         "he eat finish")
+        self.assertEqual(gloss_string("We/we/PRON/PRP already/already/ADV/RB ate/eat/VERB/VBD ././PUNCT/."),
+                         "we eat finish")
+
+    def test_have_to_and_possessive_have(self):
+        """
+        Test if "have to" becomes "must" and possessive "have" is kept.
+        """
+        self.assertEqual(gloss_string(
+            "He/he/PRON/PRP has/have/VERB/VBZ to/to/PART/TO go/go/VERB/VB ././PUNCT/."),
+            "he must go")
+        self.assertEqual(gloss_string(
+            "She/she/PRON/PRP has/have/VERB/VBZ a/a/DET/DT car/car/NOUN/NN ././PUNCT/."),
+            "she have car")
+
+    def test_after_clause_becomes_finished_topic(self):
+        """
+        Test if "after X" becomes "X finish" at the front, with or without a comma.
+        """
+        self.assertEqual(gloss_string(
+            "After/after/ADP/IN lunch/lunch/NOUN/NN ,/,/PUNCT/, we/we/PRON/PRP will/will/AUX/MD walk/walk/VERB/VB "
+            "to/to/ADP/IN the/the/DET/DT park/park/NOUN/NN ././PUNCT/."),
+            "lunch finish we walk park")
+        self.assertEqual(gloss_string(
+            "After/after/ADP/IN lunch/lunch/NOUN/NN we/we/PRON/PRP walk/walk/VERB/VBP ././PUNCT/."),
+            "lunch finish we walk")
+
+    def test_empty_sentence(self):
+        """
+        Test if an empty sentence has no glosses.
+        """
+        self.assertEqual(auslan_glosses([]), [])
+
+    def test_text_to_gloss_given_spacy_model(self):
+        """
+        Test if glosses and the words they came from are returned side by side.
+        """
+        result = text_to_gloss_given_spacy_model(
+            "ignored", lambda text: doc("He/he/PRON/PRP has/have/AUX/VBZ eaten/eat/VERB/VBN ././PUNCT/."))
+        self.assertEqual(result["gloss_string"], "he eat finish")
+        self.assertEqual(result["glosses"], ["he", "eat", "finish"])
+        self.assertEqual(len(result["tokens"]), 3)
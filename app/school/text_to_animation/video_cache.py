@@ -0,0 +1,134 @@
+import os
+import json
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+# Number of rendered videos remembered locally, and how long (in seconds) a render is reused for
+DEFAULT_MAX_ITEMS = int(os.getenv("RENDER_CACHE_MAX_ITEMS", 1024))
+DEFAULT_TTL = float(os.getenv("RENDER_CACHE_TTL", 7 * 24 * 60 * 60))
+
+# Blob metadata field holding the cache key of the render that produced the video
+RENDER_KEY_METADATA = "render_key"
+
+
+def render_cache_key(blob_names, render_params):
+    """Content-addressed key for a render: the resolved gloss sequence plus everything that affects the output."""
+    payload = json.dumps({"poses": list(blob_names), "params": render_params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RenderedVideoCache:
+    """Cache of rendered sign videos, keyed by `render_cache_key`.
+
+    A local LRU maps keys to the storage path and public URL of a finished
+    render. On a local miss, the video already at the requested path is reused
+    if its metadata carries the same key (e.g. rendered by another worker).
+    Entries older than `ttl` seconds are rendered again.
+    """
+
+    def __init__(self, bucket_factory=None, max_items=DEFAULT_MAX_ITEMS, ttl=DEFAULT_TTL):
+        self.bucket_factory = bucket_factory
+        self.max_items = max_items
+        self.ttl = ttl
+
+        self._items = OrderedDict()  # key -> (gcs_path, url, rendered_at)
+        self._lock = threading.Lock()
+
+        self.local_hits = 0
+        self.storage_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _expired(self, rendered_at):
+        return self.ttl and time.time() - rendered_at > self.ttl
+
+    def _get_local(self, key):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            if self._expired(entry[2]):
+                del self._items[key]
+                self.evictions += 1
+                return None
+            self._items.move_to_end(key)
+            return entry
+
+    def _get_from_storage(self, key, gcs_path):
+        if self.bucket_factory is None:
+            return None
+        blob = self.bucket_factory().get_blob(gcs_path)
+        if blob is None or (blob.metadata or {}).get(RENDER_KEY_METADATA) != key:
+            return None
+
+        rendered_at = blob.updated.timestamp() if blob.updated else time.time()
+        if self._expired(rendered_at):
+            return None
+        return gcs_path, blob.public_url, rendered_at
+
+    def _copy_to(self, source_path, gcs_path):
+        # Same render under a different name: copy it server-side instead of rendering again
+        bucket = self.bucket_factory()
+        source = bucket.blob(source_path)
+        blob = bucket.copy_blob(source, bucket, gcs_path)
+        blob.make_public()
+        return blob.public_url
+
+    def lookup(self, key, gcs_path):
+        """Return the URL of a cached render of `key` available at `gcs_path`, or None."""
+        try:
+            entry = self._get_local(key)
+            if entry is not None:
+                source_path, url, rendered_at = entry
+                if source_path != gcs_path:
+                    url = self._copy_to(source_path, gcs_path)
+                    self.put(key, gcs_path, url, rendered_at)
+                with self._lock:
+                    self.local_hits += 1
+                return url
+
+            entry = self._get_from_storage(key, gcs_path)
+            if entry is not None:
+                self.put(key, *entry)
+                with self._lock:
+                    self.storage_hits += 1
+                return entry[1]
+        except Exception as e:
+            print(f"(video_cache) Lookup failed, rendering instead: {e}")
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, gcs_path, url, rendered_at=None):
+        if self.max_items <= 0:
+            return
+        with self._lock:
+            # A new render at this path replaces whatever other render was stored there
+            for stale_key in [k for k, entry in self._items.items() if entry[0] == gcs_path and k != key]:
+                del self._items[stale_key]
+            self._items[key] = (gcs_path, url, rendered_at or time.time())
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def stats(self):
+        with self._lock:
+            hits = self.local_hits + self.storage_hits
+            lookups = hits + self.misses
+            return {
+                "items": len(self._items),
+                "local_hits": self.local_hits,
+                "storage_hits": self.storage_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
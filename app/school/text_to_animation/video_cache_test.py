@@ -0,0 +1,147 @@
+import time
+from datetime import datetime, timezone
+from unittest import TestCase
+
+from app.school.text_to_animation.video_cache import RENDER_KEY_METADATA, RenderedVideoCache, render_cache_key
+
+
+class FakeBlob:
+    def __init__(self, bucket, name, metadata=None, updated=None):
+        self.bucket = bucket
+        self.name = name
+        self.metadata = metadata
+        self.updated = updated or datetime.now(timezone.utc)
+
+    @property
+    def public_url(self):
+        return f"https://storage.example/{self.name}"
+
+    def make_public(self):
+        self.bucket.public.add(self.name)
+
+
+class FakeBucket:
+    """In-memory stand-in for the parts of a storage bucket the cache uses."""
+
+    def __init__(self):
+        self.blobs = {}
+        self.public = set()
+        self.copies = []
+
+    def get_blob(self, name):
+        return self.blobs.get(name)
+
+    def blob(self, name):
+        return self.blobs.get(name) or FakeBlob(self, name)
+
+    def copy_blob(self, source, bucket, name):
+        self.copies.append((source.name, name))
+        blob = FakeBlob(bucket, name, dict(source.metadata or {}))
+        bucket.blobs[name] = blob
+        return blob
+
+
+class TestRenderCacheKey(TestCase):
+    """
+    Unit tests for render_cache_key.
+    """
+
+    def test_key_depends_on_poses_and_params(self):
+        """
+        Test if the key changes with the gloss sequence and render parameters, but not their dict order.
+        """
+        key = render_cache_key(["a.pose", "b.pose"], {"fps": 25, "width": 256})
+        self.assertEqual(key, render_cache_key(("a.pose", "b.pose"), {"width": 256, "fps": 25}))
+        self.assertNotEqual(key, render_cache_key(["b.pose", "a.pose"], {"fps": 25, "width": 256}))
+        self.assertNotEqual(key, render_cache_key(["a.pose", "b.pose"], {"fps": 30, "width": 256}))
+
+
+class TestRenderedVideoCache(TestCase):
+    """
+    Unit tests for RenderedVideoCache.
+    """
+
+    def setUp(self):
+        self.bucket = FakeBucket()
+        self.cache = RenderedVideoCache(lambda: self.bucket, max_items=2, ttl=60)
+
+    def test_local_hit(self):
+        """
+        Test if a render put in the cache is found at the same path without touching storage.
+        """
+        self.assertIsNone(self.cache.lookup("k1", "videos/a.mp4"))
+        self.cache.put("k1", "videos/a.mp4", "url-a")
+        self.assertEqual(self.cache.lookup("k1", "videos/a.mp4"), "url-a")
+        stats = self.cache.stats()
+        self.assertEqual((stats["local_hits"], stats["misses"], stats["hit_rate"]), (1, 1, 0.5))
+
+    def test_local_hit_at_another_path_copies_the_video(self):
+        """
+        Test if the same render requested at another path is copied in storage instead of rendered again.
+        """
+        self.bucket.blobs["videos/a.mp4"] = FakeBlob(self.bucket, "videos/a.mp4", {RENDER_KEY_METADATA: "k1"})
+        self.cache.put("k1", "videos/a.mp4", "url-a")
+
+        url = self.cache.lookup("k1", "videos/b.mp4")
+        self.assertEqual(url, "https://storage.example/videos/b.mp4")
+        self.assertEqual(self.bucket.copies, [("videos/a.mp4", "videos/b.mp4")])
+        self.assertIn("videos/b.mp4", self.bucket.public)
+        self.assertEqual(self.cache.lookup("k1", "videos/b.mp4"), url)
+        self.assertEqual(len(self.bucket.copies), 1)
+
+    def test_storage_hit_requires_matching_key(self):
+        """
+        Test if a video already in storage is reused only when its metadata has the same render key.
+        """
+        self.bucket.blobs["videos/a.mp4"] = FakeBlob(self.bucket, "videos/a.mp4", {RENDER_KEY_METADATA: "k1"})
+        self.assertIsNone(self.cache.lookup("k2", "videos/a.mp4"))
+        self.assertEqual(self.cache.lookup("k1", "videos/a.mp4"), "https://storage.example/videos/a.mp4")
+        self.assertEqual(self.cache.stats()["storage_hits"], 1)
+        # Now known locally
+        self.assertEqual(self.cache.lookup("k1", "videos/a.mp4"), "https://storage.example/videos/a.mp4")
+        self.assertEqual(self.cache.stats()["local_hits"], 1)
+
+    def test_expired_renders_miss(self):
+        """
+        Test if renders older than the ttl, locally or in storage, aren't reused.
+        """
+        self.cache.put("k1", "videos/a.mp4", "url-a", rendered_at=time.time() - 120)
+        self.bucket.blobs["videos/a.mp4"] = FakeBlob(
+            self.bucket, "videos/a.mp4", {RENDER_KEY_METADATA: "k1"},
+            updated=datetime.fromtimestamp(time.time() - 120, timezone.utc))
+        self.assertIsNone(self.cache.lookup("k1", "videos/a.mp4"))
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_evicts_least_recently_used(self):
+        """
+        Test if the least recently used render is dropped when the cache is full.
+        """
+        cache = RenderedVideoCache(max_items=2, ttl=60)
+        cache.put("k1", "a.mp4", "url-a")
+        cache.put("k2", "b.mp4", "url-b")
+        cache.lookup("k1", "a.mp4")
+        cache.put("k3", "c.mp4", "url-c")
+        self.assertIsNone(cache.lookup("k2", "b.mp4"))
+        self.assertEqual(cache.lookup("k1", "a.mp4"), "url-a")
+        self.assertEqual(cache.stats()["items"], 2)
+
+    def test_new_render_replaces_render_at_same_path(self):
+        """
+        Test if putting a new render at a path forgets the render previously stored there.
+        """
+        cache = RenderedVideoCache(max_items=4, ttl=60)
+        cache.put("k1", "a.mp4", "url-1")
+        cache.put("k2", "a.mp4", "url-2")
+        self.assertIsNone(cache.lookup("k1", "a.mp4"))
+        self.assertEqual(cache.lookup("k2", "a.mp4"), "url-2")
+
+    def test_storage_errors_fall_back_to_rendering(self):
+        """
+        Test if a failing bucket makes lookup miss instead of raising.
+        """
+        def broken_bucket():
+            raise ConnectionError("storage is down")
+
+        cache = RenderedVideoCache(broken_bucket, max_items=2, ttl=60)
+        self.assertIsNone(cache.lookup("k1", "a.mp4"))
+        self.assertEqual(cache.stats()["misses"], 1)
@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import argparse
+
+from app.school.text_to_animation.sense_index import WSD_MODEL_DIR
+
+
+# Where the ONNX export of the WSD model is kept, so it isn't re-exported on every start
+WSD_ONNX_MODEL_DIR = os.getenv("WSD_ONNX_MODEL_DIR", os.path.join(os.path.dirname(__file__), "wsd_models", "model_onnx"))
+
+# Inference backend for the WSD model:
+# - "torch": fp32 PyTorch (default)
+# - "int8": PyTorch with dynamic int8 quantization of the Linear layers
+# - "onnx": ONNX Runtime (needs `pip install optimum[onnxruntime]`)
+DEFAULT_BACKEND = os.getenv("WSD_BACKEND", "torch")
+BACKENDS = ("torch", "int8", "onnx")
+
+# Bundled WSD test sets used by the parity check
+TEST_SETS = [
+    os.path.join(os.path.dirname(__file__), "helper_scripts", "outputs", "test cases", "wsd_test_cases.json"),
+    os.path.join(os.path.dirname(__file__), "helper_scripts", "outputs", "test cases", "wsd_corrected_test_cases.json"),
+    os.path.join(os.path.dirname(__file__), "helper_scripts", "outputs", "wsd_test_cases_harder.json"),
+]
+
+
+def quantize_int8(model):
+    """Quantize the Linear layers of a SentenceTransformer to int8 in place. Weights are ~4x smaller."""
+    import torch
+
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def load_model(model_path=WSD_MODEL_DIR, backend=DEFAULT_BACKEND):
+    """
+    Load the WSD SentenceTransformer with the given backend. Every backend has the same
+    `encode` interface, so the rest of WSD doesn't change.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown WSD backend: {backend} (expected one of {', '.join(BACKENDS)})")
+
+    if backend == "onnx":
+        if model_path == WSD_MODEL_DIR and os.path.isdir(WSD_ONNX_MODEL_DIR):
+            return SentenceTransformer(WSD_ONNX_MODEL_DIR, backend="onnx")
+        print(f"(wsd_backend) No ONNX export at {WSD_ONNX_MODEL_DIR}, exporting in memory. "
+              f"Run `python -m app.school.text_to_animation.wsd_backend --export` to keep it.")
+        return SentenceTransformer(model_path, backend="onnx")
+
+    model = SentenceTransformer(model_path)
+    if backend == "int8":
+        model = quantize_int8(model)
+    return model
+
+
+def export_onnx(model_path=WSD_MODEL_DIR, output_dir=WSD_ONNX_MODEL_DIR):
+    """Export the model to ONNX and save it (with its tokenizer and pooling config) to `output_dir`."""
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_path, backend="onnx")
+    model.save_pretrained(output_dir)
+    print(f"(wsd_backend) Saved ONNX model to {output_dir}")
+
+
+def _load_test_cases(paths):
+    cases = []
+    for path in paths:
+        try:
+            with open(path) as f:
+                cases.extend(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"(wsd_backend) Skipping test set {path}: {e}")
+    return cases
+
+
+def parity_check(backend, reference="torch", paths=TEST_SETS, lemmatize=True):
+    """
+    Check that `backend` picks the same sense as `reference` on the bundled WSD test sets.
+
+    Returns:
+        dict: number of cases, mismatches (with examples), and encode latency of both backends.
+    """
+    from app.school.text_to_animation.WordSenseDisambig import WordSenseDisambiguation
+    from app.school.text_to_animation.nlp_service import nlp_service
+
+    cases = _load_test_cases(paths)
+    sentences = [case["test_sentence"] for case in cases]
+    if lemmatize:
+        sentences = nlp_service.lemmatize_batch(sentences)
+
+    results = {}
+    timings = {}
+    for name in (reference, backend):
+        wsd = WordSenseDisambiguation(backend=name)
+        start = time.time()
+        results[name] = wsd.disambiguate_batch(sentences)
+        timings[name] = time.time() - start
+        del wsd
+
+    mismatches = []
+    for case, sentence, expected, actual in zip(cases, sentences, results[reference], results[backend]):
+        if expected != actual:
+            mismatches.append({"sentence": sentence, "ambiguous_word": case["ambiguous_word"],
+                               reference: expected, backend: actual})
+
+    return {
+        "cases": len(cases),
+        "mismatches": len(mismatches),
+        "examples": mismatches[:20],
+        "seconds": timings,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export and check alternative WSD inference backends.")
+    parser.add_argument("--export", action="store_true", help=f"export the WSD model to ONNX at {WSD_ONNX_MODEL_DIR}")
+    parser.add_argument("--parity", choices=[b for b in BACKENDS if b != "torch"],
+                        help="compare the chosen senses of a backend against fp32 torch on the bundled test sets")
+    parser.add_argument("--max-mismatches", type=int, default=0,
+                        help="exit with an error if the parity check finds more mismatches than this")
+    parser.add_argument("--no-lemmatize", action="store_true")
+    args = parser.parse_args()
+
+    if args.export:
+        export_onnx()
+
+    if args.parity:
+        report = parity_check(args.parity, lemmatize=not args.no_lemmatize)
+        print(json.dumps(report, indent=2))
+        print(f"(wsd_backend) {report['mismatches']} of {report['cases']} cases differ between torch and {args.parity}")
+        if report["mismatches"] > args.max_mismatches:
+            raise SystemExit(1)
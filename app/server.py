@@ -1,13 +1,40 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, url_for, g
 from flask_cors import CORS
-from app.school.Connectinator import Connectinator
+from flask_sock import Sock
+from simple_websocket import ConnectionClosed
+from app.school.Connectinator import Connectinator, SignToTextUnavailable
+from app.school.t2s_jobs import QueueFullError, T2S_JOB_RETRY_AFTER
+from app.school.keypoint_codec import KEYPOINT_MIMETYPE, KeypointFormatError, decode_frames, frames_from_json
 import os
+import json
+import uuid
+import asyncio
+import hmac
+import threading
 from time import time
 
 app = Flask(__name__)
 CORS(app)
 app.config['CORS_HEADERS'] = 'Content-Type'
 
+# WebSocket pings keep idle keypoint streams open through proxies
+app.config['SOCK_SERVER_OPTIONS'] = {'ping_interval': 25}
+sock = Sock(app)
+
+# How often (in seconds) an idle keypoint stream checks for a new translation to push
+STREAM_PUSH_INTERVAL = float(os.getenv("STREAM_PUSH_INTERVAL", 0.5))
+
+# Each open keypoint stream holds one of the worker's threads (GUNICORN_THREADS in Dockerfile.api) for
+# as long as it is open. Streams past this limit are refused, and those clients fall back to
+# POST /api/keypoints, so the remaining threads stay free for /api/t2s and other requests.
+KEYPOINT_STREAM_MAX = int(os.getenv("KEYPOINT_STREAM_MAX", 24))
+keypoint_stream_slots = threading.BoundedSemaphore(KEYPOINT_STREAM_MAX)
+
+# Shared secret that callers of /api/lexicon/refresh send in the X-Lexicon-Token header.
+# The endpoint is disabled when it isn't set
+LEXICON_REFRESH_TOKEN = os.getenv("LEXICON_REFRESH_TOKEN", "")
+LEXICON_TOKEN_HEADER = 'X-Lexicon-Token'
+
 # model_path = os.path.join('app', r'sign_to_text_model.keras')
 
 # if not os.path.exists(model_path):
@@ -19,17 +46,116 @@ app.config['CORS_HEADERS'] = 'Content-Type'
 # MAIN CLASS WHICH CONNECTS TO ALL THE SYSTEM
 connectinator = Connectinator()
 
+# Sign to text clients are told apart by an X-Session-ID header, or else by this cookie
+SESSION_HEADER = 'X-Session-ID'
+SESSION_COOKIE = 's2t_session'
+
+
+def get_session_id():
+    # Browsers can't set headers on WebSockets, so the stream passes its id in the query string
+    session_id = (request.headers.get(SESSION_HEADER) or request.args.get('session_id')
+                  or request.cookies.get(SESSION_COOKIE))
+    if not session_id:
+        # New client without an id: give it one, sent back as a cookie
+        session_id = g.get('new_session_id') or uuid.uuid4().hex
+        g.new_session_id = session_id
+    return session_id
+
+
+@app.after_request
+def set_session_cookie(response):
+    new_session_id = g.get('new_session_id')
+    if new_session_id:
+        response.set_cookie(SESSION_COOKIE, new_session_id, httponly=True, samesite='Lax')
+    return response
+
 @app.route('/api/keypoints', methods=['POST'])
 async def receive_keypoints():
-    data = request.json  # Get the JSON data from the request
-
-    # You can process, store, or log the keypoints here
-    # print("Received landmarks:", data)  # Print keypoints for demonstration
+    # Packed frames (see keypoint_codec) are decoded straight into arrays, anything else is one JSON frame.
+    # Either way the connectinator gets the same KeypointBatch
+    try:
+        if request.mimetype == KEYPOINT_MIMETYPE:
+            batch = decode_frames(request.get_data())
+        else:
+            batch = frames_from_json([request.json])
+    except KeypointFormatError as e:
+        connectinator.logger.error(f'Error decoding keypoints: {e}')
+        return jsonify({"error": "Could not decode keypoint frames"}), 400
 
     # Sending data to the connectinator
-    await connectinator.process_frame(data)
+    session_id = get_session_id()
+    try:
+        await connectinator.process_frames(batch, session_id)
+    except SignToTextUnavailable as e:
+        connectinator.logger.error(f'Error processing keypoints: {e}')
+        return jsonify({"error": "Sign to text is not available"}), 503
+    except Exception as e:
+        connectinator.logger.error(f'Error processing keypoints: {e}')
+        return jsonify({"error": "Internal Server Error"}), 500
+
+    # Clients without an open keypoint stream get the translation here instead of having it pushed
+    return jsonify({"message": "Keypoints received successfully!",
+                    "translation": connectinator.get_translation(session_id),
+                    "flag": connectinator.get_gem_flag()})
+
+
+# Persistent alternative to /api/keypoints and polling /api/get_sign_to_text and /api/getGemFlag.
+# The client sends packed frames (see keypoint_codec) as binary messages, or
+# {"type": "frames", "frames": [{"keypoints": [...]}, ...]} batches as text, and gets
+# {"type": "translation", "translation": ..., "flag": ...} pushed whenever either changes,
+# or a single {"type": "busy"} if KEYPOINT_STREAM_MAX streams are already open.
+@sock.route('/api/keypoints/stream')
+def keypoints_stream(ws):
+    if not keypoint_stream_slots.acquire(blocking=False):
+        connectinator.logger.warning('Keypoint stream refused, %d streams already open', KEYPOINT_STREAM_MAX)
+        ws.send(json.dumps({"type": "busy"}))
+        return
+
+    try:
+        _run_keypoints_stream(ws)
+    finally:
+        keypoint_stream_slots.release()
 
-    return jsonify({"message": "Keypoints received successfully!"})
+
+def _run_keypoints_stream(ws):
+    session_id = get_session_id()
+    connectinator.logger.info('Keypoint stream opened for session %s', session_id)
+
+    # process_frame is async; each stream runs it on its own event loop
+    loop = asyncio.new_event_loop()
+    last_update = None
+    unavailable_sent = False
+    try:
+        while True:
+            message = ws.receive(timeout=STREAM_PUSH_INTERVAL)
+            if message is not None:
+                try:
+                    if isinstance(message, (bytes, bytearray)):
+                        batch = decode_frames(message)
+                    else:
+                        data = json.loads(message)
+                        batch = frames_from_json(data['frames'] if data.get('type') == 'frames' else [])
+                    loop.run_until_complete(connectinator.process_frames(batch, session_id))
+                except SignToTextUnavailable as e:
+                    # Not the client's fault and won't change while the stream is open, so say it once
+                    if not unavailable_sent:
+                        connectinator.logger.error(f'Error processing keypoint stream: {e}')
+                        ws.send(json.dumps({"type": "error", "error": "Sign to text is not available"}))
+                        unavailable_sent = True
+                except Exception as e:
+                    connectinator.logger.error(f'Error processing keypoint stream: {e}')
+                    ws.send(json.dumps({"type": "error", "error": "Could not process keypoints. Check the frame format"}))
+
+            update = {"type": "translation", "translation": connectinator.get_translation(session_id),
+                      "flag": connectinator.get_gem_flag()}
+            if update != last_update:
+                ws.send(json.dumps(update))
+                last_update = update
+
+    except ConnectionClosed:
+        connectinator.logger.info('Keypoint stream closed for session %s', session_id)
+    finally:
+        loop.close()
 
 
 @app.route('/api/model_output', methods=['GET', 'POST'])
@@ -40,10 +166,13 @@ def model_output_parse():
             'Received request on /model_output: %s', model_output)  # Updated log message
 
         processed_output = connectinator.format_model_output(
-            model_output['model_output'])
+            model_output['model_output'], get_session_id())
 
         return jsonify({"message": processed_output}), 200
 
+    except SignToTextUnavailable as e:
+        connectinator.logger.error(f'Error processing request: {e}')
+        return jsonify({"error": "Sign to text is not available"}), 503
     except Exception as e:
         connectinator.logger.error(f'Error processing request: {e}')
         return jsonify({"error": "Internal Server Error. Check JSON Format"}), 500
@@ -51,7 +180,7 @@ def model_output_parse():
 
 @app.route('/api/get_sign_to_text', methods=["GET", "POST"])
 def get_sign_to_text():
-    translated_message = connectinator.get_translation()
+    translated_message = connectinator.get_translation(get_session_id())
 
     return jsonify({"translation": translated_message}), 200
 
@@ -70,19 +199,85 @@ def t2s_parse():
 
         t2s_input = request.get_json()
         connectinator.logger.info('Received request on /t2s: %s', t2s_input)
-        processed_t2s_phrase = connectinator.format_sign_text(t2s_input['t2s_input'])
+        result = connectinator.create_sign_video(t2s_input['t2s_input'])
         print(f"POSE VIDEO CREATED - Time taken: {time()-start:0.4f}")
+        connectinator.logger.info('Text to sign timings: %s, cache hits: %s', result["timings"], result["cache"])
 
-        return jsonify({"message": processed_t2s_phrase}), 200
+        # "message" is the gloss list, kept for older clients
+        return jsonify({"message": result["glosses"], **result}), 200
     
     except Exception as e:
         connectinator.logger.error(f'Error processing request: {e}')
         return jsonify({"error": "Internal Server Error. Check JSON Format"}), 500
 
 
+# Same as /api/t2s, but returns a job id straight away and renders in the background
+@app.route('/api/t2s/jobs', methods=['POST'])
+def t2s_submit_job():
+    try:
+        t2s_input = request.get_json()
+        connectinator.logger.info('Received request on /t2s/jobs: %s', t2s_input)
+        job_id = connectinator.submit_sign_text(t2s_input['t2s_input'])
+
+        response = jsonify({"job_id": job_id, "status": "queued",
+                            "status_url": url_for('t2s_job_status', job_id=job_id)})
+        response.headers['Location'] = url_for('t2s_job_status', job_id=job_id)
+        return response, 202
+
+    except QueueFullError as e:
+        # Shed load rather than let the queue grow without bound
+        connectinator.logger.warning(f'Rejected text to sign job: {e}')
+        response = jsonify({"error": "Too many text to sign requests. Try again shortly"})
+        response.headers['Retry-After'] = str(T2S_JOB_RETRY_AFTER)
+        return response, 503
+
+    except Exception as e:
+        connectinator.logger.error(f'Error processing request: {e}')
+        return jsonify({"error": "Internal Server Error. Check JSON Format"}), 500
+
+
+@app.route('/api/t2s/jobs/<job_id>', methods=['GET'])
+def t2s_job_status(job_id):
+    job = connectinator.get_sign_text_job(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+
+    return jsonify(job), 200
+
+
+@app.route('/api/t2s/jobs', methods=['GET'])
+def t2s_job_stats():
+    return jsonify(connectinator.t2s_jobs.stats()), 200
+
+
+@app.route('/api/lexicon/refresh', methods=['POST'])
+def refresh_lexicon():
+    # Rebuilding lists the whole bucket and registering names invalidates the pose caches, so only trusted callers
+    token = request.headers.get(LEXICON_TOKEN_HEADER, '')
+    if not LEXICON_REFRESH_TOKEN or not hmac.compare_digest(token.encode(), LEXICON_REFRESH_TOKEN.encode()):
+        connectinator.logger.warning('Refused lexicon refresh from %s', request.remote_addr)
+        return jsonify({"error": "Forbidden"}), 403
+
+    try:
+        # Optional body: {"pose_names": ["word", ...]} to register new uploads without a full rebuild
+        refresh_input = request.get_json(silent=True) or {}
+        indexed = connectinator.refresh_lexicon(refresh_input.get('pose_names'))
+
+        return jsonify({"indexed": indexed}), 200
+
+    except Exception as e:
+        connectinator.logger.error(f'Error refreshing lexicon index: {e}')
+        return jsonify({"error": "Internal Server Error"}), 500
+
+
+@app.route('/api/cache_stats', methods=['GET'])
+def cache_stats():
+    return jsonify(connectinator.get_cache_stats()), 200
+
+
 @app.route('/api/get_phrase')
 def get_phrase():
-    return connectinator.front_end_translation_variable  # the end
+    return connectinator.get_translation(get_session_id())  # the end
 
 
 if __name__ == "__main__":
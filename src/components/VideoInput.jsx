@@ -1,4 +1,6 @@
 import React, { useEffect, useRef, useState } from "react";
+import { getSessionId, SESSION_HEADER } from "../lib/sessionId";
+import { encodeKeypointFrames, KEYPOINT_MIMETYPE } from "../lib/keypointCodec";
 
 const API_BASE_URL = "/api"
 
@@ -34,6 +36,12 @@ const VideoInput = React.forwardRef((props, ref) => {
     const [error, setError] = useState(null); // State to handle errors
     const [isTransmitting, setIsTransmitting] = useState(true); // State to control keypoint transmission
 
+    // onResults is registered once per camera start, so it reads the latest onKeypoints through a ref
+    const onKeypointsRef = useRef(props.onKeypoints);
+    onKeypointsRef.current = props.onKeypoints;
+    const onTranslationRef = useRef(props.onTranslation);
+    onTranslationRef.current = props.onTranslation;
+
     useEffect(() => {
         const loadMediaPipe = async () => {
             await loadScript(cameraUtilsUrl);
@@ -179,17 +187,24 @@ const VideoInput = React.forwardRef((props, ref) => {
                             : null,
                     ];
 
-                    // Send keypoints data to backend
+                    // Hand keypoints to the parent's stream, which batches them over a WebSocket
+                    if (onKeypointsRef.current && onKeypointsRef.current(keypoints)) {
+                        return;
+                    }
+
+                    // Without an open stream, send keypoints data to backend one frame at a time
                     fetch(API_BASE_URL + "/keypoints", {
                         method: "POST",
                         headers: {
-                            "Content-Type": "application/json",
+                            "Content-Type": KEYPOINT_MIMETYPE,
+                            [SESSION_HEADER]: getSessionId(),
                         },
-                        body: JSON.stringify({ keypoints }), // Convert data to JSON
+                        body: encodeKeypointFrames([keypoints]), // Packed binary frame
                     })
                         .then((response) => response.json())
                         .then((data) => {
-                            console.log("Data saved successfully:", data);
+                            // The response carries the session's translation, as the stream would push it
+                            if (onTranslationRef.current) onTranslationRef.current(data);
                         })
                         .catch((error) => {
                             console.error("Error saving data:", error);
@@ -211,7 +226,7 @@ const VideoInput = React.forwardRef((props, ref) => {
             cameraRef.current.start();
             setIsCameraOn(true);
             
-            // Notify parent that camera started (to resume polling)
+            // Notify parent that camera started (to resume streaming)
             if (props.onCameraStart) {
                 props.onCameraStart();
             }
@@ -0,0 +1,109 @@
+import { useEffect, useRef, useCallback } from 'react';
+import { getSessionId } from '../lib/sessionId';
+import { encodeKeypointFrames } from '../lib/keypointCodec';
+
+const STREAM_PATH = "/api/keypoints/stream";
+
+// Frames are sent in batches: every FLUSH_INTERVAL_MS, or as soon as MAX_BATCH_FRAMES are waiting
+const FLUSH_INTERVAL_MS = 100;
+const MAX_BATCH_FRAMES = 10;
+
+const RECONNECT_DELAY_MS = 1000;
+// Wait longer before reconnecting when the server has no room for another stream
+const BUSY_RECONNECT_DELAY_MS = 30000;
+
+// Send batches as packed binary frames (see lib/keypointCodec) rather than JSON
+const USE_BINARY_FRAMES = true;
+
+// Streams keypoint frames to the backend over one WebSocket and receives
+// translations pushed back on it, instead of a request per frame and polling.
+export const useSignToTextStream = (mode, isStreaming, setTranslatedText, setLoading) => {
+  const socketRef = useRef(null);
+  const pendingRef = useRef([]);
+
+  const flush = useCallback(() => {
+    const socket = socketRef.current;
+    if (!socket || socket.readyState !== WebSocket.OPEN || pendingRef.current.length === 0) return;
+
+    if (USE_BINARY_FRAMES) {
+      socket.send(encodeKeypointFrames(pendingRef.current.map((frame) => frame.keypoints)));
+    } else {
+      socket.send(JSON.stringify({ type: "frames", frames: pendingRef.current }));
+    }
+    pendingRef.current = [];
+  }, []);
+
+  // Returns false when the stream can't take the frame (not streaming, or the socket isn't open yet),
+  // so the caller can send it another way
+  const sendKeypoints = useCallback((keypoints) => {
+    const socket = socketRef.current;
+    if (!socket || socket.readyState !== WebSocket.OPEN) return false;
+
+    const pending = pendingRef.current;
+    pending.push({ keypoints });
+    if (pending.length >= MAX_BATCH_FRAMES) flush();
+    return true;
+  }, [flush]);
+
+  // Applies a translation update, from the stream or from a POST /api/keypoints response
+  // (the fallback while the socket isn't open, e.g. refused at the server's stream limit)
+  const receiveTranslation = useCallback((data) => {
+    if (data.translation === undefined) return;
+    setTranslatedText(data.translation);
+    setLoading(data.flag);
+  }, [setTranslatedText, setLoading]);
+
+  useEffect(() => {
+    if (mode !== "videoToText" || !isStreaming) return;
+
+    let closed = false;
+    let reconnectTimer;
+    let reconnectDelay = RECONNECT_DELAY_MS;
+
+    const connect = () => {
+      const protocol = window.location.protocol === "https:" ? "wss:" : "ws:";
+      const url = `${protocol}//${window.location.host}${STREAM_PATH}?session_id=${encodeURIComponent(getSessionId())}`;
+      const socket = new WebSocket(url);
+      socketRef.current = socket;
+      reconnectDelay = RECONNECT_DELAY_MS;
+
+      socket.onmessage = (event) => {
+        const data = JSON.parse(event.data);
+        if (data.type === "translation") {
+          console.log("Translation update:", data);
+          receiveTranslation(data);
+        } else if (data.type === "busy") {
+          // Refused: frames go through the POST fallback until a later reconnect succeeds
+          console.warn("Keypoint stream unavailable, server is at its stream limit");
+          reconnectDelay = BUSY_RECONNECT_DELAY_MS;
+        } else if (data.type === "error") {
+          console.error("Keypoint stream error:", data.error);
+        }
+      };
+
+      socket.onerror = (error) => {
+        console.error("Keypoint stream error:", error);
+      };
+
+      socket.onclose = () => {
+        // At most one batch is waiting; it is dropped rather than sent after newer frames
+        pendingRef.current = [];
+        if (!closed) reconnectTimer = setTimeout(connect, reconnectDelay);
+      };
+    };
+
+    connect();
+    const flushTimer = setInterval(flush, FLUSH_INTERVAL_MS);
+
+    return () => {
+      closed = true;
+      clearTimeout(reconnectTimer);
+      clearInterval(flushTimer);
+      if (socketRef.current) socketRef.current.close();
+      socketRef.current = null;
+      pendingRef.current = [];
+    };
+  }, [mode, isStreaming, flush, receiveTranslation]);
+
+  return { sendKeypoints, receiveTranslation };
+};
@@ -51,7 +51,7 @@ export const useTextToVideoTranslation = (
       const data = await response.json();
       console.log("Full response:", data);
 
-      const translatedText = data.message || "No translation available.";
+      const translatedText = data.glosses || data.message || "No translation available.";
       setTranslatedText(translatedText);
 
       // Extract grammar parsed text for the hint component
@@ -63,25 +63,38 @@ export const useTextToVideoTranslation = (
         setGrammarParsedText("");
       }
 
-      // Generate the Firebase video path using the original array format
-      const firebaseURL = "gs://auslan-194e5.appspot.com/output_videos/";
-      const fileType = ".mp4";
+      if (data.timings) {
+        console.log("Stage timings (s):", data.timings, "Cache hits:", data.cache);
+      }
 
-      let parsedVideoName;
-      if (Array.isArray(translatedText)) {
-        const formattedItems = translatedText.map(item => `'${item}'`);
-        parsedVideoName = `[${formattedItems.join(', ')}]`;
+      // The server returns the URL of the video it rendered (or reused)
+      let videoUrl;
+      if ("video_url" in data) {
+        if (!data.video_url)
+          throw new Error("No video could be created for this text");
+        videoUrl = data.video_url;
       } else {
-        parsedVideoName = translatedText;
-      }
+        // Older servers only return the glosses, so derive the Firebase video path from them
+        const firebaseURL = "gs://auslan-194e5.appspot.com/output_videos/";
+        const fileType = ".mp4";
 
-      const videoPath = firebaseURL + parsedVideoName + fileType;
+        let parsedVideoName;
+        if (Array.isArray(translatedText)) {
+          const formattedItems = translatedText.map(item => `'${item}'`);
+          parsedVideoName = `[${formattedItems.join(', ')}]`;
+        } else {
+          parsedVideoName = translatedText;
+        }
 
-      console.log("Video Path:", videoPath);
-      console.log("Parsed Video Name:", parsedVideoName);
+        const videoPath = firebaseURL + parsedVideoName + fileType;
 
-      const videoRef = ref(storage, videoPath);
-      const videoUrl = await getDownloadURL(videoRef);
+        console.log("Video Path:", videoPath);
+        console.log("Parsed Video Name:", parsedVideoName);
+
+        const videoRef = ref(storage, videoPath);
+        videoUrl = await getDownloadURL(videoRef);
+      }
+      console.log("Video URL:", videoUrl);
       setAnimatedSignVideo(videoUrl);
     } catch (error) {
       console.error("Error:", error);
@@ -0,0 +1,101 @@
+// Packs keypoint frames into the binary format decoded by app/school/keypoint_codec.py,
+// roughly 10x smaller than the same frames as JSON.
+//
+// Layout (little endian):
+//   header: "KP", version (u8), dtype (u8), frame count (u16), landmarks (u8), channels (u8)
+//   one byte per frame with a bit per landmark group that was present, padded to a multiple of 4 bytes
+//   frames x landmarks x channels (x, y, z, visibility) as float16 or float32
+
+export const KEYPOINT_MIMETYPE = "application/x-keypoint-frames";
+
+// Pose, left hand, right hand; missing groups are zero-filled
+const LANDMARK_GROUPS = [33, 21, 21];
+const LANDMARKS_PER_FRAME = LANDMARK_GROUPS.reduce((sum, count) => sum + count, 0);
+const CHANNELS = 4;
+
+const VERSION = 1;
+const DTYPE_FLOAT16 = 1;
+const DTYPE_FLOAT32 = 2;
+const HEADER_BYTES = 8;
+
+type Landmark = { x: number; y: number; z: number; visibility?: number };
+export type KeypointFrame = (Landmark[] | null | undefined)[];
+
+const floatView = new Float32Array(1);
+const bitsView = new Uint32Array(floatView.buffer);
+
+// Float32 to IEEE half precision bits, rounding to nearest
+function toFloat16Bits(value: number): number {
+  floatView[0] = value;
+  const x = bitsView[0];
+  const sign = (x >>> 16) & 0x8000;
+  const exponent = (x >>> 23) & 0xff;
+  const mantissa = x & 0x7fffff;
+
+  if (exponent === 0xff) return sign | 0x7c00 | (mantissa ? 0x200 : 0); // Inf or NaN
+  if (exponent > 142) return sign | 0x7c00; // too large: Inf
+  if (exponent < 102) return sign; // too small: zero
+
+  if (exponent < 113) {
+    // Subnormal half
+    const full = mantissa | 0x800000;
+    const shift = 126 - exponent;
+    let half = full >>> shift;
+    const remainder = full & ((1 << shift) - 1);
+    const halfway = 1 << (shift - 1);
+    if (remainder > halfway || (remainder === halfway && (half & 1))) half += 1;
+    return sign | half;
+  }
+
+  let half = ((exponent - 112) << 10) | (mantissa >>> 13);
+  const remainder = mantissa & 0x1fff;
+  if (remainder > 0x1000 || (remainder === 0x1000 && (half & 1))) half += 1; // may carry into Inf
+  return sign | half;
+}
+
+export function encodeKeypointFrames(frames: KeypointFrame[], useFloat16 = true): ArrayBuffer {
+  const count = frames.length;
+  const presenceBytes = (count + 3) & ~3;
+  const valueBytes = useFloat16 ? 2 : 4;
+  const dataOffset = HEADER_BYTES + presenceBytes;
+  const buffer = new ArrayBuffer(dataOffset + count * LANDMARKS_PER_FRAME * CHANNELS * valueBytes);
+  const view = new DataView(buffer);
+
+  view.setUint8(0, 0x4b); // "K"
+  view.setUint8(1, 0x50); // "P"
+  view.setUint8(2, VERSION);
+  view.setUint8(3, useFloat16 ? DTYPE_FLOAT16 : DTYPE_FLOAT32);
+  view.setUint16(4, count, true);
+  view.setUint8(6, LANDMARKS_PER_FRAME);
+  view.setUint8(7, CHANNELS);
+
+  let offset = dataOffset;
+  const write = (value: number) => {
+    if (useFloat16) view.setUint16(offset, toFloat16Bits(value), true);
+    else view.setFloat32(offset, value, true);
+    offset += valueBytes;
+  };
+
+  frames.forEach((frame, i) => {
+    let present = 0;
+    LANDMARK_GROUPS.forEach((size, group) => {
+      const landmarks = frame[group];
+      if (landmarks && landmarks.length) present |= 1 << group;
+      for (let j = 0; j < size; j++) {
+        const point = landmarks && landmarks[j];
+        if (point) {
+          write(point.x);
+          write(point.y);
+          write(point.z);
+          write(point.visibility ?? 0);
+        } else {
+          // The buffer starts zeroed
+          offset += CHANNELS * valueBytes;
+        }
+      }
+    });
+    view.setUint8(HEADER_BYTES + i, present);
+  });
+
+  return buffer;
+}
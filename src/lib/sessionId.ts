@@ -0,0 +1,22 @@
+// Identifies this tab's sign to text session to the backend, so concurrent
+// signers don't share recognised words or translations.
+const SESSION_STORAGE_KEY = "s2tSessionId";
+
+export const SESSION_HEADER = "X-Session-ID";
+
+function createSessionId(): string {
+  if (typeof crypto !== "undefined" && typeof crypto.randomUUID === "function") {
+    return crypto.randomUUID();
+  }
+  return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+}
+
+// One id per tab, kept across reloads of the same tab
+export function getSessionId(): string {
+  let sessionId = sessionStorage.getItem(SESSION_STORAGE_KEY);
+  if (!sessionId) {
+    sessionId = createSessionId();
+    sessionStorage.setItem(SESSION_STORAGE_KEY, sessionId);
+  }
+  return sessionId;
+}
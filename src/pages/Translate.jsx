@@ -11,7 +11,7 @@ import '../styles/TranslateStyles.css';
 import 'react-toastify/dist/ReactToastify.css';
 
 // Custom hooks
-import { useVideoToTextPolling } from '../hooks/useVideoToTextPolling';
+import { useSignToTextStream } from '../hooks/useSignToTextStream';
 import { useTextToVideoTranslation } from '../hooks/useTextToVideoTranslation';
 import { useSwapAnimation } from '../hooks/useSwapAnimation';
 
@@ -22,7 +22,7 @@ const TranslateApp = () => {
     const [animatedSignVideo, setAnimatedSignVideo] = useState(null);
     const videoInputRef = useRef(null);
     const [loading, setLoading] = useState(false);
-    const [isPolling, setIsPolling] = useState(true);
+    const [isStreaming, setIsStreaming] = useState(true);
     const [showClearButton, setShowClearButton] = useState(false);
     const [clearButtonAnimation, setClearButtonAnimation] = useState('');
     const [isMobile, setIsMobile] = useState(window.innerWidth < 768);
@@ -32,7 +32,7 @@ const TranslateApp = () => {
     );
 
     // Custom hooks
-    useVideoToTextPolling(mode, isPolling, setTranslatedText, setLoading);
+    const { sendKeypoints, receiveTranslation } = useSignToTextStream(mode, isStreaming, setTranslatedText, setLoading);
     
     const { translateText } = useTextToVideoTranslation(
         storage,
@@ -52,7 +52,7 @@ const TranslateApp = () => {
 
     // Handle camera start notification
     const handleCameraStart = () => {
-        setIsPolling(true);
+        setIsStreaming(true);
         if (videoInputRef.current) {
             videoInputRef.current.startTransmission();
         }
@@ -87,7 +87,7 @@ const TranslateApp = () => {
         setClearButtonAnimation('clear-button-exit');
         setTimeout(() => {
             setTranslatedText("");
-            setIsPolling(false);
+            setIsStreaming(false);
             if (videoInputRef.current) {
                 videoInputRef.current.stopTransmission();
             }
@@ -140,7 +140,7 @@ const TranslateApp = () => {
                         <div style={styles.panel} className={`panel ${animationState.isAnimating ? 'panel-swap-animation' : ''}`}>
                             <h2 style={styles.panelTitle}>Auslan</h2>
                             <div style={styles.videoInputContainer}>
-                                <VideoInput ref={videoInputRef} onCameraStart={handleCameraStart} isMobile={isMobile} />
+                                <VideoInput ref={videoInputRef} onCameraStart={handleCameraStart} onKeypoints={sendKeypoints} onTranslation={receiveTranslation} isMobile={isMobile} />
                             </div>
                         </div>
 
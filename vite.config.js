@@ -13,6 +13,7 @@ export default defineConfig({
       '/api': {
         target: 'http://localhost:5173', // Adjust to the backend server URL in server.py
         changeOrigin: true,
+        ws: true, // keypoint stream WebSocket
       },
     },
   },